@@ -10,7 +10,7 @@ router = APIRouter()
 
 @router.get("/fetch-rj-info")
 async def fetch_rj_info(rj_code: str = Query(..., description="RJ 코드 (예: RJ01169914)")):
-    result = crawl_dlsite_info(rj_code)
+    result = await crawl_dlsite_info(rj_code)
     if result is None:
         return {"success": False, "message": "크롤링 실패"}
     return {"success": True, "data": result}
@@ -3,8 +3,8 @@
 # function: 업로드된 파일 메타 목록 조회
 # ----------------------
 
-from fastapi import APIRouter, HTTPException, Query, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Form, Request
+from fastapi.responses import FileResponse, StreamingResponse, Response
 from app.db.mongo import db
 from app.models.file_meta import FileMeta
 from typing import List, Optional
@@ -13,13 +13,21 @@ from fastapi import Path
 from bson import ObjectId
 from fastapi import HTTPException
 from app.utils.logger import logger
-import shutil
-from app.services.tag_manager import get_tag_names_by_ids
+from app.core.blocking import run_blocking, save_fileobj
+from app.services.tag_manager import get_tag_names_by_ids, get_tag_map, tag_cache, apply_tag_diff
+from app.services.search_index import build_search_grams, query_grams, relevance_pipeline
+from app.services.group_index import assign_file_group, refresh_group
+from app.utils.zip_stream import stream_zip
+from urllib.parse import quote
 
 from motor.motor_asyncio import AsyncIOMotorClient
 import re
+import base64
+import json
+import time
+from collections import OrderedDict
 # db테스트
-from bson.json_util import dumps
+from bson.json_util import dumps, loads
 from fastapi.responses import JSONResponse
 
 DATA_DIR = "/data"
@@ -29,28 +37,140 @@ router = APIRouter()
 client = AsyncIOMotorClient(MONGO_URI)
 db = client["noah_db"]
 
+KO_COLLATION = {"locale": "ko", "strength": 1}
+COUNT_CACHE_TTL = 30                                     # 전체 개수 캐시 유지 시간(초)
+COUNT_CACHE_SIZE = 256                                   # 전체 개수 캐시 최대 쿼리 수
+_count_cache: "OrderedDict[str, tuple]" = OrderedDict()  # 쿼리 → (저장 시각, 개수)
+ZIP_MAX_FILES = 5000                                     # ZIP 일괄 다운로드 최대 파일 수
+PATH_CACHE_SIZE = 1024                                   # 다운로드 해시 → 경로 캐시 크기
+DOWNLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_path_cache: "OrderedDict[str, tuple]" = OrderedDict()   # 해시 → (경로, 파일명)
+
+# ----------------------
+# param   : sort - "created" 또는 "name"
+# function: 정렬 기준별 (필드, 방향) 목록 - _id를 마지막 키로 붙여 순서를 유일하게 만듦
+# return  : [(field, order), ("_id", order)]
+# ----------------------
+def _sort_spec(sort: str):
+    if sort == "created":
+        return [("created_at", -1), ("_id", -1)]
+    return [("file_name", 1), ("_id", 1)]
+
+# ----------------------
+# param   : sort - 정렬 기준
+# param   : doc - 현재 페이지의 마지막 문서
+# function: 다음 페이지 시작점을 불투명 토큰으로 인코딩 (정렬 키 + _id)
+# return  : base64 문자열
+# ----------------------
+def _encode_cursor(sort: str, doc: dict) -> str:
+    field = _sort_spec(sort)[0][0]
+    raw = dumps({"s": sort, "v": doc.get(field), "id": doc["_id"]})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+# ----------------------
+# param   : sort - 정렬 기준
+# param   : token - _encode_cursor 로 만든 토큰
+# function: 토큰 이후 문서만 고르는 keyset 조건 생성 (skip 없이 인덱스 범위 탐색)
+# return  : MongoDB 조건 dict
+# ----------------------
+def _cursor_query(sort: str, token: str) -> dict:
+    try:
+        data = loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except Exception:
+        raise HTTPException(status_code=400, detail="잘못된 cursor 입니다.")
+    if data.get("s") != sort:
+        raise HTTPException(status_code=400, detail="cursor의 정렬 기준이 다릅니다.")
+
+    (field, order), _ = _sort_spec(sort)
+    op = "$lt" if order == -1 else "$gt"
+    return {"$or": [
+        {field: {op: data["v"]}},
+        {field: data["v"], "_id": {op: data["id"]}},
+    ]}
+
+# ----------------------
+# param   : query - 필터 조건
+# param   : mode - "exact" (매번 계산) / "estimate" (컬렉션 메타데이터) / "cached" (TTL 캐시) / "none"
+# function: 목록 전체 개수 계산 - 매 페이지마다 count_documents를 돌지 않도록 캐시
+#           캐시는 LRU (최대 COUNT_CACHE_SIZE 개), 저장할 때 만료된 항목 정리
+# return  : 개수 또는 None
+# ----------------------
+async def _count_total(query: dict, mode: str):
+    if mode == "none":
+        return None
+    if mode == "estimate" and query == {"status": "completed"}:
+        return await db.file_meta.estimated_document_count()
+
+    key = dumps(query, sort_keys=True)
+    cached = _count_cache.get(key)
+    if mode != "exact" and cached and time.monotonic() - cached[0] < COUNT_CACHE_TTL:
+        _count_cache.move_to_end(key)
+        return cached[1]
+
+    total = await db.file_meta.count_documents(query)
+    now = time.monotonic()
+    _count_cache[key] = (now, total)
+    _count_cache.move_to_end(key)
+    for old_key in [k for k, (saved_at, _) in _count_cache.items() if now - saved_at >= COUNT_CACHE_TTL]:
+        del _count_cache[old_key]
+    while len(_count_cache) > COUNT_CACHE_SIZE:
+        _count_cache.popitem(last=False)
+    return total
+
 # ----------------------
-# param   : page - 현재 페이지 번호 (1부터)
+# param   : query - 필터 조건
+# param   : sort - 정렬 기준
+# param   : size - 페이지 크기
+# param   : cursor - (선택) 이전 응답의 next 토큰, 없으면 page 기준 skip (하위 호환)
+# param   : page - cursor가 없을 때의 페이지 번호
+# function: keyset 방식으로 한 페이지 조회 (size+1개를 읽어 다음 페이지 존재 여부 판단)
+# return  : (문서 리스트, next 토큰 또는 None)
+# ----------------------
+async def _find_page(query: dict, sort: str, size: int, cursor: Optional[str], page: int):
+    find_query = query
+    if cursor:
+        find_query = {"$and": [query, _cursor_query(sort, cursor)]}
+
+    collation = KO_COLLATION if sort != "created" else None
+    cursor_obj = db.file_meta.find(find_query, {"search_grams": 0, "lsh_bands": 0}, collation=collation).sort(_sort_spec(sort))
+    if not cursor:
+        cursor_obj = cursor_obj.skip((page - 1) * size)
+
+    raw_items = await cursor_obj.limit(size + 1).to_list(length=size + 1)
+    next_token = None
+    if len(raw_items) > size:
+        raw_items = raw_items[:size]
+        next_token = _encode_cursor(sort, raw_items[-1])
+    return raw_items, next_token
+
+# ----------------------
+# param   : page - 현재 페이지 번호 (1부터, cursor가 없을 때만 사용)
 # param   : size - 페이지당 항목 수
+# param   : cursor - 이전 응답의 next 토큰 (keyset 페이징, 깊은 페이지도 첫 페이지와 같은 비용)
+# param   : count - 전체 개수 계산 방식 ("auto" | "exact" | "estimate" | "none")
 # function: 완료된 업로드만 페이징하여 파일 메타 목록 반환
-# return  : {"total": 전체 수, "page": 현재 페이지, "size": 페이지당 수, "items": [파일 정보]}
+# return  : {"total": 전체 수, "page": 현재 페이지, "size": 페이지당 수, "items": [파일 정보], "next": 다음 페이지 토큰}
 # ----------------------
 @router.get("/", response_model=None)
-async def get_files(page: int = Query(1, ge=1), size: int = Query(10, ge=1, le=100),sort: str = Query("created")):
+async def get_files(
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    sort: str = Query("created"),
+    cursor: Optional[str] = Query(None),
+    count: str = Query("auto")
+):
     try:
 
         # ----------------------
         # 완료된 파일만 필터링
         # ----------------------
-        skip = (page - 1) * size
         query = {"status": "completed"}
-                # 정렬 기준 설정
-        sort_field = "created_at" if sort == "created" else "file_name"
-        sort_order = -1 if sort == "created" else 1
+        sort = "created" if sort == "created" else "name"
+
+        # auto: 첫 페이지는 정확한 개수, 이후 페이지는 캐시된 개수 재사용
+        total = await _count_total(query, ("exact" if not cursor else "cached") if count == "auto" else count)
+        raw_items, next_token = await _find_page(query, sort, size, cursor, page)
 
-        total = await db.file_meta.count_documents(query)
-        cursor = db.file_meta.find(query, collation={"locale": "ko", "strength": 1}).sort(sort_field, sort_order).skip(skip).limit(size)
-        raw_items = await cursor.to_list(length=size)
         # ----------------------
         # 모든 태그 ObjectId 수집
         # ----------------------
@@ -63,13 +183,9 @@ async def get_files(page: int = Query(1, ge=1), size: int = Query(10, ge=1, le=1
                 tag_id_set.add(raw_tags)
 
         # ----------------------
-        # 태그 이름 매핑 가져오기
+        # 태그 이름 매핑 가져오기 (인메모리 태그 캐시)
         # ----------------------
-        tag_map = {}
-        if tag_id_set:
-            tag_cursor = db.tags.find({"_id": {"$in": list(tag_id_set)}})
-            async for tag in tag_cursor:
-                tag_map[tag["_id"]] = tag["tag_name"]
+        tag_map = await get_tag_map(db, tag_id_set)
 
         # ----------------------
         # 변환된 결과 구성 - 태그명, 썸네일 포함
@@ -98,9 +214,13 @@ async def get_files(page: int = Query(1, ge=1), size: int = Query(10, ge=1, le=1
             "total": total,
             "page": page,
             "size": size,
-            "items": items
+            "items": items,
+            "next": next_token
         }
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.exception("[FILES] 파일 목록 조회 실패")
         raise HTTPException(status_code=500, detail="파일 목록 조회 중 오류 발생")
@@ -112,33 +232,126 @@ async def get_files(page: int = Query(1, ge=1), size: int = Query(10, ge=1, le=1
 # function: 파일 경로에서 직접 파일 반환
 # return  : FileResponse (application/octet-stream)
 # ----------------------
-@router.get("/download/{file_hash}")
-async def download_file_by_hash(file_hash: str):
+class HashFileResponse(FileResponse):
+    # Range/If-Range/다중 Range/HEAD 는 Starlette FileResponse 가 처리
+    # 서버가 http.response.pathsend 를 지원하면 sendfile로 전송, 아니면 1MB 단위로 읽어 전송
+    chunk_size = 1024 * 1024
+
+
+# ----------------------
+# param   : file_hash - 파일 해시
+# function: 다운로드 경로 조회 (해시 → 경로 LRU 캐시 우선, 파일이 사라졌으면 캐시 버리고 DB 재조회)
+# return  : (경로, 원래 파일명, stat) 또는 None
+# ----------------------
+async def _resolve_download(file_hash: str):
+    cached = _path_cache.get(file_hash)
+    if cached:
+        try:
+            st = os.stat(cached[0])
+            _path_cache.move_to_end(file_hash)
+            return cached[0], cached[1], st
+        except OSError:
+            _path_cache.pop(file_hash, None)
+
+    meta = await db.file_meta.find_one({"file_hash": file_hash}, {"file_path": 1, "file_name": 1})
+    if not meta:
+        return None
+
+    file_path = os.path.join(DATA_DIR, meta["file_path"])
     try:
-        # 파일 메타데이터 조회
-        meta = await db.file_meta.find_one({"file_hash": file_hash})
-        if not meta:
-            raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+        st = os.stat(file_path)
+    except OSError:
+        return None
+
+    _path_cache[file_hash] = (file_path, meta["file_name"])
+    while len(_path_cache) > PATH_CACHE_SIZE:
+        _path_cache.popitem(last=False)
+    return file_path, meta["file_name"], st
+
+# ----------------------
+# function: 파일 삭제/이름 변경 시 다운로드 경로 캐시 제거
+# ----------------------
+def _forget_path(file_hash: str):
+    _path_cache.pop(file_hash, None)
 
-        file_path = os.path.join(DATA_DIR, meta["file_path"])
-        original_name = meta["file_name"]
+# ----------------------
+# param   : header - If-None-Match 헤더 값
+# param   : etag - 현재 ETag ("해시")
+# function: 클라이언트 캐시가 유효한지 (약한 비교, * 포함)
+# ----------------------
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+# ----------------------
+# param   : file_hash - 다운로드할 파일 해시
+# function: 파일 다운로드 - 해시가 곧 내용이므로 ETag = 해시, 1년 immutable 캐시
+#           If-None-Match 일치 시 304, Range(단일/다중)와 If-Range 로 이어받기 지원
+# return  : 파일 스트림 / 304
+# ----------------------
+@router.api_route("/download/{file_hash}", methods=["GET", "HEAD"])
+async def download_file_by_hash(file_hash: str, request: Request):
+    try:
+        resolved = await _resolve_download(file_hash)
+        if not resolved:
+            raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+        file_path, original_name, st = resolved
 
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="파일이 서버에 존재하지 않습니다.")
+        etag = f'"{file_hash}"'
+        cache_headers = {"ETag": etag, "Cache-Control": DOWNLOAD_CACHE_CONTROL}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=cache_headers)
 
-        # 실제 파일 응답
-        return FileResponse(
+        return HashFileResponse(
             path=file_path,
             filename=original_name,
-            media_type="application/octet-stream"  
+            media_type="application/octet-stream",
+            headers=cache_headers,
+            stat_result=st
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"[DOWNLOAD] 파일 다운로드 중 예외 발생: {e}")
         raise HTTPException(status_code=500, detail="파일 다운로드 중 오류가 발생했습니다.")
 
 
 
+# ----------------------
+# param   : hashes - 묶을 파일 해시 목록 (그룹 구성원, 검색 결과 등)
+# param   : name - 내려받을 ZIP 파일명 (확장자 제외)
+# function: 여러 파일을 하나의 ZIP으로 즉석 스트리밍 (무압축, 임시 파일 없음, 메모리 사용량 일정)
+# return  : application/zip 스트림
+# ----------------------
+@router.post("/zip")
+async def download_zip(
+    hashes: List[str] = Form(...),
+    name: str = Form("noah_files")
+):
+    if len(hashes) > ZIP_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {ZIP_MAX_FILES}개까지 묶을 수 있습니다.")
+
+    paths = {}
+    async for doc in db.file_meta.find({"file_hash": {"$in": hashes}}, {"file_hash": 1, "file_path": 1, "file_name": 1}):
+        paths[doc["file_hash"]] = (os.path.join(DATA_DIR, doc["file_path"]), doc.get("file_name") or doc["file_hash"])
+
+    # 요청한 순서 유지, 중복 해시 제거
+    entries = [paths.pop(h) for h in hashes if h in paths]
+    if not entries:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+
+    zip_name = quote(f"{name or 'noah_files'}.zip")
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{zip_name}"}
+    )
+
+
+
 # ----------------------
 # param   : file_hash - 삭제할 파일의 해시 문자열
 # function: 파일 삭제 및 tag_count 감소 처리
@@ -161,7 +374,7 @@ async def delete_file_by_hash(file_hash: str):
         # 파일 삭제
         # ----------------------
         if os.path.exists(file_path):
-            os.remove(file_path)
+            await run_blocking(os.remove, file_path)
             logger.info(f"[DELETE] 실제 파일 삭제됨: {file_path}")
         else:
             logger.warning(f"[DELETE] 파일 경로 없음 (DB만 존재): {file_path}")
@@ -171,7 +384,7 @@ async def delete_file_by_hash(file_hash: str):
         if thumb_path:
             abs_thumb_path = os.path.join("/data", "thumbs", os.path.basename(thumb_path))
             if os.path.exists(abs_thumb_path):
-                os.remove(abs_thumb_path)
+                await run_blocking(os.remove, abs_thumb_path)
                 logger.info(f"[DELETE] 썸네일 삭제 완료: {abs_thumb_path}")
 
 
@@ -180,6 +393,13 @@ async def delete_file_by_hash(file_hash: str):
         # ----------------------
         await db.file_meta.delete_one({"file_hash": file_hash})
         logger.info(f"[DELETE] 메타데이터 삭제 완료: {file_hash}")
+        _forget_path(file_hash)
+
+        # 소속 유사 그룹에서 제외
+        await refresh_group(db, meta.get("group_key"))
+
+        # 이 파일을 가리키는 URL 캐시 제거 (같은 링크를 다시 받을 수 있도록)
+        await db.url_cache.delete_many({"file_hash": file_hash})
 
         # ----------------------
         # 태그 카운트 감소
@@ -216,25 +436,19 @@ async def update_file_tags(
         old_tag_ids = meta.get("tags", [])
 
         # ----------------------
-        # 기존 태그 count 감소
+        # 태그 diff 반영 (추가된 태그 +1, 빠진 태그 -1, bulk_write 1회)
         # ----------------------
-        from app.services.tag_manager import (
-            decrease_tag_count_on_delete,
-            process_tags_on_upload
-        )
-        await decrease_tag_count_on_delete(db, old_tag_ids)
+        new_tag_ids = await apply_tag_diff(db, old_tag_ids, tags)
 
         # ----------------------
-        # 새 태그 처리 (중복이면 count 증가)
-        # ----------------------
-        new_tag_ids = await process_tags_on_upload(db, tags, is_new_file=True)
-
-        # ----------------------
-        # DB 업데이트
+        # DB 업데이트 (태그가 바뀌었으므로 검색 색인도 갱신)
         # ----------------------
         await db.file_meta.update_one(
             {"file_hash": file_hash},
-            {"$set": {"tags": new_tag_ids}}
+            {"$set": {
+                "tags": new_tag_ids,
+                "search_grams": build_search_grams(meta.get("file_name", ""), tags)
+            }}
         )
 
         return {"message": f"{meta['file_name']} 태그가 수정되었습니다.", "tags": tags}
@@ -244,6 +458,17 @@ async def update_file_tags(
         raise HTTPException(status_code=500, detail="태그 수정 중 오류가 발생했습니다.")
 
 
+# ----------------------
+# param   : q - 입력 중인 태그 접두어
+# param   : limit - 최대 개수
+# function: 태그 자동완성 (인메모리 정렬 배열 prefix 탐색, tag_count 내림차순, DB 조회 없음)
+# return  : 태그 리스트 [{tag_name, tag_count}]
+# ----------------------
+@router.get("/tags/autocomplete")
+async def autocomplete_tags(q: str = Query(""), limit: int = Query(10, ge=1, le=100)):
+    return tag_cache.autocomplete(q, limit)
+
+
 # ----------------------
 # param   : q - 검색어 (선택, 없으면 전체 반환)
 # function: 태그명 검색 (부분일치, 대소문자 무시)
@@ -272,17 +497,21 @@ async def search_tags(q: Optional[str] = None, limit: int = 20):
 # ----------------------
 # param   : tag - 태그명 (선택)
 # param   : keyword - 파일명 검색 키워드 (선택)
-# param   : page - 페이지 번호 (1부터)
-# param   : sort - 정렬 기준 ("created" 또는 "name")
-# function: 태그 또는 키워드 기반 파일 검색 + 페이징 + 정렬 + 한글 collation 대응
-# return  : {"total", "page", "size", "items": [...]}
+# param   : page - 페이지 번호 (1부터, cursor가 없을 때만 사용)
+# param   : sort - 정렬 기준 ("created", "name", 키워드 검색 시 "relevance")
+# param   : cursor - 이전 응답의 next 토큰 (keyset 페이징, relevance 정렬은 page 사용)
+# param   : count - 전체 개수 계산 방식 ("auto" | "exact" | "none")
+# function: 태그 또는 키워드(n-gram 색인) 기반 파일 검색 + 페이징 + 정렬 + 한글 collation 대응
+# return  : {"total", "page", "size", "items": [...], "next"}
 # ----------------------
 @router.get("/search")
 async def search_files(
     tag: Optional[str] = Query(None),
     keyword: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
-    sort: str = Query("created")
+    sort: str = Query("created"),
+    cursor: Optional[str] = Query(None),
+    count: str = Query("auto")
 ):
     logger.info(f"[SEARCH DEBUG] tag={tag}, keyword={keyword}, page={page}, sort={sort}")
     
@@ -293,13 +522,22 @@ async def search_files(
         query = {"status": "completed"}
 
         if tag:
-            tag_doc = await db.tags.find_one({"tag_name": tag})
-            if not tag_doc:
-                raise HTTPException(status_code=404, detail="해당 태그를 찾을 수 없습니다.")
-            query["tags"] = tag_doc["_id"]
+            tag_id = tag_cache.get_id(tag)
+            if tag_id is None:
+                tag_doc = await db.tags.find_one({"tag_name": tag})
+                if not tag_doc:
+                    raise HTTPException(status_code=404, detail="해당 태그를 찾을 수 없습니다.")
+                tag_id = tag_doc["_id"]
+                tag_cache.add(tag_id, tag)
+            query["tags"] = tag_id
 
         elif keyword:
-            query["file_name"] = {"$regex": keyword, "$options": "i"}
+            # n-gram 색인 조회 (색인 불가한 1글자 검색어만 정규식으로 처리)
+            grams = query_grams(keyword)
+            if grams:
+                query["search_grams"] = {"$all": grams}
+            else:
+                query["file_name"] = {"$regex": re.escape(keyword), "$options": "i"}
 
         else:
             raise HTTPException(status_code=400, detail="tag 또는 keyword 중 하나는 반드시 입력되어야 합니다.")
@@ -307,37 +545,36 @@ async def search_files(
         logger.info(f"[SEARCH DEBUG] tag={tag}, keyword={keyword}, query={query}")
 
         # ----------------------
-        # 정렬 및 페이징 설정
+        # 정렬 및 페이징
+        #   relevance: 키워드 n-gram 일치도 순 (page 기준)
+        #   created/name: keyset 페이징 (한글 collation은 파일명 정렬에만 적용)
         # ----------------------
         size = 10
-        skip = (page - 1) * size
-        sort_field = "created_at" if sort == "created" else "file_name"
-        sort_order = -1 if sort == "created" else 1
-
-        # ----------------------
-        # MongoDB 쿼리 실행 (한글 대응 collation 포함)
-        # ----------------------
-        total = await db.file_meta.count_documents(query)
-        cursor = db.file_meta.find(query, collation={"locale": "ko", "strength": 1}) \
-            .sort(sort_field, sort_order) \
-            .skip(skip) \
-            .limit(size)
-
-        raw_items = await cursor.to_list(length=size)
+        total = await _count_total(query, ("exact" if not cursor else "cached") if count == "auto" else count)
+
+        if sort == "relevance" and "search_grams" in query:
+            pipeline = relevance_pipeline(query, keyword, query["search_grams"]["$all"], (page - 1) * size, size + 1)
+            raw_items = await db.file_meta.aggregate(pipeline).to_list(length=size + 1)
+            next_token = None
+            has_next = len(raw_items) > size
+            raw_items = raw_items[:size]
+        else:
+            sort = "created" if sort == "created" else "name"
+            raw_items, next_token = await _find_page(query, sort, size, cursor, page)
+            has_next = next_token is not None
 
         # ----------------------
         # 결과 구성
         # ----------------------
+        tag_map = await get_tag_map(db, {tid for item in raw_items for tid in item.get("tags", [])})
+
         items = []
         for item in raw_items:
             item.pop("_id", None)
             item["file_hash"] = item.get("file_hash", "")
 
-
-            #태그 이름
-            tag_ids = item.get("tags", [])
-            tag_names = await get_tag_names_by_ids(db, tag_ids)
-            item["tags"] = tag_names
+            #태그 이름 (페이지 전체를 한 번에 매핑)
+            item["tags"] = [tag_map[tid] for tid in item.get("tags", []) if tid in tag_map]
             
             item["thumb_path"] = os.path.basename(item.get("thumb_path", ""))
             items.append(item)
@@ -346,7 +583,9 @@ async def search_files(
             "total": total,
             "page": page,
             "size": size,
-            "items": items
+            "items": items,
+            "next": next_token,
+            "has_next": has_next
         }
 
     except HTTPException:
@@ -366,7 +605,6 @@ async def get_file_meta(file_hash: str):
     if not doc:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
 
-    from app.services.tag_manager import get_tag_names_by_ids
     tag_names = await get_tag_names_by_ids(db, doc.get("tags", []))
 
     return {
@@ -408,7 +646,7 @@ async def update_file_metadata(
             if old_thumb:
                 abs_path = os.path.join("/data/thumbs", os.path.basename(old_thumb))
                 if os.path.exists(abs_path):
-                    os.remove(abs_path)
+                    await run_blocking(os.remove, abs_path)
 
             thumbs_dir = os.path.join("/data", "thumbs")
             os.makedirs(thumbs_dir, exist_ok=True)
@@ -416,8 +654,7 @@ async def update_file_metadata(
             new_thumb_name = f"{file_hash}_{thumb.filename}"
             new_thumb_path = os.path.join(thumbs_dir, new_thumb_name)
 
-            with open(new_thumb_path, "wb") as f:
-                shutil.copyfileobj(thumb.file, f)
+            await run_blocking(save_fileobj, thumb.file, new_thumb_path)
 
             update_fields["thumb_path"] = f"/thumbs/{new_thumb_name}"
 
@@ -428,18 +665,12 @@ async def update_file_metadata(
         logger.debug(f"[META-UPDATE] 수신된 tags: {tags} → 정제 후: {cleaned_tags}")
 
         # ----------------------
-        # 태그 처리 (기존 감소 + 새 증가)
+        # 태그 처리 (기존/새 태그 diff만 bulk_write로 반영)
         # ----------------------
-        from app.services.tag_manager import (
-            decrease_tag_count_on_delete,
-            process_tags_on_upload
-        )
-
         old_tags = meta.get("tags", [])
-        await decrease_tag_count_on_delete(db, old_tags)
-
-        new_tag_ids = await process_tags_on_upload(db, cleaned_tags, is_new_file=True)
+        new_tag_ids = await apply_tag_diff(db, old_tags, cleaned_tags)
         update_fields["tags"] = new_tag_ids
+        update_fields["search_grams"] = build_search_grams(file_name, cleaned_tags)
 
 
         # ----------------------
@@ -450,7 +681,7 @@ async def update_file_metadata(
 
         if old_file_path != new_file_path:
             if os.path.exists(old_file_path):
-                os.rename(old_file_path, new_file_path)
+                await run_blocking(os.rename, old_file_path, new_file_path)
                 logger.info(f"[META-UPDATE] 파일명 변경됨: {old_file_path} → {new_file_path}")
 
                 # 실제 경로가 바뀌었으므로 DB의 file_path도 함께 수정
@@ -465,6 +696,13 @@ async def update_file_metadata(
             {"file_hash": file_hash},
             {"$set": update_fields}
         )
+        _forget_path(file_hash)
+
+        # ----------------------
+        # 이름이 바뀌었으면 유사 그룹 재배정 (이전 그룹도 재집계)
+        # ----------------------
+        if file_name != meta.get("file_name"):
+            await assign_file_group(db, file_hash, file_name, old_key=meta.get("group_key"))
 
         return {"message": "파일 정보가 성공적으로 수정되었습니다."}
 
@@ -476,117 +714,69 @@ async def update_file_metadata(
 
 
 # ----------------------
-# function: 파일명에서 단어 추출
+# 그룹 화면에서 쓰는 필드만 조회 (색인/경로 등 제외)
 # ----------------------
-def normalize(text: str) -> str:
-    # 대소문자 무시, 특수문자 제거, 전부 붙이기
-    return re.sub(r"[^\w가-힣]", "", text.lower())
-
-def tokenize(text: str) -> set:
-    # 1. 먼저 띄어쓰기 기준 분할
-    base = re.sub(r"[^\w가-힣]", " ", text.lower())
-    words = base.split()
-
-    # 2. 추가로 붙어있는 형태를 나눠서 탐지 (슬라이딩 윈도우식)
-    merged = normalize(text)
-    chunks = re.findall(r"[가-힣]+|[a-z]+|[0-9]+", merged)
-
-    tokens = set(words + chunks)
-
-    # 조사 제거
-    stopwords = {"입니다", "하다", "의", "에", "이", "가", "을", "를", "다", "zip", "ver"}
-    filtered = {t for t in tokens if t not in stopwords and len(t) > 1}
-
-    return set(sorted(filtered))
+GROUP_FILE_PROJECTION = {"_id": 0, "file_name": 1, "file_hash": 1, "file_size": 1, "thumb_path": 1, "tags": 1}
+NDJSON_BATCH = 50  # 스트리밍 시 구성원을 한 번에 조회할 그룹 수
 
 # ----------------------
-# function: 자카드 유사도 계산
+# param   : group_docs - file_groups 문서 리스트
+# function: 그룹 구성원을 한 번의 $in 조회로 읽어 그룹 순서대로 정리 (tags → str, 썸네일은 파일명만)
+# return  : [[file, ...], ...] (남은 구성원이 2개 이상인 그룹만)
 # ----------------------
-def jaccard_similarity(set1, set2):
-    if not set1 or not set2:
-        return 0
-    return len(set1 & set2) / len(set1 | set2)
-
-
-# ----------------------
-# API: 유사 파일 그룹핑 (RJ코드 기준 그룹 우선)
-# ----------------------
-@router.get("/grouped")
-async def get_grouped_files():
-    all_files = await db.file_meta.find({}).to_list(length=None)
-    tokenized = [(f, tokenize(f["file_name"])) for f in all_files]
+async def _load_groups(group_docs: List[dict]) -> List[List[dict]]:
+    hashes = [h for doc in group_docs for h in doc.get("members", [])]
+    files_by_hash = {}
+    async for item in db.file_meta.find({"file_hash": {"$in": hashes}}, GROUP_FILE_PROJECTION):
+        tags = item.get("tags", [])
+        item["tags"] = [str(t) for t in (tags if isinstance(tags, list) else [tags])]
+        item["thumb_path"] = os.path.basename(item.get("thumb_path", "") or "")
+        item.setdefault("file_name", "")
+        item.setdefault("file_size", 0)
+        files_by_hash[item["file_hash"]] = item
 
-    used = set()
     groups = []
-
-    # ----------------------
-    # Step 1. RJ코드 기준 그룹핑
-    # ----------------------
-    rj_groups = {}
-    rj_pattern = re.compile(r"RJ\d{4,}", re.IGNORECASE)
-
-    for idx, (file, _) in enumerate(tokenized):
-        match = rj_pattern.search(file["file_name"])
-        if match:
-            rj_code = match.group(0).upper()
-            rj_groups.setdefault(rj_code, []).append(idx)
-
-    for rj_code, indices in rj_groups.items():
-        group = []
-        for idx in indices:
-            if idx in used:
-                continue
-            used.add(idx)
-            group.append(dict(tokenized[idx][0]))
+    for doc in group_docs:
+        group = [files_by_hash[h] for h in doc.get("members", []) if h in files_by_hash]
         if len(group) > 1:
             groups.append(group)
+    return groups
 
-    # ----------------------
-    # Step 2. 자카드 유사도 기반 추가 그룹핑
-    # ----------------------
-    for i, (file_i, tokens_i) in enumerate(tokenized):
-        if i in used:
-            continue
-
-        group = [dict(file_i)]
-        used.add(i)
-
-        for j in range(i + 1, len(tokenized)):
-            if j in used:
-                continue
-
-            file_j, tokens_j = tokenized[j]
-            sim = jaccard_similarity(tokens_i, tokens_j)
-
-            if sim >= 0.4:
-                group.append(dict(file_j))
-                used.add(j)
-
-        if len(group) > 1:
-            groups.append(group)
-
-    # ----------------------
-    # Step 3. 그룹 클린업
-    # ----------------------
-    cleaned_groups = []
-    for group in groups:
-        cleaned_group = []
-        for item in group:
-            item = dict(item)
-            item.pop("_id", None)
-
-            # tags: ObjectId → str
-            if "tags" in item and isinstance(item["tags"], list):
-                item["tags"] = [str(t) for t in item["tags"]]
-            elif isinstance(item.get("tags"), ObjectId):
-                item["tags"] = [str(item["tags"])]
+# ----------------------
+# param   : start - 건너뛸 그룹 수
+# function: 그룹을 NDJSON 한 줄씩 전송 (NDJSON_BATCH 그룹마다 구성원 조회, 메모리는 배치 크기만큼만 사용)
+# ----------------------
+async def _stream_groups_ndjson(start: int):
+    cursor = db.file_groups.find({}, {"members": 1}).sort([("updated_at", -1), ("_id", 1)]).skip(start)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= NDJSON_BATCH:
+            for group in await _load_groups(batch):
+                yield json.dumps(group, ensure_ascii=False) + "\n"
+            batch = []
+    if batch:
+        for group in await _load_groups(batch):
+            yield json.dumps(group, ensure_ascii=False) + "\n"
 
-            item["thumb_path"] = os.path.basename(item.get("thumb_path", "") or "")
-            item["file_name"] = item.get("file_name", "")
-            item["file_hash"] = item.get("file_hash", "")
-            item["file_size"] = item.get("file_size", 0)
+# ----------------------
+# param   : page, size - 그룹 단위 페이징
+# param   : format - "json"(기본, 페이지 단위) | "ndjson"(page부터 끝까지 그룹 1개 = 1줄 스트리밍)
+# function: 사전 계산된 유사 파일 그룹 조회 (RJ코드 그룹 + MinHash/LSH 자카드 0.4 그룹, 최근 변경 순)
+#           그룹은 등록/이름변경/삭제 시 group_index 가 증분 갱신, 여기서는 읽기만 함
+# return  : {"groups": [[file, ...]], "total", "page", "size"} 또는 application/x-ndjson 스트림
+# ----------------------
+@router.get("/grouped")
+async def get_grouped_files(
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=200),
+    format: str = Query("json")
+):
+    if format == "ndjson":
+        return StreamingResponse(_stream_groups_ndjson((page - 1) * size), media_type="application/x-ndjson")
 
-            cleaned_group.append(item)
-        cleaned_groups.append(cleaned_group)
+    total = await db.file_groups.count_documents({})
+    group_docs = await db.file_groups.find({}, {"members": 1}).sort([("updated_at", -1), ("_id", 1)]) \
+        .skip((page - 1) * size).limit(size).to_list(length=size)
 
-    return {"groups": cleaned_groups}
+    return {"groups": await _load_groups(group_docs), "total": total, "page": page, "size": size}
@@ -1,10 +1,13 @@
 # ----------------------
 # file   : app/api/get_upload_id.py
-# function: 고유 업로드 ID 발급 API
+# function: 고유 업로드 ID 발급 API + 업로드 전 중복 파일 협상 API
 # return  : {"upload_id": "UUID"}
 # ----------------------
 from fastapi import APIRouter
+from pydantic import BaseModel
+from typing import List, Optional
 import uuid
+from app.db.mongo import db
 
 router = APIRouter()
 
@@ -12,3 +15,73 @@ router = APIRouter()
 async def get_upload_id():
     upload_id = str(uuid.uuid4())
     return {"upload_id": upload_id}
+
+
+# ----------------------
+# 협상 요청 스키마 - 파일별 크기 + (전체 해시 또는 샘플 지문)
+# ----------------------
+class NegotiateFile(BaseModel):
+    name: str
+    size: int
+    hash: Optional[str] = None         # 클라이언트가 계산한 전체 SHA256 (선택)
+    sample_hash: Optional[str] = None  # compute_sample_hash 규칙의 샘플 지문 (선택)
+
+class NegotiateRequest(BaseModel):
+    files: List[NegotiateFile]
+
+# ----------------------
+# param   : body - { files: [{name, size, hash?, sample_hash?}] }
+# function: 서버에 이미 있는 파일을 한 번의 쿼리로 판별 → 클라이언트는 나머지만 업로드
+#           2단계 중복 검사의 입구 (크기 + 샘플 지문으로 후보 선별 → 후보만 전체 해시로 확정)
+#           exists 는 전체 해시가 일치할 때만 true
+#           크기 + 샘플 지문만 일치하면 probable (앞/중간/끝 64KB만 비교하므로 다른 파일일 수 있음)
+#           → 클라이언트는 probable 파일만 전체 해시를 계산해 한 번 더 협상 (exists 일 때만 업로드 생략)
+# return  : { upload_id, files: [{name, exists, probable, match, file_hash}] }
+# ----------------------
+@router.post("/negotiate-upload")
+async def negotiate_upload(body: NegotiateRequest):
+    hashes = [f.hash for f in body.files if f.hash]
+    samples = [f.sample_hash for f in body.files if f.sample_hash]
+
+    # ----------------------
+    # 전체 해시 / 샘플 지문 중 하나라도 일치하는 문서 일괄 조회
+    # ----------------------
+    by_hash = {}
+    by_sample = {}
+    conditions = []
+    if hashes:
+        conditions.append({"file_hash": {"$in": hashes}})
+    if samples:
+        conditions.append({"sample_hash": {"$in": samples}})
+
+    if conditions:
+        cursor = db.file_meta.find(
+            {"$or": conditions},
+            {"_id": 0, "file_hash": 1, "file_size": 1, "sample_hash": 1}
+        )
+        async for doc in cursor:
+            by_hash[doc.get("file_hash")] = doc
+            if doc.get("sample_hash"):
+                by_sample[(doc.get("file_size"), doc["sample_hash"])] = doc
+
+    # ----------------------
+    # 파일별 판정 (전체 해시 일치 = 확정, 크기 + 샘플 지문 일치 = 후보)
+    # ----------------------
+    results = []
+    for f in body.files:
+        match = None
+        doc = None
+        if f.hash and f.hash in by_hash:
+            match, doc = "hash", by_hash[f.hash]
+        elif f.sample_hash and (f.size, f.sample_hash) in by_sample:
+            match, doc = "sample", by_sample[(f.size, f.sample_hash)]
+
+        results.append({
+            "name": f.name,
+            "exists": match == "hash",
+            "probable": match == "sample",
+            "match": match,
+            "file_hash": doc.get("file_hash") if doc else None
+        })
+
+    return {"upload_id": str(uuid.uuid4()), "files": results}
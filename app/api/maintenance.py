@@ -12,9 +12,15 @@ from app.db.mongo import db
 from app.utils.crawler import crawl_dlsite_info
 from app.utils.logger import logger
 import re
-import requests
+import aiohttp
 from io import BytesIO
 from datetime import datetime
+from app.core.blocking import run_blocking, save_fileobj
+from app.core.http_client import get_http_session
+from app.utils.hash_util import compute_sample_hash
+from app.services.search_index import build_search_grams, backfill_search_grams
+from app.services.tag_manager import tag_cache
+from app.services.group_index import rebuild_groups, assign_file_group
 
 DATA_DIR = "/data"
 
@@ -66,6 +72,70 @@ async def fix_filenames_to_hash_prefix():
 
 
 
+# ----------------------
+# function: sample_hash가 없는 기존 파일에 샘플 지문 채우기 (업로드 전 중복 협상용)
+# return  : { "updated": int, "missing": int }
+# ----------------------
+@router.post("/admin/backfill-sample-hash")
+async def backfill_sample_hash():
+    updated = 0
+    missing = 0
+
+    cursor = file_meta.find({"sample_hash": {"$exists": False}}, {"file_path": 1})
+    async for doc in cursor:
+        file_path = doc.get("file_path")
+        if not file_path or not os.path.exists(file_path):
+            missing += 1
+            continue
+
+        try:
+            sample_hash = await run_blocking(compute_sample_hash, file_path)
+            await file_meta.update_one(
+                {"_id": doc["_id"]},
+                {"$set": {"sample_hash": sample_hash}}
+            )
+            updated += 1
+        except Exception as e:
+            logger.error(f"[SAMPLE-HASH] {file_path} 처리 실패: {str(e)}")
+
+    logger.info(f"[SAMPLE-HASH] 갱신 {updated}개, 파일 없음 {missing}개")
+    return {"updated": updated, "missing": missing}
+
+
+
+# ----------------------
+# function: 전체 파일의 n-gram 검색 색인 재생성
+# return  : { "updated": int }
+# ----------------------
+@router.post("/admin/rebuild-search-index")
+async def rebuild_search_index():
+    updated = await backfill_search_grams(db, tag_cache.get_name, rebuild=True)
+    return {"updated": updated}
+
+
+
+# ----------------------
+# function: 전체 유사 파일 그룹 재계산 (증분 배정 누적으로 어긋난 그룹 정리)
+# return  : { "groups": int }
+# ----------------------
+@router.post("/admin/rebuild-groups")
+async def rebuild_file_groups():
+    groups = await rebuild_groups(db)
+    return {"groups": groups}
+
+
+
+# ----------------------
+# param   : url - 썸네일 이미지 URL
+# param   : path - 저장 경로
+# function: 썸네일 다운로드 (공용 세션) 후 저장 (파일 쓰기는 run_blocking)
+# ----------------------
+async def _download_thumb(url: str, path: str):
+    async with get_http_session().get(url, timeout=aiohttp.ClientTimeout(total=10), ssl=True) as response:
+        response.raise_for_status()
+        content = await response.read()
+    await run_blocking(save_fileobj, BytesIO(content), path)
+
 # ----------------------
 # function: 전체 크롤링
 # ----------------------
@@ -98,7 +168,7 @@ async def fetch_rj_batch():
                     continue
 
             rj_code = rj_match.group(0).upper()
-            result = crawl_dlsite_info(rj_code)
+            result = await crawl_dlsite_info(rj_code)  # 캐시 + 요청 속도 제한은 크롤러가 처리
             if not result:
                 logger.warning(f"[SKIP] 크롤링 실패: {file_name}")
                 skipped += 1
@@ -107,17 +177,17 @@ async def fetch_rj_batch():
             # 썸네일 다운로드
             new_thumb_path = ""
             try:
-                response = requests.get(result["thumbnail"])
                 ext = result["thumbnail"].split(".")[-1]
                 filename = f"{file_hash}.{ext}"
                 new_thumb_path = f"thumbs/{filename}"
-                with open(f"/data/{new_thumb_path}", "wb") as f:
-                    f.write(response.content)
+                await _download_thumb(result["thumbnail"], f"/data/{new_thumb_path}")
             except Exception as e:
                 logger.warning(f"[SKIP] 썸네일 저장 실패: {file_name}, {e}")
 
             update_fields = {
                 "tags": result["tags"],
+                # 크롤링한 제목/태그도 검색되도록 색인 갱신
+                "search_grams": build_search_grams(file_name, result["tags"], [result["title"]]),
             }
             if new_thumb_path:
                 update_fields["thumb_path"] = filename
@@ -265,6 +335,7 @@ async def recover_all_files():
 
             await db.file_meta.insert_one(entry)
             await db.error_log.delete_one({"file_hash": file_hash})
+            await assign_file_group(db, file_hash, file_name or "", old_key=entry.get("group_key"))
             recovered += 1
             logger.info(f"[RECOVER] 복구 완료: {file_hash}")
 
@@ -1,17 +1,31 @@
-import os
-import aiohttp
-import uuid
-import shutil
-import re
-from datetime import datetime
+import asyncio
+from typing import Dict, Optional
 
 from fastapi import APIRouter, Request, HTTPException
-from app.db.mongo import file_meta
-from app.utils.hash_util import compute_sha256
+from app.db.mongo import db
 from app.utils.logger import logger
+from app.core.proxy_jobs import proxy_job_manager
 
 router = APIRouter()
 
+MAX_BATCH_URLS = 500
+JOB_PROJECTION = {"_id": 0, "upload_id": 1, "url": 1, "file_name": 1, "status": 1, "progress": 1, "error": 1, "file_hash": 1}
+
+# ----------------------
+# param   : cookie_str - (옵션) 쿠키 문자열
+# param   : referer - (옵션) 리퍼러
+# function: 요청별 헤더 (Referer + 쿠키) - 공용 세션에는 쿠키를 저장하지 않으므로 헤더로 전달
+# return  : headers dict
+# ----------------------
+def _request_headers(cookie_str: Optional[str], referer: Optional[str]) -> Dict[str, str]:
+    headers = {}
+    if referer:
+        headers["Referer"] = referer
+    cookie_str = "; ".join(part.strip() for part in (cookie_str or "").split(";") if "=" in part)
+    if cookie_str:
+        headers["Cookie"] = cookie_str
+    return headers
+
 # ----------------------
 # route   : POST /proxy-download
 # param   : {
@@ -19,118 +33,77 @@ router = APIRouter()
 #   "cookie": (옵션) 쿠키 문자열,
 #   "referer": (옵션) 리퍼러
 # }
-# function: 확장 프로그램이 감지한 다운로드 URL을 서버에서 직접 다운로드
-# return  : { status, file_name }
+# function: 확장 프로그램이 감지한 다운로드 URL을 다운로드 작업으로 등록 (다운로드 완료를 기다리지 않음)
+#           진행 상태는 /ws/upload/{job_id} 또는 GET /proxy-download/{job_id}
+# return  : { status: "queued" 또는 "duplicate"(같은 URL로 받은 파일 있음), job_id, file_name, file_hash? }
 # ----------------------
 @router.post("/proxy-download")
 async def proxy_download(request: Request):
-    try:
-        # ----------------------
-        # 클라이언트로부터 요청 JSON 파싱
-        # ----------------------
-        data = await request.json()
-        url = data.get("url")
-        cookie_str = data.get("cookie", "")
-        referer = data.get("referer")
-
-        if not url:
-            raise HTTPException(status_code=400, detail="URL is required")
-
-        # ----------------------
-        # 기본 헤더 설정 (User-Agent + Referer)
-        # ----------------------
-        headers = {
-            "User-Agent": "Mozilla/5.0"
-        }
-        if referer:
-            headers["Referer"] = referer
-
-        # ----------------------
-        # 쿠키 문자열을 dict로 변환
-        # ----------------------
-        cookies = {}
-        for part in cookie_str.split(";"):
-            if "=" in part:
-                k, v = part.strip().split("=", 1)
-                cookies[k] = v
-
-        # ----------------------
-        # 서버에서 파일 다운로드 수행
-        # ----------------------
-        async with aiohttp.ClientSession(headers=headers, cookies=cookies) as session:
-            try:
-                async with session.get(url, ssl=False, allow_redirects=True) as resp:
-                    if resp.content_type.startswith("text/html") or resp.content_length == 0:
-                        logger.error(f"[PROXY_DOWNLOAD] 콘텐츠 타입 오류 - content_type: {resp.content_type}")
-                        raise HTTPException(status_code=500, detail="Invalid content type")
-                    if resp.status != 200:
-                        logger.error(f"[PROXY_DOWNLOAD] 응답 실패 - status: {resp.status}")
-                        raise HTTPException(status_code=500, detail="Download failed")
-
-                    # ----------------------
-                    # Content-Disposition에서 파일 이름 추출
-                    # ----------------------
-                    disposition = resp.headers.get("Content-Disposition")
-                    if disposition and "filename=" in disposition:
-                        filename_match = re.findall('filename="?([^\";]+)"?', disposition)
-                        if filename_match:
-                            filename = filename_match[0]
-                        else:
-                            filename = url.split("/")[-1].split("?")[0] or f"download_{uuid.uuid4()}"
-                    else:
-                        filename = url.split("/")[-1].split("?")[0] or f"download_{uuid.uuid4()}"
+    data = await request.json()
+    url = data.get("url")
+    if not url:
+        raise HTTPException(status_code=400, detail="URL is required")
 
-                    # ----------------------
-                    # 파일 저장 (임시 경로)
-                    # ----------------------
-                    os.makedirs("/data/temp", exist_ok=True)
-                    temp_path = f"/data/temp/{uuid.uuid4()}_{filename}"
-
-                    with open(temp_path, "wb") as f:
-                        while True:
-                            chunk = await resp.content.read(1024 * 1024)
-                            if not chunk:
-                                break
-                            f.write(chunk)
-            except Exception as e:
-                logger.exception("[PROXY_DOWNLOAD] aiohttp 요청 중 예외 발생")
-                raise HTTPException(status_code=500, detail="Download failed")
+    try:
+        job = await proxy_job_manager.submit(url, _request_headers(data.get("cookie"), data.get("referer")))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("[PROXY_DOWNLOAD] 다운로드 작업 등록 실패")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # ----------------------
-        # SHA256 해시 계산 및 중복 검사
-        # ----------------------
-        file_hash = compute_sha256(temp_path)
-        existing = await file_meta.find_one({"file_hash": file_hash})
-        if existing:
-            os.remove(temp_path)
-            return {
-                "status": "duplicate",
-                "file_name": filename
-            }
+    return {
+        "status": job.status,
+        "job_id": job.job_id,
+        "file_name": job.file_name,
+        "file_hash": job.file_hash
+    }
 
-        # ----------------------
-        # 최종 경로로 이동 및 DB 저장
-        # ----------------------
-        os.makedirs("/data", exist_ok=True)
-        final_path = f"/data/{filename}"
-        shutil.move(temp_path, final_path)
+# ----------------------
+# route   : POST /proxy-download/batch
+# param   : {
+#   "urls": [URL, ...] 또는 "items": [{url, cookie?, referer?}, ...],
+#   "cookie": (옵션) 공통 쿠키 문자열,
+#   "referer": (옵션) 공통 리퍼러
+# }
+# function: 여러 URL을 한 번에 다운로드 작업으로 등록 (동시 실행 수는 스케줄러가 제한)
+#           URL 캐시 확인(조건부 HEAD)은 URL끼리 동시에 진행 - 응답 시간이 URL 수에 비례하지 않도록
+# return  : { jobs: [{url, job_id, status, file_name} 또는 {url, error}] } (요청 순서 유지)
+# ----------------------
+@router.post("/proxy-download/batch")
+async def proxy_download_batch(request: Request):
+    data = await request.json()
+    items = data.get("items") or [{"url": url} for url in data.get("urls", [])]
+    if not items:
+        raise HTTPException(status_code=400, detail="URL is required")
+    if len(items) > MAX_BATCH_URLS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {MAX_BATCH_URLS}개까지 등록할 수 있습니다.")
 
-        await file_meta.insert_one({
-            "file_name": filename,
-            "file_path": final_path,
-            "file_size": os.path.getsize(final_path),
-            "file_hash": file_hash,
-            "created_at": datetime.utcnow(),
-            "status": "completed",
-            "tags": [],
-            "thumb_path": ""
-        })
+    async def submit_item(item) -> dict:
+        url = item.get("url") if isinstance(item, dict) else None
+        if not url:
+            return {"url": url, "error": "URL is required"}
+        headers = _request_headers(item.get("cookie", data.get("cookie")), item.get("referer", data.get("referer")))
+        try:
+            job = await proxy_job_manager.submit(url, headers)
+            return {"url": url, "job_id": job.job_id, "status": job.status, "file_name": job.file_name}
+        except ValueError as e:
+            return {"url": url, "error": str(e)}
+        except Exception:
+            logger.exception(f"[PROXY_DOWNLOAD] 다운로드 작업 등록 실패: {url}")
+            return {"url": url, "error": "submit failed"}
 
-        return {
-            "status": "success",
-            "file_name": filename
-        }
+    jobs = await asyncio.gather(*(submit_item(item) for item in items))
+    return {"jobs": jobs}
 
-    except Exception as e:
-        logger.exception("[PROXY_DOWNLOAD] 서버 다운로드 실패")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+# ----------------------
+# route   : GET /proxy-download/{job_id}
+# function: 다운로드 작업 상태 조회 (WebSocket 을 쓰지 않는 클라이언트용)
+# return  : { upload_id, url, file_name, status, progress?, error?, file_hash? }
+# ----------------------
+@router.get("/proxy-download/{job_id}")
+async def proxy_download_status(job_id: str):
+    doc = await db.upload_queue.find_one({"upload_id": job_id, "source": "proxy"}, JOB_PROJECTION)
+    if not doc:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return doc
@@ -3,20 +3,26 @@
 # function: 파일 업로드 API - ZIP 파일 + 썸네일 이미지 업로드 + 진행률 WebSocket 브로드캐스트 + 워커 큐 등록
 # ----------------------
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Query
+from app.core.blocking import run_blocking, save_fileobj
+from typing import Optional
 import os
 from app.utils.logger import logger
 import uuid
-import shutil
-from app.core.ws_manager import websocket_manager
+from app.core.chunk_upload import chunk_upload_manager
+from app.core.multipart_stream import receive_multipart
+from app.services.tag_manager import split_tags
 from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.requests import ClientDisconnect
 from datetime import datetime
 import app.core.background_worker as background_worker
 
 router = APIRouter()
 
+DATA_DIR = "/data"
 TEMP_DIR = "/data/temp"
+MAX_CHUNK_SIZE = 64 * 1024 * 1024  # 청크 1개 최대 크기
+CHUNK_WRITE_BUFFER = 1024 * 1024   # 청크 수신 중 디스크에 쓰는 단위
 MONGO_URI = os.getenv("MONGO_URI", "")
 
 client = AsyncIOMotorClient(MONGO_URI)
@@ -24,67 +30,212 @@ db = client["noah_db"]
 upload_queue = db["upload_queue"]
 
 # ----------------------
-# param   : files - 업로드할 파일 리스트
+# param   : files - 업로드할 파일 리스트 (multipart 필드 "files", 여러 개)
 # param   : thumb - (선택) 썸네일 파일
 # param   : upload_id - WebSocket ID
-# function: 여러 파일을 임시 저장 → 상태 브로드캐스트 → 큐 등록
+# function: 본문을 스트리밍으로 받아 /data/temp 스테이징 파일에 바로 기록(+ SHA256) → rename → 큐 등록
+#           UploadFile 스풀 파일/복사 없이 바이트당 1회 쓰기, 워커의 /data 이동도 같은 파일시스템 rename
 # return  : { "upload_id": string }
 # ----------------------
 @router.post("/upload")
-async def upload_files_background(
-    files: List[UploadFile] = File(...),
-    thumb: Optional[UploadFile] = File(None),
-    upload_id: Optional[str] = Form(None)
-):
+async def upload_files_background(request: Request):
     try:
-        if not upload_id:
-            upload_id = str(uuid.uuid4())
+        form = await receive_multipart(request, TEMP_DIR)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.exception("[UPLOAD] 업로드 수신 실패")
+        raise HTTPException(status_code=500, detail="Upload failed")
 
-        os.makedirs(TEMP_DIR, exist_ok=True)
+    try:
+        files = [f for f in form.files_of("files") if f.file_name]
+        if not files:
+            raise HTTPException(status_code=400, detail="업로드할 파일이 없습니다.")
+        upload_id = form.get("upload_id") or str(uuid.uuid4())
 
         # ----------------------
         # 썸네일 저장 (옵션)
         # ----------------------
         thumb_path = ""
-        if thumb:
+        thumbs = [t for t in form.files_of("thumb") if t.file_name]
+        if thumbs:
             thumbs_dir = os.path.join(DATA_DIR, "thumbs")
             os.makedirs(thumbs_dir, exist_ok=True)
-            thumb_path = os.path.join(thumbs_dir, f"{upload_id}_{thumb.filename}")
-            with open(thumb_path, "wb") as f:
-                shutil.copyfileobj(thumb.file, f)
+            thumb_path = os.path.join(thumbs_dir, f"{upload_id}_{thumbs[0].file_name}")
+            os.replace(thumbs[0].path, thumb_path)
             logger.info(f"[UPLOAD] 썸네일 저장 완료: {thumb_path}")
 
         # ----------------------
-        # 파일 저장 및 큐 등록 (임시 저장 → 워커 처리)
+        # 스테이징 파일 공개(rename) 및 큐 등록 - 해시는 수신 중에 계산 완료
         # ----------------------
         for file in files:
-            temp_path = os.path.join(TEMP_DIR, f"{upload_id}_{file.filename}")
-            with open(temp_path, "wb") as f:
-                shutil.copyfileobj(file.file, f)
-            logger.info(f"[UPLOAD] 파일 임시 저장 완료: {temp_path}")
-
-            await websocket_manager.broadcast(upload_id, {
-                "upload_id": upload_id,
-                "file_name": file.filename,
-                "status": "completed",
-                "progress": 100
-            })
+            temp_path = os.path.join(TEMP_DIR, f"{upload_id}_{file.file_name}")
+            os.replace(file.path, temp_path)
+            file_hash = file.hexdigest()
+            logger.info(f"[UPLOAD] 파일 수신 완료: {temp_path} ({file.size} bytes, {file_hash})")
 
             # DB 대기 등록
             await upload_queue.insert_one({
                 "upload_id": upload_id,
-                "file_name": file.filename,
+                "file_name": file.file_name,
                 "temp_path": temp_path,
                 "thumb_path": thumb_path,
+                "file_hash": file_hash,
                 "status": "pending",
+                "priority": file.size,  # 작은 파일 먼저 처리
                 "created_at": datetime.utcnow()
             })
 
-            # 워커에 등록 (워커가 해시 계산 및 이동 수행)
-            background_worker.enqueue(upload_id, file.filename, temp_path)
+            # 워커에 등록 (해시가 있으므로 워커는 중복 검사와 이동만 수행)
+            background_worker.enqueue(upload_id, file.file_name, temp_path, file_hash)
 
         return {"upload_id": upload_id}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("[UPLOAD] 멀티 업로드 실패")
-        raise HTTPException(status_code=500, detail="Upload failed")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Upload failed")
+
+    finally:
+        form.cleanup()
+
+
+# ----------------------
+# param   : upload_id - /get-upload-id 에서 발급받은 ID
+# param   : file_name - 원본 파일명
+# param   : offset - 청크 시작 위치 (바이트)
+# function: 요청 바디(raw bytes)를 받는 대로 오프셋 위치에 이어쓰기 + SHA256 누적 (재전송 구간은 무시)
+#           청크 전체를 메모리에 모으지 않음 - 중간에 끊겨도 기록된 구간까지는 received 에 반영
+# return  : { upload_id, file_name, received }
+# ----------------------
+@router.put("/upload/chunk/{upload_id}")
+async def upload_chunk(
+    request: Request,
+    upload_id: str,
+    file_name: str = Query(...),
+    offset: int = Query(..., ge=0)
+):
+    file_name = os.path.basename(file_name)
+    if not file_name:
+        raise HTTPException(status_code=400, detail="file_name is required")
+
+    session = await run_blocking(chunk_upload_manager.get_or_create, upload_id, file_name)
+
+    async with session.lock:
+        if offset > session.received:
+            # 중간 구간이 빠진 경우 → 클라이언트는 received부터 다시 전송
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "offset mismatch", "received": session.received}
+            )
+
+        # ----------------------
+        # 청크 바디 수신 → CHUNK_WRITE_BUFFER 단위로 기록 (최대 크기 제한)
+        # ----------------------
+        f = await run_blocking(session.open)
+        position = offset
+        buffer = bytearray()
+        try:
+            async for piece in request.stream():
+                buffer.extend(piece)
+                if position + len(buffer) - offset > MAX_CHUNK_SIZE:
+                    raise HTTPException(status_code=413, detail="청크가 너무 큽니다.")
+                if len(buffer) >= CHUNK_WRITE_BUFFER:
+                    await run_blocking(session.write, f, position, bytes(buffer))
+                    position += len(buffer)
+                    buffer.clear()
+            if buffer:
+                await run_blocking(session.write, f, position, bytes(buffer))
+        except (HTTPException, ClientDisconnect):
+            raise
+        except Exception:
+            # 기록 도중 실패 → 세션을 버리고 다음 요청에서 부분 파일 기준으로 복원
+            chunk_upload_manager.pop(upload_id, file_name)
+            logger.exception(f"[UPLOAD] 청크 기록 실패: {upload_id} / {file_name} @ {offset}")
+            raise HTTPException(status_code=500, detail="Chunk write failed")
+        finally:
+            await run_blocking(f.close)
+        received = session.received
+
+    return {"upload_id": upload_id, "file_name": file_name, "received": received}
+
+
+# ----------------------
+# param   : upload_id, file_name
+# function: 이어받기용 수신 상태 조회 (클라이언트는 received부터 이어서 전송)
+# return  : { upload_id, file_name, received }
+# ----------------------
+@router.get("/upload/status/{upload_id}")
+async def upload_chunk_status(upload_id: str, file_name: str = Query(...)):
+    file_name = os.path.basename(file_name)
+    session = await run_blocking(chunk_upload_manager.get_or_create, upload_id, file_name)
+    return {"upload_id": upload_id, "file_name": file_name, "received": session.received}
+
+
+# ----------------------
+# param   : upload_id, file_name
+# param   : size - (선택) 원본 파일 크기, 수신량과 다르면 거부
+# param   : thumb - (선택) 썸네일 파일
+# param   : tags - (선택) 스페이스로 구분된 태그 문자열
+# function: 청크 업로드 완료 처리 → 누적 해시 확정 → 워커 큐 등록 (워커는 해시 재계산 없음)
+# return  : { upload_id, file_name, file_hash }
+# ----------------------
+@router.post("/upload/complete/{upload_id}")
+async def complete_chunk_upload(
+    upload_id: str,
+    file_name: str = Form(...),
+    size: Optional[int] = Form(None),
+    thumb: Optional[UploadFile] = File(None),
+    tags: Optional[str] = Form(None)
+):
+    file_name = os.path.basename(file_name)
+    session = await run_blocking(chunk_upload_manager.get_or_create, upload_id, file_name)
+
+    async with session.lock:
+        # 받은 게 없으면 크기 0 으로 선언된 빈 파일만 허용
+        if (session.received == 0 and size != 0) or (size is not None and session.received != size):
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "upload incomplete", "received": session.received}
+            )
+        if session.received == 0:
+            f = await run_blocking(session.open)   # 빈 파일은 청크 요청 없이 임시 파일만 생성
+            await run_blocking(f.close)
+
+        file_hash = session.hexdigest()
+        chunk_upload_manager.pop(upload_id, file_name)
+
+    try:
+        # ----------------------
+        # 썸네일 저장 (옵션)
+        # ----------------------
+        thumb_path = ""
+        if thumb:
+            thumbs_dir = os.path.join(DATA_DIR, "thumbs")
+            os.makedirs(thumbs_dir, exist_ok=True)
+            thumb_path = os.path.join(thumbs_dir, f"{upload_id}_{thumb.filename}")
+            await run_blocking(save_fileobj, thumb.file, thumb_path)
+            logger.info(f"[UPLOAD] 썸네일 저장 완료: {thumb_path}")
+
+        await upload_queue.insert_one({
+            "upload_id": upload_id,
+            "file_name": file_name,
+            "temp_path": session.temp_path,
+            "thumb_path": thumb_path,
+            "tags": split_tags([tags or ""]),
+            "file_hash": file_hash,
+            "status": "pending",
+            "priority": session.received,
+            "created_at": datetime.utcnow()
+        })
+
+        # 해시는 수신 중에 계산 완료 → 워커는 중복 검사와 이동만 수행
+        background_worker.enqueue(upload_id, file_name, session.temp_path, file_hash)
+        logger.info(f"[UPLOAD] 청크 업로드 완료: {session.temp_path} ({session.received} bytes, {file_hash})")
+
+        return {"upload_id": upload_id, "file_name": file_name, "file_hash": file_hash}
+
+    except Exception:
+        logger.exception("[UPLOAD] 청크 업로드 완료 처리 실패")
+        raise HTTPException(status_code=500, detail="Upload failed")
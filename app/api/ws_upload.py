@@ -1,50 +1,48 @@
 # ----------------------
 # file   : app/api/ws_upload.py
-# function: WebSocket을 통해 업로드 상태를 실시간 전송
+# function: WebSocket을 통해 업로드 상태를 실시간 전송 (워커가 발행한 파일별 이벤트 push, DB 폴링 없음)
 # ----------------------
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from motor.motor_asyncio import AsyncIOMotorClient
-import asyncio
-import json
-import os
+from app.core.ws_manager import websocket_manager
+from app.db.mongo import db
+from app.utils.logger import logger
 
-MONGO_URI = os.getenv("MONGO_URI", "")
 router = APIRouter()
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["noah_db"]
 upload_queue = db["upload_queue"]
 
 # ----------------------
 # param   : websocket - 클라이언트 WebSocket 연결 객체
 # param   : upload_id - 업로드 식별 ID
-# function: 주기적으로 업로드 상태를 조회하고 클라이언트에 전송
+# function: 파일별 현재 상태 1회 전송 → 구독 등록 → 이후 상태 변화는 워커 이벤트로 push
+#           (현재 상태 전송과 등록은 websocket_manager.connect 가 한 번에 처리 - 이벤트 순서 보장)
+#           (클라이언트는 자신의 모든 파일이 completed/failed/duplicate가 되면 연결 종료)
 # return  : 연결 종료 시 자동 종료
 # ----------------------
 @router.websocket("/ws/upload/{upload_id}")
 async def websocket_upload_status(websocket: WebSocket, upload_id: str):
-    await websocket.accept()
-
     try:
+        # ----------------------
+        # 초기 상태: 메모리에 있으면 그대로, 없으면(재시작/다른 프로세스) DB에서 1회 조회
+        #   DB 조회는 등록 전에 끝냄 - 조회 중 발행된 이벤트는 메모리 상태가 DB 값보다 우선
+        # ----------------------
+        fallback = []
+        if not websocket_manager.has_state(upload_id):
+            cursor = upload_queue.find({"upload_id": upload_id}, {"_id": 0, "file_name": 1, "status": 1, "file_hash": 1})
+            async for doc in cursor:
+                fallback.append({"upload_id": upload_id, **doc})
+
+        await websocket_manager.connect(upload_id, websocket, fallback)
+
+        # 이후 이벤트는 websocket_manager가 push, 여기서는 연결 유지만 담당
         while True:
-            # 상태 조회
-            doc = await upload_queue.find_one({"upload_id": upload_id})
-            if doc is None:
-                await websocket.send_json({"status": "not_found"})
-                break
-
-            status = doc.get("status", "unknown")
-            await websocket.send_json({"status": status})
-
-            # 완료 상태면 연결 종료
-            if status in ["completed", "failed", "duplicate"]:
-                break
-
-            await asyncio.sleep(1)
+            await websocket.receive_text()
 
     except WebSocketDisconnect:
-        print(f"[WS] 클라이언트 연결 종료: {upload_id}")
+        logger.info(f"[WS] 클라이언트 연결 종료: {upload_id}")
 
     except Exception as e:
-        await websocket.send_json({"status": "error", "detail": str(e)})
-        await websocket.close()
+        logger.warning(f"[WS] 연결 오류: {upload_id} - {e}")
+
+    finally:
+        await websocket_manager.disconnect(upload_id, websocket)
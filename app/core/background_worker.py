@@ -1,130 +1,354 @@
 # ----------------------
 # file   : app/core/background_worker.py
-# function: 업로드된 파일을 백그라운드 워커에서 처리 (중복 검사 → /data로 이동)
+# function: 업로드된 파일을 백그라운드 파이프라인에서 처리 (중복 검사 → /data로 이동)
+#           작업 목록은 upload_queue 컬렉션이 원본 - lease를 걸고 하나씩 가져감 (재시작해도 유실 없음)
+#           asyncio + Motor 기반, 단계별 동시 처리 수를 따로 두어 디스크 작업과 DB 작업이 겹쳐 진행됨
+#
+#   claim ─▶ fingerprint(크기 + 샘플 지문) ─▶ dedup(전체 해시로 DB 조회) ─▶ move(/data 이동) ─▶ write(메타 저장/상태 갱신)
+#   전체 해시는 모든 수신 경로(청크/멀티파트/proxy)가 받으면서 계산해 넘겨줌
+#
+#   2단계 중복 검사 (크기 + 샘플 지문 → 전체 해시)
+#     1단계: 업로드 전 /negotiate-upload 에서 file_meta 의 (file_size, sample_hash) 로 후보 판정 - 본문 전송 전
+#     2단계: 후보만 클라이언트가 전체 해시 계산 → 일치하면 업로드 생략, 서버로 들어온 파일은 전체 해시로 확정
+#     워커 안의 샘플 사전 검사는 두지 않음 - 전체 해시가 수신과 동시에 이미 계산되어 있어 아낄 비용이 없음
 # ----------------------
 
 import os
 import shutil
-from app.utils.hash_util import compute_sha256
-import threading
-import queue
-from datetime import datetime
-from pymongo import MongoClient
-from loguru import logger
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ReturnDocument
+from app.core.blocking import run_blocking
+from app.db.mongo import db
+from app.utils.logger import logger
+from app.utils.hash_util import compute_sha256_async, compute_sample_hash_async
+from app.core.ws_manager import websocket_manager
+from app.core.write_batcher import WriteBatcher
+from app.services.search_index import build_search_grams
+from app.services.group_index import assign_file_group
+from app.services.tag_manager import process_tags_on_upload
 
-# ----------------------
-# MongoDB 연결 설정 (동기)
-# ----------------------
-client = MongoClient("mongodb://host.docker.internal:27017")
-db = client["noah_db"]
 file_meta = db["file_meta"]
 upload_queue = db["upload_queue"]
 
+# 메타 저장/상태 변경은 묶어서 전송 (작은 파일 대량 업로드 시 Mongo 왕복 감소)
+file_meta_writer = WriteBatcher(file_meta)
+upload_queue_writer = WriteBatcher(upload_queue)
+
 # ----------------------
-# 워커 큐 및 스레드 수
+# 파이프라인 설정
+#   upload_queue 문서: status pending → processing(lease) → completed/duplicate/failed
+#   priority 는 파일 크기 (작은 파일 먼저), lease 는 처리 중 주기적으로 연장
 # ----------------------
-upload_task_queue = queue.Queue()
-NUM_WORKERS = 4
+MAX_IN_FLIGHT = int(os.getenv("INGEST_WORKERS") or 4) * 4   # 동시에 파이프라인에 올라가 있는 작업 수
+HASH_CONCURRENCY = 2      # 샘플 지문 (스레드풀, 디스크 읽기)
+DEDUP_CONCURRENCY = 8     # 중복 조회 (DB)
+MOVE_CONCURRENCY = 2      # /data 이동 (같은 디스크면 rename, 아니면 복사)
+WRITE_CONCURRENCY = 8     # 메타 저장/상태 갱신 (DB)
+STAGE_QUEUE_SIZE = 16     # 단계 사이 대기열 크기 (앞 단계가 너무 앞서 나가지 않도록)
+LEASE_SECONDS = 60        # 이 시간 동안 연장되지 않은 processing 작업은 다른 워커가 다시 가져감
+POLL_INTERVAL = 2         # 새 작업 알림이 없을 때 upload_queue 확인 간격(초)
+MAX_ATTEMPTS = 3          # 처리 도중 죽는 작업이 무한 반복되지 않도록 제한
+FINAL_DIR = "/data"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
 
 # ----------------------
-# param   : upload_id, file_name, temp_path
-# function: 해시 검사 후 중복 체크 → 해시 기반 파일명으로 /data 이동
+# class   : IngestJob
+# function: 파이프라인을 따라 이동하는 작업 1개의 상태
 # ----------------------
-def process_upload(upload_id: str, file_name: str, temp_path: str):
-    try:
-        logger.info(f"[WORKER] {upload_id} / {file_name} 처리 시작")
+class IngestJob:
+    def __init__(self, doc: dict):
+        self.id = doc["_id"]
+        self.upload_id: str = doc["upload_id"]
+        self.file_name: str = doc["file_name"]
+        self.temp_path: str = doc.get("temp_path", "")
+        self.thumb_path: str = doc.get("thumb_path", "") or ""
+        self.tags = doc.get("tags") or []    # 업로드 시 입력한 태그 이름
+        self.file_hash: Optional[str] = doc.get("file_hash")
+        self.attempts: int = doc.get("attempts", 1)
+        self.file_size = 0
+        self.sample_hash = ""
+        self.final_path = ""
+        self.finished = False
+        self.reserved = False   # reserved_hashes 에 file_hash 를 등록했는지
 
-        upload_queue.update_one(
-            {"upload_id": upload_id, "file_name": file_name},
-            {"$set": {"status": "processing"}}
-        )
+# ----------------------
+# 단계별 대기열 / 실행 상태 (start_workers 에서 생성)
+# ----------------------
+fingerprint_q: Optional[asyncio.Queue] = None
+dedup_q: Optional[asyncio.Queue] = None
+move_q: Optional[asyncio.Queue] = None
+write_q: Optional[asyncio.Queue] = None
+in_flight: Optional[asyncio.Semaphore] = None
+job_ready: Optional[asyncio.Event] = None
+active_jobs = set()       # 이 프로세스가 처리 중인 upload_queue _id (lease 연장 대상)
+reserved_hashes = set()   # 조회 ~ 저장 사이에 있는 해시 (같은 파일이 동시에 들어와도 한 번만 저장)
 
-        # ----------------------
-        # 파일 해시 계산
-        # ----------------------
-        file_hash = compute_sha256(temp_path)
-
-        # ----------------------
-        # 중복 검사
-        # ----------------------
-        duplicate = file_meta.find_one({"file_hash": file_hash})
-        if duplicate:
-            upload_queue.update_one(
-                {"upload_id": upload_id, "file_name": file_name},
-                {"$set": {"status": "duplicate"}}
-            )
-            os.remove(temp_path)
-            logger.info(f"[WORKER] {upload_id} / {file_name} 중복파일로 삭제됨")
-            return
-
-        # ----------------------
-        # 썸네일 경로 가져오기 (없으면 "")
-        # ----------------------
-        upload_info = upload_queue.find_one({"upload_id": upload_id, "file_name": file_name})
-        thumb_path = upload_info.get("thumb_path", "") if upload_info else ""
-
-        # ----------------------
-        # 최종 저장 경로: /data/{해시}_{파일명}
-        # ----------------------
-        final_dir = "/data"
-        os.makedirs(final_dir, exist_ok=True)
-
-        final_filename = f"{file_hash}_{file_name}"
-        final_path = os.path.join(final_dir, final_filename)
-        shutil.move(temp_path, final_path)
-
-        # ----------------------
-        # MongoDB 메타데이터 저장
-        # ----------------------
-        file_meta.insert_one({
-            "file_name": file_name,                # 원래 이름
-            "file_path": final_path,               # 해시_이름
-            "file_size": os.path.getsize(final_path),
-            "file_hash": file_hash,
-            "thumb_path": thumb_path,
-            "tags": [],
-            "status": "completed",
-            "created_at": datetime.utcnow(),
-        })
-
-        upload_queue.update_one(
-            {"upload_id": upload_id, "file_name": file_name},
-            {"$set": {
-                "status": "completed",
-                "file_hash": file_hash,
-                "file_path": final_path
-            }}
-        )
+# ----------------------
+# param   : file_hash - 저장하려는 파일 해시
+# function: 해시 선점 (이벤트 루프 안에서 조회와 등록 사이에 await가 없으므로 원자적)
+# return  : 선점 성공 여부 (False면 같은 파일이 이미 처리 중)
+# ----------------------
+def reserve_hash(file_hash: str) -> bool:
+    if file_hash in reserved_hashes:
+        return False
+    reserved_hashes.add(file_hash)
+    return True
 
-        logger.info(f"[WORKER] {upload_id} / {file_name} 완료")
+# ----------------------
+# param   : upload_id, file_name, status
+# param   : extra - progress, file_hash 등 추가 필드
+# function: 파일별 상태 이벤트를 WebSocket 구독자에게 발행
+# ----------------------
+def publish_status(upload_id: str, file_name: str, status: str, **extra):
+    websocket_manager.publish(upload_id, {"file_name": file_name, "status": status, **extra})
 
-    except Exception:
-        upload_queue.update_one(
+# ----------------------
+# param   : upload_id, file_name, status
+# param   : fields - 함께 기록할 필드
+# function: upload_queue 상태 변경
+# ----------------------
+async def set_upload_status(upload_id: Optional[str], file_name: str, status: str, **fields):
+    if upload_id:
+        await upload_queue_writer.update(
             {"upload_id": upload_id, "file_name": file_name},
-            {"$set": {"status": "failed"}}
+            {"$set": {"status": status, **fields}}
         )
-        logger.exception(f"[WORKER] {upload_id} / {file_name} 처리 실패")
 
 # ----------------------
-# function: 워커 루프 실행 (threading 사용)
+# param   : upload_id, file_name - 진행률을 보낼 업로드
+# function: 전체 해시 진행률 콜백 (스레드풀에서 호출, publish는 스레드 안전)
+# ----------------------
+def hash_progress(upload_id: Optional[str], file_name: str):
+    if not upload_id:
+        return None
+    return lambda done, total: publish_status(
+        upload_id, file_name, "hashing",
+        progress=int(done * 100 / total) if total else 100
+    )
+
+# ----------------------
+# param   : job - 끝난 작업
+# param   : status - 최종 상태 (completed/duplicate/failed)
+# param   : fields - upload_queue 에 함께 기록할 필드
+# function: 작업 종료 처리 (상태 기록 + 이벤트 발행 + 파이프라인 자리 반납), 작업마다 정확히 1번 호출
+# ----------------------
+async def finish_job(job: IngestJob, status: str, **fields):
+    if job.finished:
+        return
+    job.finished = True
+    try:
+        await set_upload_status(job.upload_id, job.file_name, status, **fields)
+        extra = {"file_hash": fields["file_hash"]} if fields.get("file_hash") else {}
+        publish_status(job.upload_id, job.file_name, status, **extra)
+    finally:
+        if job.reserved:
+            reserved_hashes.discard(job.file_hash)
+        active_jobs.discard(job.id)
+        in_flight.release()
+
 # ----------------------
-def worker_loop():
+# param   : name - 단계 이름 (로그용)
+# param   : queue - 입력 대기열
+# param   : handler - async handler(job)
+# function: 단계 워커 - 대기열에서 작업을 꺼내 처리, 예외 시 작업 실패 처리
+# ----------------------
+async def stage_worker(name: str, queue: asyncio.Queue, handler):
     while True:
-        upload_id, file_name, temp_path = upload_task_queue.get()
-        process_upload(upload_id, file_name, temp_path)
-        upload_task_queue.task_done()
+        job = await queue.get()
+        try:
+            await handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"[WORKER:{name}] {job.upload_id} / {job.file_name} 처리 실패")
+            await finish_job(job, "failed")
+        finally:
+            queue.task_done()
+
+# ----------------------
+# 단계 1. fingerprint - 크기 + 샘플 지문 (앞/중간/끝 64KB, file_meta.sample_hash 로 저장 → 업로드 전 중복 협상용)
+#   해시 없이 들어온 작업(이전 버전이 남긴 upload_queue 문서)만 여기서 전체 해시 계산
+# ----------------------
+async def fingerprint_stage(job: IngestJob):
+    publish_status(job.upload_id, job.file_name, "processing")
+    job.file_size = os.path.getsize(job.temp_path)
+    job.sample_hash = await compute_sample_hash_async(job.temp_path)
+    if not job.file_hash:
+        job.file_hash = await compute_sha256_async(job.temp_path, hash_progress(job.upload_id, job.file_name))
+    await dedup_q.put(job)
+
+# ----------------------
+# 단계 2. dedup - 전체 해시로 중복 판정 (처리 중인 같은 해시 또는 DB에 있으면 중복) → 아니면 move 단계로
+# ----------------------
+async def dedup_stage(job: IngestJob):
+    if not reserve_hash(job.file_hash):
+        await discard_duplicate(job)
+        return
+    job.reserved = True
+    if await file_meta.find_one({"file_hash": job.file_hash}, {"_id": 1}):
+        await discard_duplicate(job)
+    else:
+        await move_q.put(job)
+
+async def discard_duplicate(job: IngestJob):
+    await run_blocking(os.remove, job.temp_path)
+    logger.info(f"[WORKER] {job.upload_id} / {job.file_name} 중복파일로 삭제됨")
+    await finish_job(job, "duplicate", file_hash=job.file_hash)
+
+# ----------------------
+# 단계 3. move - /data/{해시}_{파일명}
+# ----------------------
+async def move_stage(job: IngestJob):
+    job.final_path = os.path.join(FINAL_DIR, f"{job.file_hash}_{job.file_name}")
+    os.makedirs(FINAL_DIR, exist_ok=True)
+    await run_blocking(shutil.move, job.temp_path, job.final_path)
+    await write_q.put(job)
+
+# ----------------------
+# 단계 4. write - 메타데이터 저장 + 그룹 배정 + 업로드 상태 갱신
+# ----------------------
+async def write_stage(job: IngestJob):
+    doc = {
+        "file_name": job.file_name,
+        "file_path": job.final_path,
+        "file_size": job.file_size,
+        "sample_hash": job.sample_hash,
+        "thumb_path": job.thumb_path,
+        "tags": await process_tags_on_upload(db, job.tags, True) if job.tags else [],
+        "search_grams": build_search_grams(job.file_name, job.tags),
+        "created_at": datetime.utcnow(),
+    }
+
+    await file_meta_writer.insert({**doc, "file_hash": job.file_hash, "status": "completed"})
+    await assign_file_group(db, job.file_hash, job.file_name)
+    logger.info(f"[WORKER] {job.upload_id} / {job.file_name} 완료")
+    await finish_job(job, "completed", file_hash=job.file_hash, file_path=job.final_path)
+
+# ----------------------
+# function: 처리할 작업 1개를 원자적으로 가져옴 (pending 또는 lease 만료된 processing, 작은 파일 우선)
+# return  : upload_queue 문서 또는 None
+# ----------------------
+async def claim_job() -> Optional[dict]:
+    now = datetime.utcnow()
+    return await upload_queue.find_one_and_update(
+        {"$or": [
+            {"status": "pending"},
+            {"status": "processing", "lease_until": {"$lt": now}},
+        ]},
+        {
+            "$set": {"status": "processing", "worker_id": WORKER_ID, "lease_until": now + timedelta(seconds=LEASE_SECONDS)},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("priority", 1), ("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+# ----------------------
+# function: 파이프라인에 자리가 있을 때만 작업을 가져와 fingerprint 단계로 전달 (없으면 알림/폴링 대기)
+#           재시도 초과/임시 파일 유실 작업은 바로 실패 처리
+# ----------------------
+async def claim_loop():
+    while True:
+        await in_flight.acquire()
+        try:
+            doc = await claim_job()
+        except Exception:
+            logger.exception("[WORKER] 작업 조회 실패")
+            doc = None
+
+        if not doc:
+            in_flight.release()
+            try:
+                await asyncio.wait_for(job_ready.wait(), POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            job_ready.clear()
+            continue
+
+        job = IngestJob(doc)
+        active_jobs.add(job.id)
+        if job.attempts > MAX_ATTEMPTS:
+            logger.error(f"[WORKER] {job.upload_id} / {job.file_name} 재시도 {MAX_ATTEMPTS}회 초과 → 실패 처리")
+            await finish_job(job, "failed", error="max attempts exceeded")
+        elif not os.path.exists(job.temp_path):
+            logger.error(f"[WORKER] {job.upload_id} / {job.file_name} 임시 파일 없음: {job.temp_path}")
+            await finish_job(job, "failed", error="temp file missing")
+        else:
+            logger.info(f"[WORKER] {job.upload_id} / {job.file_name} 처리 시작")
+            await fingerprint_q.put(job)
+
+# ----------------------
+# function: 처리 중인 작업의 lease 연장 (큰 파일 해시 중에도 다른 워커가 가져가지 않도록)
+# ----------------------
+async def lease_heartbeat_loop():
+    while True:
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        if not active_jobs:
+            continue
+        try:
+            await upload_queue.update_many(
+                {"_id": {"$in": list(active_jobs)}, "worker_id": WORKER_ID, "status": "processing"},
+                {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)}}
+            )
+        except Exception:
+            logger.exception("[WORKER] lease 연장 실패")
+
+# ----------------------
+# function: 서버 시작 시 이전 프로세스가 남긴 작업 복구
+#           lease가 없거나 만료된 processing → pending, 임시 파일이 사라진 작업 → failed
+# ----------------------
+async def recover_jobs():
+    now = datetime.utcnow()
+    result = await upload_queue.update_many(
+        {"status": "processing", "$or": [{"lease_until": {"$exists": False}}, {"lease_until": {"$lt": now}}]},
+        {"$set": {"status": "pending"}, "$unset": {"worker_id": "", "lease_until": ""}}
+    )
+
+    lost = 0
+    async for job in upload_queue.find({"status": "pending"}, {"temp_path": 1}):
+        if not os.path.exists(job.get("temp_path") or ""):
+            await upload_queue.update_one({"_id": job["_id"]}, {"$set": {"status": "failed", "error": "temp file missing"}})
+            lost += 1
+
+    pending = await upload_queue.count_documents({"status": "pending"})
+    logger.info(f"[WORKER] 작업 복구: 재등록 {result.modified_count}건, 대기 {pending}건, 임시 파일 유실 {lost}건")
 
 # ----------------------
 # param   : upload_id, file_name, temp_path
-# function: 워커에 작업 등록
+# param   : file_hash - (선택) 미리 계산된 SHA256
+# function: 파이프라인에 새 작업 알림 (작업 자체는 호출 전에 upload_queue 에 pending 으로 저장되어 있어야 함)
 # ----------------------
-def enqueue(upload_id: str, file_name: str, temp_path: str):
-    upload_task_queue.put((upload_id, file_name, temp_path))
+def enqueue(upload_id: str, file_name: str, temp_path: str, file_hash: Optional[str] = None):
+    if job_ready is not None:
+        job_ready.set()
+    publish_status(upload_id, file_name, "pending")
 
 # ----------------------
-# function: 모든 워커 스레드 시작
+# function: 파이프라인 시작 (서버 시작 시 1회, 이벤트 루프 안에서 호출)
 # ----------------------
-def start_workers():
-    for _ in range(NUM_WORKERS):
-        t = threading.Thread(target=worker_loop, daemon=True)
-        t.start()
+async def start_workers():
+    global fingerprint_q, dedup_q, move_q, write_q, in_flight, job_ready
+    fingerprint_q = asyncio.Queue(STAGE_QUEUE_SIZE)
+    dedup_q = asyncio.Queue(STAGE_QUEUE_SIZE)
+    move_q = asyncio.Queue(STAGE_QUEUE_SIZE)
+    write_q = asyncio.Queue(STAGE_QUEUE_SIZE)
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    job_ready = asyncio.Event()
+
+    await recover_jobs()
+
+    stages = [
+        ("fingerprint", fingerprint_q, fingerprint_stage, HASH_CONCURRENCY),
+        ("dedup", dedup_q, dedup_stage, DEDUP_CONCURRENCY),
+        ("move", move_q, move_stage, MOVE_CONCURRENCY),
+        ("write", write_q, write_stage, WRITE_CONCURRENCY),
+    ]
+    for name, queue, handler, concurrency in stages:
+        for _ in range(concurrency):
+            asyncio.create_task(stage_worker(name, queue, handler))
+
+    asyncio.create_task(claim_loop())
+    asyncio.create_task(lease_heartbeat_loop())
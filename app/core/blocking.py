@@ -0,0 +1,140 @@
+# ----------------------
+# file   : app/core/blocking.py
+# function: 블로킹 작업 전용 실행기 + 이벤트 루프 지연(블로킹) 감지
+#           해시/파일 이동/동기 HTTP 같은 작업은 run_blocking 으로 전용 스레드풀에서 실행
+#           (anyio 기본 스레드풀은 FileResponse 등 요청 처리용으로 남겨 둠)
+#           루프가 기준 시간 이상 멈추면 그 순간의 요청 경로와 스택을 로그로 남김
+# ----------------------
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import functools
+import threading
+import contextvars
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+from app.utils.logger import logger
+
+T = TypeVar("T")
+
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS") or 16)                  # 블로킹 작업 스레드 수
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD_MS") or 250) / 1000  # 이 시간 이상 멈추면 경고
+LOOP_CHECK_INTERVAL = 0.05                                                      # 루프 heartbeat / 감시 주기(초)
+
+blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="noah-blocking")
+
+# ----------------------
+# param   : func, *args, **kwargs - 실행할 동기 함수와 인자
+# function: 전용 스레드풀에서 실행하고 결과를 기다림 (contextvars 유지)
+# return  : func 반환값
+# ----------------------
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(blocking_executor, functools.partial(ctx.run, func, *args, **kwargs))
+
+# ----------------------
+# param   : fileobj - 업로드 파일 객체 (UploadFile.file 등)
+# param   : path - 저장 경로
+# function: 파일 객체 내용을 경로에 저장 (run_blocking 과 함께 사용)
+# ----------------------
+def save_fileobj(fileobj, path: str):
+    with open(path, "wb") as f:
+        shutil.copyfileobj(fileobj, f, 1024 * 1024)
+
+# ----------------------
+# class   : LoopLagMonitor
+# function: 루프 안의 heartbeat 태스크 + 루프 밖 감시 스레드
+#           감시 스레드는 heartbeat 가 끊긴 동안 루프 스레드의 현재 스택과 실행 중인 요청을 기록
+#           heartbeat 태스크는 루프가 돌아온 뒤 실제로 멈춘 시간을 기록
+# ----------------------
+class LoopLagMonitor:
+    def __init__(self, threshold: float = LOOP_LAG_THRESHOLD):
+        self.threshold = threshold
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.last_beat = time.monotonic()
+        self.routes: Dict[asyncio.Task, str] = {}   # 요청 처리 중인 태스크 → "METHOD /path"
+
+    # ----------------------
+    # param   : loop - 감시할 이벤트 루프 (루프 안에서 호출)
+    # ----------------------
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self.loop is not None or self.threshold <= 0:
+            return
+        self.loop = loop
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        loop.create_task(self._beat())
+        threading.Thread(target=self._watch, name="noah-loop-monitor", daemon=True).start()
+        logger.info(f"[LOOP-LAG] 이벤트 루프 감시 시작 (기준 {self.threshold * 1000:.0f}ms)")
+
+    async def _beat(self):
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(LOOP_CHECK_INTERVAL)
+            lag = time.monotonic() - self.last_beat - LOOP_CHECK_INTERVAL
+            if lag >= self.threshold:
+                logger.warning(f"[LOOP-LAG] 이벤트 루프가 {lag * 1000:.0f}ms 동안 멈춰 있었음")
+
+    def _watch(self):
+        reported = False
+        while True:
+            time.sleep(LOOP_CHECK_INTERVAL)
+            stalled = time.monotonic() - self.last_beat - LOOP_CHECK_INTERVAL
+            if stalled < self.threshold:
+                reported = False
+            elif not reported:
+                # 같은 정지 구간은 1회만 기록
+                reported = True
+                self._report(stalled)
+
+    # ----------------------
+    # function: 멈춘 순간의 태스크/요청 경로/스택 기록
+    # ----------------------
+    def _report(self, stalled: float):
+        try:
+            task = asyncio.current_task(self.loop)
+            route = self.routes.get(task) if task else None
+            if route is None and task is not None:
+                coro = task.get_coro()
+                route = f"task {task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "(스택 없음)"
+            logger.warning(
+                f"[LOOP-LAG] 이벤트 루프 블로킹 {stalled * 1000:.0f}ms 경과 - {route or '알 수 없음'}\n{stack}"
+            )
+        except Exception:
+            logger.exception("[LOOP-LAG] 블로킹 정보 수집 실패")
+
+loop_monitor = LoopLagMonitor()
+
+# ----------------------
+# class   : LoopLagMiddleware
+# function: 요청을 처리하는 태스크에 경로를 기록 (블로킹 발생 시 어느 라우트인지 표시용)
+#           순수 ASGI 미들웨어 - 라우트와 같은 태스크에서 실행되도록 다른 미들웨어보다 안쪽에 등록
+# ----------------------
+class LoopLagMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        task = asyncio.current_task()
+        loop_monitor.routes[task] = f"{scope.get('method', 'WS')} {scope.get('path', '')}"
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_monitor.routes.pop(task, None)
+
+# ----------------------
+# function: 서버 종료 시 실행기 정리
+# ----------------------
+def shutdown_blocking():
+    blocking_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,112 @@
+# ----------------------
+# file   : app/core/chunk_upload.py
+# function: 청크 업로드 세션 관리 (오프셋 기반 이어쓰기 + 수신과 동시에 SHA256 누적 계산)
+# ----------------------
+
+import os
+import hashlib
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+
+TEMP_DIR = "/data/temp"
+HASH_RESTORE_CHUNK = 8 * 1024 * 1024  # 재시작 후 해시 상태 복원 시 읽기 단위
+
+
+# ----------------------
+# class   : ChunkSession
+# function: 파일 하나의 청크 수신 상태 (임시 경로, 수신 바이트 수, 누적 해시)
+# ----------------------
+class ChunkSession:
+    def __init__(self, upload_id: str, file_name: str):
+        self.upload_id = upload_id
+        self.file_name = file_name
+        self.temp_path = os.path.join(TEMP_DIR, f"{upload_id}_{file_name}")
+        self.hasher = hashlib.sha256()
+        self.received = 0
+        self.lock = asyncio.Lock()  # 같은 파일의 청크는 순서대로 한 번에 하나씩 기록
+        self.restore_lock = threading.Lock()
+        self.restored = False
+
+    # ----------------------
+    # function: 서버 재시작 등으로 메모리 상태가 없을 때 기존 부분 파일에서 해시/오프셋 복원 (세션당 1회)
+    #           부분 파일이 크면 오래 걸리므로 세션별 잠금만 잡음 - 다른 세션은 기다리지 않음
+    # ----------------------
+    def restore(self):
+        with self.restore_lock:
+            if self.restored:
+                return
+            hasher, received = hashlib.sha256(), 0
+            if os.path.exists(self.temp_path):
+                with open(self.temp_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(HASH_RESTORE_CHUNK), b""):
+                        hasher.update(chunk)
+                        received += len(chunk)
+            self.hasher, self.received = hasher, received
+            self.restored = True
+
+    # ----------------------
+    # function: 청크 수신 시작 - 부분 파일을 열고 받은 위치 이후는 잘라냄 (스레드풀에서 호출)
+    # return  : 파일 객체 (수신이 끝나면 close)
+    # ----------------------
+    def open(self):
+        f = open(self.temp_path, "r+b" if os.path.exists(self.temp_path) else "wb")
+        f.seek(self.received)
+        f.truncate()
+        return f
+
+    # ----------------------
+    # param   : f - open() 으로 연 파일
+    # param   : offset - data 의 시작 위치
+    # param   : data - 받은 바이트
+    # function: 받은 위치 뒤에 이어쓰기 + 해시 누적 (이미 받은 구간은 건너뜀)
+    # return  : 기록 후 수신 바이트 수
+    # ----------------------
+    def write(self, f, offset: int, data: bytes) -> int:
+        if offset > self.received:
+            raise ValueError(f"offset {offset} > received {self.received}")
+
+        # 재전송된 구간은 버리고 새 구간만 기록
+        skip = self.received - offset
+        if skip >= len(data):
+            return self.received
+        data = memoryview(data)[skip:]
+
+        f.write(data)
+        self.hasher.update(data)
+        self.received += len(data)
+        return self.received
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+
+# ----------------------
+# class   : ChunkUploadManager
+# function: (upload_id, file_name) 단위 청크 세션 보관
+# ----------------------
+class ChunkUploadManager:
+    def __init__(self):
+        self.sessions: Dict[Tuple[str, str], ChunkSession] = {}
+        self.lock = threading.Lock()
+
+    # ----------------------
+    # function: 세션 조회, 없으면 생성 후 부분 파일에서 복원 (디스크 읽기가 있으므로 스레드풀에서 호출)
+    #           전체 잠금은 세션 등록에만 사용, 복원(재해시)은 잠금 밖에서 세션별로 수행
+    # ----------------------
+    def get_or_create(self, upload_id: str, file_name: str) -> ChunkSession:
+        key = (upload_id, file_name)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                os.makedirs(TEMP_DIR, exist_ok=True)
+                session = ChunkSession(upload_id, file_name)
+                self.sessions[key] = session
+        session.restore()
+        return session
+
+    def pop(self, upload_id: str, file_name: str) -> Optional[ChunkSession]:
+        with self.lock:
+            return self.sessions.pop((upload_id, file_name), None)
+
+chunk_upload_manager = ChunkUploadManager()
@@ -0,0 +1,60 @@
+# ----------------------
+# file   : app/core/http_client.py
+# function: 프로세스 공용 aiohttp 세션 (연결 풀, TLS 연결 재사용)
+#           서버 시작 시 생성, 종료 시 닫음 - 요청마다 ClientSession 을 만들지 않음
+#           쿠키는 요청 헤더로만 전달 (공용 쿠키 저장소에 사용자 쿠키가 섞이지 않도록 DummyCookieJar)
+#           TLS 인증서는 기본으로 검증 - proxy-download 원본 요청만 요청 단위로 ssl=PROXY_SSL
+# ----------------------
+
+import os
+import aiohttp
+from typing import Optional
+from app.utils.logger import logger
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE") or 64)             # 전체 동시 연결 수
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST") or 8)      # 호스트당 동시 연결 수 (분할 다운로드 포함)
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+PROXY_SSL = False                                                    # proxy-download 원본은 기존처럼 인증서 검증 안 함
+
+_session: Optional[aiohttp.ClientSession] = None
+
+def _create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_SIZE,
+        limit_per_host=HTTP_POOL_PER_HOST,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=HTTP_TIMEOUT,
+        cookie_jar=aiohttp.DummyCookieJar(),
+        headers={"User-Agent": "Mozilla/5.0"},
+    )
+
+# ----------------------
+# function: 공용 세션 생성 (서버 시작 시 1회, 이벤트 루프 안에서 호출)
+# ----------------------
+async def start_http_client():
+    global _session
+    if _session is None or _session.closed:
+        _session = _create_session()
+        logger.info(f"[HTTP] 공용 세션 생성 (전체 {HTTP_POOL_SIZE}, 호스트당 {HTTP_POOL_PER_HOST} 연결)")
+
+# ----------------------
+# function: 공용 세션 반환 (시작 전 호출되면 그 자리에서 생성)
+# return  : aiohttp.ClientSession
+# ----------------------
+def get_http_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = _create_session()
+    return _session
+
+# ----------------------
+# function: 공용 세션 종료 (서버 종료 시)
+# ----------------------
+async def close_http_client():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
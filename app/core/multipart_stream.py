@@ -0,0 +1,173 @@
+# ----------------------
+# file   : app/core/multipart_stream.py
+# function: multipart/form-data 요청 본문을 스트리밍으로 파싱해 파일 파트를 스테이징 파일에 바로 기록
+#           (UploadFile 스풀 파일 → 임시 파일 복사 단계 없이 바이트당 1회 쓰기, 쓰면서 SHA256 계산)
+# ----------------------
+
+import os
+import uuid
+import hashlib
+from typing import Dict, List, Optional
+from fastapi import Request
+from app.core.blocking import run_blocking
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # 구버전 python-multipart
+    from multipart.multipart import MultipartParser, parse_options_header
+
+FLUSH_SIZE = 4 * 1024 * 1024    # 이만큼 모이면 스레드풀에서 디스크에 기록
+MAX_FIELD_SIZE = 1024 * 1024    # 일반 폼 필드 최대 크기
+
+# ----------------------
+# class   : StreamedFile
+# function: 수신 중인 파일 파트 1개 (스테이징 파일 + 누적 해시)
+# ----------------------
+class StreamedFile:
+    def __init__(self, field_name: str, file_name: str, staging_dir: str):
+        self.field_name = field_name
+        self.file_name = os.path.basename(file_name)   # 경로 조작 방지
+        self.path = os.path.join(staging_dir, f".recv_{uuid.uuid4().hex}")
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.buffer = bytearray()
+        self.fp = open(self.path, "wb")
+
+    # ----------------------
+    # function: 모인 데이터를 해시에 반영하고 파일에 기록 (스레드풀에서 실행)
+    # ----------------------
+    def flush(self):
+        if self.buffer:
+            data = bytes(self.buffer)
+            self.buffer.clear()
+            self.hasher.update(data)
+            self.fp.write(data)
+            self.size += len(data)
+
+    def close(self):
+        self.flush()
+        self.fp.close()
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+    def discard(self):
+        try:
+            self.fp.close()
+            os.remove(self.path)
+        except OSError:
+            pass
+
+# ----------------------
+# class   : MultipartForm
+# function: 스트리밍 파싱 결과 (일반 필드 + 스테이징된 파일들)
+# ----------------------
+class MultipartForm:
+    def __init__(self):
+        self.fields: Dict[str, List[str]] = {}
+        self.files: List[StreamedFile] = []
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        values = self.fields.get(name)
+        return values[0] if values else default
+
+    def files_of(self, name: str) -> List[StreamedFile]:
+        return [f for f in self.files if f.field_name == name]
+
+    # ----------------------
+    # function: 사용하지 않은(이름을 바꾸지 않은) 스테이징 파일 정리
+    # ----------------------
+    def cleanup(self):
+        for f in self.files:
+            if os.path.exists(f.path):
+                f.discard()
+
+# ----------------------
+# param   : request - multipart/form-data 요청
+# param   : staging_dir - 스테이징 파일 위치 (최종 저장소와 같은 파일시스템이어야 rename 가능)
+# function: 요청 본문을 읽으면서 파싱, 파일 파트는 스테이징 파일에 기록 + SHA256 계산
+#           파싱 실패/연결 끊김 시 스테이징 파일 삭제 후 예외 전달
+# return  : MultipartForm
+# ----------------------
+async def receive_multipart(request: Request, staging_dir: str) -> MultipartForm:
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise ValueError("multipart/form-data 요청이 아닙니다.")
+    os.makedirs(staging_dir, exist_ok=True)
+
+    form = MultipartForm()
+    state = {"headers": {}, "field": b"", "value": b"", "part": None, "data": bytearray()}
+    events = []   # 콜백은 동기 → 이벤트로 모았다가 청크마다 비동기로 처리
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"], state["value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" in options:
+            streamed = StreamedFile(name, options[b"filename"].decode("utf-8", "replace"), staging_dir)
+            form.files.append(streamed)   # 파일을 연 즉시 등록 - 이후 파싱이 실패해도 cleanup 대상
+            events.append(("file", streamed))
+        else:
+            events.append(("field", name))
+
+    def on_part_data(data, start, end):
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    current = None       # StreamedFile 또는 필드 이름
+    field_value = bytearray()
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, value in events:
+                if kind == "file":
+                    current = value
+                elif kind == "field":
+                    current = value
+                    field_value = bytearray()
+                elif kind == "data":
+                    if isinstance(current, StreamedFile):
+                        current.buffer += value
+                        if len(current.buffer) >= FLUSH_SIZE:
+                            await run_blocking(current.flush)
+                    else:
+                        field_value += value
+                        if len(field_value) > MAX_FIELD_SIZE:
+                            raise ValueError("폼 필드가 너무 큽니다.")
+                elif kind == "end":
+                    if isinstance(current, StreamedFile):
+                        await run_blocking(current.close)
+                    elif current is not None:
+                        form.fields.setdefault(current, []).append(field_value.decode("utf-8", "replace"))
+                    current = None
+            events.clear()
+        parser.finalize()
+    except BaseException:
+        form.cleanup()
+        raise
+
+    return form
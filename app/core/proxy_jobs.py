@@ -0,0 +1,297 @@
+# ----------------------
+# file   : app/core/proxy_jobs.py
+# function: proxy-download 작업 관리 - 요청은 작업 등록 후 바로 반환, 다운로드는 스케줄러가 실행
+#           전체 동시 다운로드 수 + 호스트별 동시 다운로드 수 제한 (먼저 들어온 작업부터, 막힌 호스트는 건너뜀)
+#           상태/진행률은 업로드와 같은 upload_queue + WebSocket(/ws/upload/{job_id}) 으로 전달
+#
+#   (url_cache 적중) ─▶ duplicate  - 같은 URL로 받은 파일이 있고 원본이 그대로면 본문을 받지 않음
+#   queued ─▶ downloading(progress, 해시 동시 계산) ─┬─▶ duplicate (같은 해시 파일 있음)
+#                                                 └─▶ pending(업로드 파이프라인에 넘김) ─▶ completed/duplicate
+#   다운로드 실패 ─▶ failed
+# ----------------------
+
+import os
+import re
+import uuid
+import asyncio
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional, Set
+from urllib.parse import urlsplit, unquote
+from app.core import background_worker
+from app.core.background_worker import upload_queue, publish_status, set_upload_status, WORKER_ID
+from app.db.mongo import db
+from app.services.url_cache import lookup_url, remember_url
+from app.core.blocking import run_blocking
+from app.core.range_download import download_url, DownloadError
+from app.utils.logger import logger
+
+PROXY_MAX_ACTIVE = int(os.getenv("PROXY_MAX_ACTIVE") or 4)   # 전체 동시 다운로드 수
+PROXY_PER_HOST = int(os.getenv("PROXY_PER_HOST") or 2)       # 호스트별 동시 다운로드 수
+LEASE_SECONDS = 60                                            # 이 시간 동안 갱신 없는 작업은 재시작 시 실패 처리
+TEMP_DIR = "/data/temp"
+
+# ----------------------
+# param   : url - 다운로드 URL
+# function: URL 경로 마지막 부분으로 임시 표시 이름 생성 (실제 이름은 응답 헤더로 확정)
+# return  : 파일명
+# ----------------------
+def _url_file_name(url: str) -> str:
+    name = os.path.basename(unquote(urlsplit(url).path))
+    return name or f"download_{uuid.uuid4()}"
+
+# ----------------------
+# param   : url, headers - 다운로드 URL, 첫 응답 헤더
+# function: Content-Disposition 의 filename 우선, 없으면 URL 에서 추출 (경로 부분 제거)
+# return  : 파일명
+# ----------------------
+def resolve_file_name(url: str, headers) -> str:
+    disposition = headers.get("Content-Disposition")
+    if disposition and "filename=" in disposition:
+        filename_match = re.findall('filename="?([^\";]+)"?', disposition)
+        if filename_match:
+            return os.path.basename(filename_match[0]) or _url_file_name(url)
+    return _url_file_name(url)
+
+# ----------------------
+# class   : ProxyJob
+# function: 다운로드 작업 1개 (job_id 는 upload_queue.upload_id 로도 사용)
+#           요청 헤더(쿠키)는 DB에 저장하지 않고 메모리에만 보관
+# ----------------------
+class ProxyJob:
+    def __init__(self, url: str, headers: Dict[str, str]):
+        self.job_id = str(uuid.uuid4())
+        self.url = url
+        self.headers = headers
+        self.host = (urlsplit(url).hostname or "").lower()
+        self.file_name = _url_file_name(url)
+        self.status = "queued"
+        self.file_hash: Optional[str] = None
+        self.done = 0
+        self.total: Optional[int] = None
+        self.percent = -1
+
+    # ----------------------
+    # function: 다운로드 진행률 콜백 - 퍼센트가 바뀔 때만 발행 (크기를 모르는 응답은 발행 안 함)
+    # ----------------------
+    def progress(self, done: int, total: Optional[int]):
+        self.done, self.total = done, total
+        if not total:
+            return
+        percent = int(done * 100 / total)
+        if percent != self.percent:
+            self.percent = percent
+            publish_status(self.job_id, self.file_name, "downloading", progress=percent)
+
+# ----------------------
+# class   : ProxyJobManager
+# function: 대기 작업 + 실행 중 작업 수 관리 (이벤트 루프 안에서만 사용, 잠금 불필요)
+# ----------------------
+class ProxyJobManager:
+    def __init__(self):
+        self.pending: Deque[ProxyJob] = deque()
+        self.running: Dict[str, ProxyJob] = {}
+        self.host_active: Counter = Counter()
+        self.registering: Set[str] = set()   # upload_queue 에 저장 중인 작업 (아직 pending 에 없음)
+
+    # ----------------------
+    # param   : url - 다운로드 URL
+    # param   : headers - 요청 헤더 (Referer, Cookie)
+    # function: 작업 등록 (upload_queue 에 queued 로 저장) 후 스케줄
+    # return  : ProxyJob
+    # ----------------------
+    async def submit(self, url: str, headers: Dict[str, str]) -> ProxyJob:
+        if urlsplit(url).scheme not in ("http", "https"):
+            raise ValueError("http/https URL만 지원합니다.")
+
+        job = ProxyJob(url, headers)
+        now = datetime.utcnow()
+
+        # 같은 URL로 이미 받은 파일이면 바로 중복 처리 (조건부 HEAD 1회)
+        cached = await lookup_url(db, url, headers)
+        if cached:
+            job.status, job.file_hash, job.file_name = "duplicate", cached["file_hash"], cached.get("file_name") or job.file_name
+            await upload_queue.insert_one({
+                "upload_id": job.job_id,
+                "file_name": job.file_name,
+                "source": "proxy",
+                "url": url,
+                "status": "duplicate",
+                "file_hash": job.file_hash,
+                "created_at": now
+            })
+            publish_status(job.job_id, job.file_name, "duplicate", file_hash=job.file_hash)
+            logger.info(f"[PROXY_JOB] URL 캐시 적중, 다운로드 생략: {url} → {job.file_hash}")
+            return job
+
+        self.registering.add(job.job_id)
+        now = datetime.utcnow()   # recover 의 기준 시각보다 늦게 등록된 작업은 정리 대상에서 제외됨
+        try:
+            await upload_queue.insert_one({
+                "upload_id": job.job_id,
+                "file_name": job.file_name,
+                "source": "proxy",
+                "url": url,
+                "status": "queued",
+                "worker_id": WORKER_ID,
+                "lease_until": now + timedelta(seconds=LEASE_SECONDS),
+                "created_at": now
+            })
+            publish_status(job.job_id, job.file_name, "queued", url=url)
+            self.pending.append(job)
+        finally:
+            self.registering.discard(job.job_id)
+
+        self._schedule()
+        return job
+
+    # ----------------------
+    # function: 전체/호스트별 여유가 있는 가장 오래된 작업부터 시작
+    # ----------------------
+    def _schedule(self):
+        for job in list(self.pending):
+            if len(self.running) >= PROXY_MAX_ACTIVE:
+                break
+            if self.host_active[job.host] >= PROXY_PER_HOST:
+                continue
+            self.pending.remove(job)
+            self.running[job.job_id] = job
+            self.host_active[job.host] += 1
+            asyncio.create_task(self._run(job))
+
+    async def _run(self, job: ProxyJob):
+        try:
+            await self._download(job)
+        except DownloadError as e:
+            logger.warning(f"[PROXY_JOB] {job.job_id} 다운로드 실패: {job.url} - {e}")
+            await self._fail(job, str(e))
+        except Exception:
+            logger.exception(f"[PROXY_JOB] {job.job_id} 처리 실패: {job.url}")
+            await self._fail(job, "Download failed")
+        finally:
+            self.running.pop(job.job_id, None)
+            self.host_active[job.host] -= 1
+            if self.host_active[job.host] <= 0:
+                del self.host_active[job.host]
+            self._schedule()
+
+    # ----------------------
+    # function: 다운로드 → 파일명 확정 → 임시 경로로 이동 → 업로드 파이프라인에 넘김 (중복 검사/저장은 파이프라인 담당)
+    # ----------------------
+    async def _download(self, job: ProxyJob):
+        logger.info(f"[PROXY_JOB] {job.job_id} 다운로드 시작: {job.url}")
+        await set_upload_status(job.job_id, job.file_name, "downloading")
+        publish_status(job.job_id, job.file_name, "downloading", progress=0)
+
+        result = await download_url(job.url, job.headers, TEMP_DIR, job.progress)
+        file_name = resolve_file_name(job.url, result.headers)
+        previous_name, job.file_name = job.file_name, file_name
+        publish_status(job.job_id, file_name, "downloaded", previous_name=previous_name, size=result.size)
+
+        # 해시는 받으면서 계산 완료 → 바로 URL 캐시 기록 + 중복 조회 (파일을 다시 읽지 않음)
+        await remember_url(db, job.url, result.file_hash, file_name, result.headers, result.size)
+        if await db.file_meta.find_one({"file_hash": result.file_hash}, {"_id": 1}):
+            await run_blocking(os.remove, result.path)
+            job.status, job.file_hash = "duplicate", result.file_hash
+            await upload_queue.update_one(
+                {"upload_id": job.job_id},
+                {
+                    "$set": {"file_name": file_name, "file_hash": result.file_hash, "status": "duplicate"},
+                    "$unset": {"worker_id": "", "lease_until": ""},
+                }
+            )
+            publish_status(job.job_id, file_name, "duplicate", file_hash=result.file_hash)
+            logger.info(f"[PROXY_JOB] {job.job_id} 중복 파일: {file_name} ({result.file_hash})")
+            return
+
+        # 새 파일 → 임시 경로로 이동 후 파이프라인에 넘김 (해시가 있으므로 중복 확정 + 이동만 수행)
+        temp_path = os.path.join(TEMP_DIR, f"{job.job_id}_{file_name}")
+        await run_blocking(os.rename, result.path, temp_path)
+        await upload_queue.update_one(
+            {"upload_id": job.job_id},
+            {
+                "$set": {"file_name": file_name, "temp_path": temp_path, "file_hash": result.file_hash,
+                         "status": "pending", "priority": result.size},
+                "$unset": {"worker_id": "", "lease_until": ""},
+            }
+        )
+        background_worker.enqueue(job.job_id, file_name, temp_path, result.file_hash)
+        logger.info(f"[PROXY_JOB] {job.job_id} 다운로드 완료: {file_name} ({result.size} bytes, {result.file_hash})")
+
+    # ----------------------
+    # function: 작업 실패 기록 - upload_id 로만 찾음 (다운로드 후 job.file_name 이 응답 헤더의 이름으로 바뀌었어도 갱신되도록)
+    # ----------------------
+    async def _fail(self, job: ProxyJob, error: str):
+        try:
+            await upload_queue.update_one(
+                {"upload_id": job.job_id},
+                {
+                    "$set": {"file_name": job.file_name, "status": "failed", "error": error},
+                    "$unset": {"worker_id": "", "lease_until": ""},
+                }
+            )
+        finally:
+            publish_status(job.job_id, job.file_name, "failed", error=error)
+
+    # ----------------------
+    # function: 대기/실행 중 작업의 lease + 진행률 주기적 기록, 주인 없는 작업 정리
+    # ----------------------
+    async def heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            try:
+                await self.recover()
+            except Exception:
+                logger.exception("[PROXY_JOB] 중단된 작업 정리 실패")
+            jobs = list(self.pending) + list(self.running.values())
+            if not jobs:
+                continue
+            try:
+                lease_until = datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+                await upload_queue.update_many(
+                    {"upload_id": {"$in": [job.job_id for job in jobs]}, "status": {"$in": ["queued", "downloading"]}},
+                    {"$set": {"lease_until": lease_until}}
+                )
+                for job in self.running.values():
+                    if job.total:
+                        await upload_queue.update_one(
+                            {"upload_id": job.job_id, "status": "downloading"},
+                            {"$set": {"progress": int(job.done * 100 / job.total)}}
+                        )
+            except Exception:
+                logger.exception("[PROXY_JOB] lease 갱신 실패")
+
+    # ----------------------
+    # function: 이 프로세스가 들고 있지 않은 queued/downloading 작업 실패 처리 (서버 시작 시 + heartbeat 마다)
+    #           WORKER_ID 가 같은 작업 = 이전 프로세스가 남긴 것 (컨테이너 재시작 시 hostname:pid 가 같음) → lease 와 무관하게 정리
+    #           다른 프로세스의 작업은 lease 가 만료된 경우만 정리
+    #           (쿠키를 저장하지 않으므로 재개 불가 - 같은 URL을 다시 요청하면 부분 파일부터 이어받음)
+    # ----------------------
+    async def recover(self):
+        started = datetime.utcnow()
+        held = [job.job_id for job in list(self.pending) + list(self.running.values())] + list(self.registering)
+        result = await upload_queue.update_many(
+            {
+                "source": "proxy",
+                "status": {"$in": ["queued", "downloading"]},
+                "upload_id": {"$nin": held},
+                "created_at": {"$lt": started},   # 조회 도중 새로 등록된 작업 제외
+                "$or": [
+                    {"worker_id": WORKER_ID},
+                    {"lease_until": {"$exists": False}},
+                    {"lease_until": {"$lt": datetime.utcnow()}},
+                ],
+            },
+            {"$set": {"status": "failed", "error": "server restarted"}, "$unset": {"worker_id": "", "lease_until": ""}}
+        )
+        if result.modified_count:
+            logger.info(f"[PROXY_JOB] 중단된 다운로드 {result.modified_count}건 실패 처리")
+
+    # ----------------------
+    # function: 서버 시작 시 1회 (복구 + lease 갱신 루프)
+    # ----------------------
+    async def start(self):
+        await self.recover()
+        asyncio.create_task(self.heartbeat_loop())
+
+proxy_job_manager = ProxyJobManager()
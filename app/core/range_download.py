@@ -0,0 +1,363 @@
+# ----------------------
+# file   : app/core/range_download.py
+# function: URL → 임시 파일 다운로드 (공용 세션 사용)
+#           원본이 Range 를 지원하면 N개 구간으로 나눠 병렬 수신, 각 구간은 pwrite 로 제자리 기록
+#           진행 상태를 <부분 파일>.json 에 저장 → 중단된 다운로드는 같은 URL 재요청 시 남은 구간만 이어받음
+#           Range 미지원이면 기존처럼 연결 1개로 순차 수신
+#           SHA256 은 받는 동안 계산 (다운로드 후 파일 전체를 다시 읽지 않음)
+# ----------------------
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import weakref
+import aiohttp
+from typing import Callable, Dict, List, Optional
+from app.core.http_client import get_http_session, PROXY_SSL
+from app.core.blocking import run_blocking
+from app.utils.logger import logger
+
+PROXY_SEGMENTS = int(os.getenv("PROXY_SEGMENTS") or 4)   # 파일 1개당 최대 병렬 구간 수
+MIN_SEGMENT_SIZE = 16 * 1024 * 1024                        # 이보다 작게는 나누지 않음
+WRITE_BUFFER = 1024 * 1024                                 # 모아서 pwrite 하는 단위
+SEGMENT_RETRIES = 3                                        # 구간별 재시도 횟수 (받은 위치부터 이어받음)
+STATE_SAVE_INTERVAL = 2.0                                  # 진행 상태 저장 주기(초)
+HASH_READ = 8 * 1024 * 1024                                # 해시 따라잡기 시 파일에서 읽는 단위
+
+# ----------------------
+# class   : DownloadError
+# function: 다운로드 실패 (원본 응답 오류, 콘텐츠 타입 오류 등)
+# ----------------------
+class DownloadError(Exception):
+    pass
+
+# ----------------------
+# class   : DownloadResult
+# function: 다운로드 결과 (부분 파일 경로, 크기, SHA256, 첫 응답 헤더 - 파일명 추출용)
+# ----------------------
+class DownloadResult:
+    def __init__(self, path: str, size: int, file_hash: str, headers):
+        self.path = path
+        self.size = size
+        self.file_hash = file_hash
+        self.headers = headers
+
+# ----------------------
+# class   : _Progress
+# function: 구간들이 공유하는 누적 수신량 + 진행률 콜백
+# ----------------------
+class _Progress:
+    def __init__(self, total: Optional[int], done: int, callback: Optional[Callable[[int, Optional[int]], None]]):
+        self.total = total
+        self.done = done
+        self.callback = callback
+
+    def add(self, n: int):
+        self.done += n
+        if self.callback:
+            self.callback(self.done, self.total)
+
+# ----------------------
+# class   : _StreamHash
+# function: 구간 병렬 다운로드 중 SHA256 계산 - 앞에서부터 이어진 부분까지만 순서대로 반영
+#           방금 쓴 데이터가 해시 위치와 맞으면(첫 구간) 메모리에서 바로 계산
+#           뒤 구간은 앞 구간이 끝나 이어지는 즉시 파일(페이지 캐시)에서 따라잡음
+#           이어받기 시 이미 받은 앞부분도 같은 방식으로 계산
+# ----------------------
+class _StreamHash:
+    def __init__(self, fd: int, segments: List[List[int]]):
+        self.fd = fd
+        self.segments = segments
+        self.hasher = hashlib.sha256()
+        self.offset = 0
+        self.lock = asyncio.Lock()
+
+    def _contiguous_end(self) -> int:
+        for start, end, done in self.segments:
+            if start <= self.offset <= end:
+                return start + done
+        return self.offset
+
+    # ----------------------
+    # param   : data, offset - (선택) 방금 기록한 데이터와 위치
+    # param   : wait - False면 다른 구간이 계산 중일 때 바로 반환 (그쪽이 이어서 처리)
+    # ----------------------
+    async def advance(self, data: bytes = b"", offset: int = -1, wait: bool = False):
+        if self.lock.locked() and not wait:
+            return
+        async with self.lock:
+            if data and offset == self.offset:
+                await run_blocking(self.hasher.update, data)
+                self.offset += len(data)
+            while True:
+                length = min(self._contiguous_end() - self.offset, HASH_READ)
+                if length <= 0:
+                    break
+                self.offset += await run_blocking(_hash_range, self.hasher, self.fd, self.offset, length)
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+def _hash_range(hasher, fd: int, offset: int, length: int) -> int:
+    block = os.pread(fd, length, offset)
+    if not block:
+        raise DownloadError("부분 파일 읽기 실패")
+    hasher.update(block)
+    return len(block)
+
+# 같은 URL 동시 요청이 같은 부분 파일에 쓰지 않도록 (사용이 끝나면 자동 제거)
+_url_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# ----------------------
+# param   : url, temp_dir
+# function: URL 별 고정 부분 파일 경로 (재요청 시 이어받기용)
+# return  : (부분 파일 경로, 상태 파일 경로)
+# ----------------------
+def _partial_paths(url: str, temp_dir: str):
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    path = os.path.join(temp_dir, f".proxy_{key}.part")
+    return path, path + ".json"
+
+# ----------------------
+# param   : total - 전체 크기
+# function: 구간 나누기 [start, end(포함), 받은 바이트]
+# ----------------------
+def _plan_segments(total: int) -> List[List[int]]:
+    count = max(1, min(PROXY_SEGMENTS, total // MIN_SEGMENT_SIZE))
+    size = -(-total // count)
+    return [[start, min(start + size, total) - 1, 0] for start in range(0, total, size)]
+
+def _load_state(state_path: str, data_path: str, url: str, total: int, validator: str) -> Optional[List[List[int]]]:
+    if not validator or not os.path.exists(state_path) or not os.path.exists(data_path):
+        return None
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("url") != url or state.get("size") != total or state.get("validator") != validator:
+        return None
+    return state.get("segments")
+
+def _save_state(state_path: str, url: str, total: int, validator: str, segments: List[List[int]]):
+    tmp = state_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "size": total, "validator": validator, "segments": segments}, f)
+    os.replace(tmp, state_path)
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _pwrite_all(fd: int, data: bytes, offset: int, hasher=None):
+    if hasher is not None:
+        hasher.update(data)
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+# ----------------------
+# function: 스레드풀에서 pwrite (+ 순차 수신이면 해시 갱신)
+#           취소되어도 진행 중인 쓰기가 끝난 뒤에 예외 전달 (파일 닫기 전 보장)
+# ----------------------
+async def _write_at(fd: int, data: bytes, offset: int, hasher=None):
+    future = asyncio.ensure_future(run_blocking(_pwrite_all, fd, data, offset, hasher))
+    try:
+        await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+def _content_range_total(resp: aiohttp.ClientResponse) -> Optional[int]:
+    value = resp.headers.get("Content-Range", "")
+    if "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+def _check_response(resp: aiohttp.ClientResponse):
+    if resp.status not in (200, 206):
+        logger.error(f"[PROXY_DOWNLOAD] 응답 실패 - status: {resp.status}")
+        raise DownloadError("Download failed")
+    if resp.content_type.startswith("text/html") or resp.content_length == 0:
+        logger.error(f"[PROXY_DOWNLOAD] 콘텐츠 타입 오류 - content_type: {resp.content_type}")
+        raise DownloadError("Invalid content type")
+
+# ----------------------
+# function: 응답 본문 전체를 연결 1개로 순차 기록 (Range 미지원 원본)
+# return  : (받은 크기, SHA256)
+# ----------------------
+async def _download_single(resp: aiohttp.ClientResponse, path: str, progress: _Progress):
+    fd = await run_blocking(os.open, path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    hasher = hashlib.sha256()
+    offset = 0
+    try:
+        buffer = bytearray()
+        async for chunk in resp.content.iter_chunked(WRITE_BUFFER):
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER:
+                await _write_at(fd, bytes(buffer), offset, hasher)
+                offset += len(buffer)
+                progress.add(len(buffer))
+                buffer.clear()
+        if buffer:
+            await _write_at(fd, bytes(buffer), offset, hasher)
+            offset += len(buffer)
+            progress.add(len(buffer))
+    finally:
+        await run_blocking(os.close, fd)
+    return offset, hasher.hexdigest()
+
+# ----------------------
+# function: 응답 1개를 파일 전체로 순차 수신 (남아 있던 분할 진행 상태는 삭제)
+# return  : DownloadResult
+# ----------------------
+async def _receive_whole(resp: aiohttp.ClientResponse, path: str, state_path: str, progress_cb) -> DownloadResult:
+    size, file_hash = await _download_single(resp, path, _Progress(resp.content_length, 0, progress_cb))
+    await run_blocking(_remove, state_path)
+    return DownloadResult(path, size, file_hash, resp.headers)
+
+# ----------------------
+# param   : segment - [start, end, 받은 바이트] (받은 만큼 갱신)
+# function: 구간 1개 수신, 끊기면 받은 위치부터 SEGMENT_RETRIES 회까지 재요청
+#           If-Range 로 원본이 바뀌었으면(200 응답) 이어받지 않고 실패 처리
+# ----------------------
+async def _fetch_segment(url: str, headers: Dict[str, str], validator: str, fd: int,
+                         segment: List[int], progress: _Progress, stream_hash: _StreamHash):
+    session = get_http_session()
+    attempt = 0
+    length = segment[1] - segment[0] + 1
+    while segment[2] < length:
+        request_headers = {**headers, "Range": f"bytes={segment[0] + segment[2]}-{segment[1]}"}
+        if validator:
+            request_headers["If-Range"] = validator
+        buffer = bytearray()
+        try:
+            async with session.get(url, headers=request_headers, allow_redirects=True, ssl=PROXY_SSL) as resp:
+                if resp.status != 206:
+                    raise DownloadError(f"Range 응답 아님 (status: {resp.status}) - 원본 변경")
+                async for chunk in resp.content.iter_chunked(WRITE_BUFFER):
+                    buffer += chunk[:length - segment[2] - len(buffer)]
+                    if len(buffer) >= WRITE_BUFFER:
+                        await _flush_segment(fd, segment, buffer, progress, stream_hash)
+                    if segment[2] + len(buffer) >= length:
+                        break
+                await _flush_segment(fd, segment, buffer, progress, stream_hash)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await _flush_segment(fd, segment, buffer, progress, stream_hash)   # 받은 데이터는 유지
+            attempt += 1
+            if attempt > SEGMENT_RETRIES:
+                raise
+            logger.warning(f"[PROXY_DOWNLOAD] 구간 {segment[0]}-{segment[1]} 재시도 {attempt}회: {e}")
+            await asyncio.sleep(2 ** attempt)
+
+async def _flush_segment(fd: int, segment: List[int], buffer: bytearray, progress: _Progress, stream_hash: _StreamHash):
+    if buffer:
+        data, offset = bytes(buffer), segment[0] + segment[2]
+        buffer.clear()
+        await _write_at(fd, data, offset)
+        segment[2] += len(data)
+        progress.add(len(data))
+        await stream_hash.advance(data, offset)
+
+# ----------------------
+# function: 분할 다운로드 본체 - 구간 병렬 수신 + 주기적 상태 저장
+#           한 구간이라도 실패하면 나머지를 멈추고 상태 저장 후 예외 전달 (다음 요청에서 이어받기)
+# return  : SHA256
+# ----------------------
+async def _download_segments(url: str, source_url: str, headers: Dict[str, str], validator: str,
+                             path: str, state_path: str, total: int, progress_cb) -> str:
+    segments = await run_blocking(_load_state, state_path, path, url, total, validator)
+    if segments:
+        logger.info(f"[PROXY_DOWNLOAD] 이어받기: {sum(s[2] for s in segments)}/{total} bytes")
+    else:
+        segments = _plan_segments(total)
+        await run_blocking(_remove, path)
+
+    progress = _Progress(total, sum(s[2] for s in segments), progress_cb)
+    fd = await run_blocking(os.open, path, os.O_RDWR | os.O_CREAT, 0o644)
+    stream_hash = _StreamHash(fd, segments)
+    tasks = []
+    try:
+        await run_blocking(os.ftruncate, fd, total)
+        tasks = [
+            asyncio.create_task(_fetch_segment(source_url, headers, validator, fd, s, progress, stream_hash))
+            for s in segments if s[2] < s[1] - s[0] + 1
+        ]
+        last_save = time.monotonic()
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=STATE_SAVE_INTERVAL, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+            if pending and time.monotonic() - last_save >= STATE_SAVE_INTERVAL:
+                await run_blocking(_save_state, state_path, url, total, validator, segments)
+                last_save = time.monotonic()
+
+        # 남은 부분(이어받기로 이미 있던 앞부분 포함) 해시 마무리
+        await stream_hash.advance(wait=True)
+        if stream_hash.offset != total:
+            raise DownloadError("해시 계산 위치 불일치")
+    except BaseException as e:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if isinstance(e, DownloadError):
+            await run_blocking(_remove, state_path)
+        elif validator:
+            await run_blocking(_save_state, state_path, url, total, validator, segments)
+        raise
+    finally:
+        await run_blocking(os.close, fd)
+    await run_blocking(_remove, state_path)
+    return stream_hash.hexdigest()
+
+# ----------------------
+# param   : url - 다운로드 URL
+# param   : headers - 요청 헤더 (Referer, Cookie 등)
+# param   : temp_dir - 부분 파일 위치
+# param   : progress_cb - (선택) (받은 바이트, 전체 크기 또는 None) 콜백
+# function: 첫 바이트 Range 요청으로 크기/Range 지원 여부 확인
+#           206 이면 구간 분할 병렬 다운로드, 200 이면 그 응답을 그대로 순차 수신
+#           206 인데 전체 크기를 알려주지 않으면(bytes 0-0/*) Range 없이 다시 요청해 순차 수신
+# return  : DownloadResult (path 는 URL 별 부분 파일 - 호출자가 이름 변경/삭제, file_hash 는 받으면서 계산한 SHA256)
+# ----------------------
+async def download_url(url: str, headers: Dict[str, str], temp_dir: str,
+                       progress_cb: Optional[Callable[[int, Optional[int]], None]] = None) -> DownloadResult:
+    os.makedirs(temp_dir, exist_ok=True)
+    path, state_path = _partial_paths(url, temp_dir)
+    lock = _url_locks.get(path)
+    if lock is None:
+        lock = asyncio.Lock()
+        _url_locks[path] = lock
+
+    async with lock:
+        session = get_http_session()
+        async with session.get(url, headers={**headers, "Range": "bytes=0-0"}, allow_redirects=True,
+                               ssl=PROXY_SSL) as probe:
+            _check_response(probe)
+            response_headers = probe.headers
+            if probe.status != 206:
+                # Range 미지원 → 이 응답 본문을 그대로 수신
+                return await _receive_whole(probe, path, state_path, progress_cb)
+            total = _content_range_total(probe)
+            source_url = str(probe.url)   # 리다이렉트 후 실제 주소로 구간 요청
+
+        if total is None:
+            # 전체 크기를 모르면 구간을 나눌 수 없음 → 1바이트 probe 본문 대신 전체를 다시 받음
+            async with session.get(url, headers=headers, allow_redirects=True, ssl=PROXY_SSL) as resp:
+                _check_response(resp)
+                return await _receive_whole(resp, path, state_path, progress_cb)
+
+        # If-Range 는 강한 ETag 또는 Last-Modified 만 사용 가능
+        etag = response_headers.get("ETag", "")
+        validator = (etag if etag and not etag.startswith("W/") else "") or response_headers.get("Last-Modified", "")
+        file_hash = await _download_segments(url, source_url, headers, validator, path, state_path, total, progress_cb)
+        return DownloadResult(path, total, file_hash, response_headers)
@@ -0,0 +1,90 @@
+# ----------------------
+# file   : app/core/write_batcher.py
+# function: 짧은 시간 동안 모인 단건 쓰기(insert/update)를 bulk_write 1회로 묶어 전송
+#           호출자는 자신의 쓰기가 실제로 반영될 때까지 await (반영 전 다음 단계로 넘어가지 않음)
+#           작은 파일 대량 업로드 시 파일마다 여러 번 발생하던 Mongo 왕복을 줄이기 위함
+# ----------------------
+
+import asyncio
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, WriteError
+from app.utils.logger import logger
+
+MAX_BATCH = 500          # 이만큼 모이면 즉시 전송
+FLUSH_INTERVAL = 0.02    # 첫 쓰기 후 최대 대기 시간(초)
+
+# ----------------------
+# class   : WriteBatcher
+# function: 컬렉션 1개에 대한 쓰기 묶음 전송기 (이벤트 루프 안에서만 사용)
+# ----------------------
+class WriteBatcher:
+    def __init__(self, collection, max_batch: int = MAX_BATCH, flush_interval: float = FLUSH_INTERVAL):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.pending: List[Tuple[object, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    # ----------------------
+    # param   : doc - 저장할 문서 (_id 가 없으면 미리 생성)
+    # function: insert_one 대신 사용
+    # return  : 문서 _id
+    # ----------------------
+    async def insert(self, doc: dict):
+        doc.setdefault("_id", ObjectId())
+        await self._submit(InsertOne(doc))
+        return doc["_id"]
+
+    # ----------------------
+    # param   : query, update - update_one 과 동일
+    # function: update_one 대신 사용
+    # ----------------------
+    async def update(self, query: dict, update: dict, upsert: bool = False):
+        await self._submit(UpdateOne(query, update, upsert=upsert))
+
+    async def _submit(self, op):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((op, future))
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.flush_interval, self._flush)
+        await future
+
+    # ----------------------
+    # function: 모인 쓰기를 꺼내 bulk_write 작업으로 전송
+    # ----------------------
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._write(batch))
+
+    async def _write(self, batch: List[Tuple[object, asyncio.Future]]):
+        try:
+            await self.collection.bulk_write([op for op, _ in batch], ordered=False)
+            errors = {}
+        except BulkWriteError as e:
+            # 순서 없는 bulk_write 는 실패한 항목만 index로 알려줌 → 해당 호출자에게만 예외 전달
+            errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+            logger.warning(f"[WRITE-BATCH] {self.collection.name} 일부 쓰기 실패: {len(errors)}/{len(batch)}")
+        except Exception as e:
+            logger.exception(f"[WRITE-BATCH] {self.collection.name} bulk_write 실패")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in errors:
+                err = errors[index]
+                future.set_exception(WriteError(err.get("errmsg", "write failed"), err.get("code"), err))
+            else:
+                future.set_result(None)
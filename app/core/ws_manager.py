@@ -1,32 +1,149 @@
 # ----------------------
 # file   : app/core/ws_manager.py
 # function: WebSocket 연결 관리 및 메시지 브로드캐스트
+#           (워커 스레드에서도 publish 가능, 파일별 최신 상태 보관, Mongo change stream 브리지)
 # ----------------------
-from typing import Dict, List
+import asyncio
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from fastapi import WebSocket
 from asyncio import Lock
+from app.utils.logger import logger
+
+MAX_TRACKED_UPLOADS = 1000  # 최신 상태를 보관할 upload_id 최대 수
+SEND_TIMEOUT = 5            # 느린 클라이언트 전송 제한 시간(초)
 
 class WebSocketManager:
     def __init__(self):
         self.connections: Dict[str, List[WebSocket]] = {}
         self.lock = Lock()
+        self.states: "OrderedDict[str, Dict[str, dict]]" = OrderedDict()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+
+    # ----------------------
+    # function: 이벤트 루프 등록 + 디스패처 시작 (서버 시작 시 1회)
+    # ----------------------
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        loop.create_task(self._dispatch_loop())
 
-    async def connect(self, upload_id: str, websocket: WebSocket):
+    # ----------------------
+    # param   : upload_id - 업로드 식별 ID
+    # param   : websocket - 클라이언트 연결 (accept 전)
+    # param   : fallback - (선택) DB에서 읽은 파일별 상태 (메모리에 같은 파일이 있으면 메모리 우선)
+    # function: 현재 상태를 먼저 보낸 뒤 구독 등록 - 잠금 안에서 처리하므로 그 사이 발행된 이벤트는
+    #           등록 후 broadcast 로 전달됨 (초기 상태가 더 새로운 이벤트 뒤에 도착하지 않음)
+    # ----------------------
+    async def connect(self, upload_id: str, websocket: WebSocket, fallback: List[dict] = ()):
         await websocket.accept()
         async with self.lock:
+            snapshot = {event.get("file_name", ""): event for event in fallback}
+            snapshot.update(self.states.get(upload_id, {}))
+            for event in snapshot.values():
+                await asyncio.wait_for(websocket.send_json(event), SEND_TIMEOUT)
             self.connections.setdefault(upload_id, []).append(websocket)
 
     async def disconnect(self, upload_id: str, websocket: WebSocket):
         async with self.lock:
             if upload_id in self.connections:
-                self.connections[upload_id].remove(websocket)
+                if websocket in self.connections[upload_id]:
+                    self.connections[upload_id].remove(websocket)
                 if not self.connections[upload_id]:
                     del self.connections[upload_id]
 
     async def broadcast(self, upload_id: str, message: dict):
         async with self.lock:
-            conns = self.connections.get(upload_id, [])
+            conns = list(self.connections.get(upload_id, []))
         for conn in conns:
-            await conn.send_json(message)
+            try:
+                await asyncio.wait_for(conn.send_json(message), SEND_TIMEOUT)
+            except Exception:
+                # 끊긴/느린 연결은 정리
+                await self.disconnect(upload_id, conn)
+
+    # ----------------------
+    # param   : upload_id - 업로드 식별 ID
+    # param   : message - {file_name, status, progress?, previous_name?...}
+    # function: 상태 이벤트 발행 (이벤트 루프/워커 스레드 어디서든 호출 가능, 순서 보장)
+    # ----------------------
+    def publish(self, upload_id: str, message: dict):
+        if self.loop is None or self.queue is None:
+            return
+        event = {"upload_id": upload_id, **message}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            self.queue.put_nowait(event)
+        else:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    # ----------------------
+    # param   : upload_id - 업로드 식별 ID
+    # function: 메모리에 최신 상태가 있는지 (없으면 재시작/다른 프로세스 → DB 조회 필요)
+    # ----------------------
+    def has_state(self, upload_id: str) -> bool:
+        return bool(self.states.get(upload_id))
+
+    # ----------------------
+    # function: 발행된 이벤트를 순서대로 최신 상태에 반영하고 구독자에게 전송 (동일 상태 중복 전송 생략)
+    # ----------------------
+    async def _dispatch_loop(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                upload_id = event["upload_id"]
+                files = self.states.setdefault(upload_id, {})
+                self.states.move_to_end(upload_id)
+                while len(self.states) > MAX_TRACKED_UPLOADS:
+                    self.states.popitem(last=False)
+
+                file_name = event.get("file_name", "")
+                if event.get("previous_name"):
+                    # 처리 중 파일명이 정해진 경우 (proxy 다운로드) 이전 이름의 상태는 제거
+                    files.pop(event["previous_name"], None)
+                prev = files.get(file_name)
+                if prev is not None and _same_state(prev, event):
+                    continue
+                files[file_name] = event
+
+                await self.broadcast(upload_id, event)
+            except Exception:
+                logger.exception("[WS] 이벤트 전송 실패")
+
+    # ----------------------
+    # param   : collection - upload_queue (Motor 컬렉션)
+    # function: 다른 프로세스의 워커가 바꾼 upload_queue 상태를 change stream으로 받아 발행
+    #           (레플리카셋 필요, 끊기면 재연결)
+    # ----------------------
+    async def run_change_stream_bridge(self, collection):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        while True:
+            try:
+                async with collection.watch(pipeline, full_document="updateLookup") as stream:
+                    logger.info("[WS] upload_queue change stream 연결됨")
+                    async for change in stream:
+                        doc = change.get("fullDocument")
+                        if not doc or "upload_id" not in doc:
+                            continue
+                        message = {"file_name": doc.get("file_name", ""), "status": doc.get("status", "unknown")}
+                        if doc.get("file_hash"):
+                            message["file_hash"] = doc["file_hash"]
+                        self.publish(doc["upload_id"], message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[WS] change stream 오류, 5초 후 재시도: {e}")
+                await asyncio.sleep(5)
+
+# ----------------------
+# function: 상태/진행률이 같으면 중복 이벤트로 판단 (브리지와 로컬 워커가 같은 변경을 보낸 경우)
+# ----------------------
+def _same_state(prev: dict, event: dict) -> bool:
+    return prev.get("status") == event.get("status") and prev.get("progress") == event.get("progress")
 
-websocket_manager = WebSocketManager()
\ No newline at end of file
+websocket_manager = WebSocketManager()
@@ -6,6 +6,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 import os
+from app.utils.logger import logger
 
 # .env 로드
 load_dotenv()
@@ -26,4 +27,43 @@ file_meta = db["file_meta"]
 tags = db["tags"]  # ← 이것을 "tags_collection"으로 쓰려면 아래처럼 alias 추가
 
 # 명시적인 이름 추가
-tags_collection = tags  
\ No newline at end of file
+tags_collection = tags
+
+# ----------------------
+# function: 조회/중복 검사에 필요한 인덱스 생성 (서버 시작 시 1회, 이미 있으면 무시됨)
+# ----------------------
+async def ensure_indexes():
+    await file_meta.create_index("file_hash")
+    await file_meta.create_index([("sample_hash", 1), ("file_size", 1)])
+
+    # keyset 페이징용 (정렬 키 + _id), 파일명 정렬은 조회와 같은 한글 collation 필요
+    await file_meta.create_index([("status", 1), ("created_at", -1), ("_id", -1)])
+    await file_meta.create_index(
+        [("status", 1), ("file_name", 1), ("_id", 1)],
+        collation={"locale": "ko", "strength": 1}
+    )
+    await file_meta.create_index([("tags", 1), ("status", 1), ("created_at", -1), ("_id", -1)])
+
+    # n-gram 검색 색인 (멀티키)
+    await file_meta.create_index("search_grams")
+
+    # 업로드 작업 큐 (작업 가져오기: 상태 + 우선순위, 상태 조회/변경: upload_id + file_name)
+    await db.upload_queue.create_index([("status", 1), ("priority", 1), ("created_at", 1)])
+    await db.upload_queue.create_index([("upload_id", 1), ("file_name", 1)])
+
+    # 유사 파일 그룹 (그룹 키로 구성원 재집계, LSH 밴드 키로 후보 조회, 최근 변경 순 페이징)
+    await file_meta.create_index("group_key")
+    await file_meta.create_index("lsh_bands")
+    await db.file_groups.create_index([("updated_at", -1), ("_id", 1)])
+
+    # URL → 파일 해시 캐시 (파일 삭제 시 해당 해시 항목 정리)
+    await db.url_cache.create_index("file_hash")
+
+    # DLSite 크롤링 캐시 (expires_at 이 지나면 MongoDB 가 자동 삭제)
+    await db.crawl_cache.create_index("expires_at", expireAfterSeconds=0)
+
+    # 태그 upsert가 같은 이름을 두 번 만들지 않도록 고유 인덱스 (기존 중복 데이터가 있으면 경고만)
+    try:
+        await tags.create_index("tag_name", unique=True)
+    except Exception as e:
+        logger.warning(f"[INDEX] tags.tag_name 고유 인덱스 생성 실패 (중복 태그 존재?): {e}")
@@ -2,6 +2,15 @@
 
 from app.core import background_worker
 from app.utils.logger import logger
+from app.db.mongo import ensure_indexes, db
+from app.core.ws_manager import websocket_manager
+from app.core.blocking import loop_monitor, LoopLagMiddleware, shutdown_blocking
+from app.core.http_client import start_http_client, close_http_client
+from app.core.proxy_jobs import proxy_job_manager
+from app.services.tag_manager import tag_cache
+from app.services.search_index import backfill_search_grams
+from app.services.group_index import ensure_file_groups
+import asyncio
 import os
 from fastapi import FastAPI, Request
 from fastapi.responses import FileResponse
@@ -26,6 +35,11 @@ app.mount("/thumbs", StaticFiles(directory="/data/thumbs"), name="thumbs")
 # ----------------------
 #app.add_middleware(LimitUploadSizeMiddleware)
 
+# ----------------------
+# function: 이벤트 루프 블로킹 감지용 요청 경로 기록 (라우트와 같은 태스크에서 실행되도록 가장 안쪽에 등록)
+# ----------------------
+app.add_middleware(LoopLagMiddleware)
+
 # ----------------------
 # function: API 라우터 등록
 # ----------------------
@@ -64,6 +78,35 @@ async def spa_redirect(request: Request, call_next):
 # ----------------------
 @app.on_event("startup")
 async def startup_event():
+    # 이벤트 루프가 멈추면 요청 경로/스택 기록
+    loop_monitor.start(asyncio.get_running_loop())
+
+    await ensure_indexes()
+    await start_http_client()
+    await tag_cache.load(db)
+
+    # 검색 색인이 없는 기존 파일은 백그라운드에서 채움
+    asyncio.create_task(backfill_search_grams(db, tag_cache.get_name))
+
+    # 유사 파일 그룹이 계산되지 않은 기존 파일이 있으면 백그라운드에서 전체 계산
+    asyncio.create_task(ensure_file_groups(db))
+
+    # 워커 스레드의 상태 이벤트를 WebSocket으로 전달하기 위한 루프 등록
+    websocket_manager.bind_loop(asyncio.get_running_loop())
+    if os.getenv("WS_CHANGE_STREAM", "") == "1":
+        # 다른 프로세스 워커의 상태 변경도 받기 (MongoDB 레플리카셋 필요)
+        asyncio.create_task(websocket_manager.run_change_stream_bridge(db["upload_queue"]))
+        logger.info("[INIT] upload_queue change stream 브리지 시작")
+
     logger.info("[INIT] WorkerPool 초기화 시작")
-    background_worker.start_workers()
-    logger.info("[INIT] WorkerPool 초기화 완료")
\ No newline at end of file
+    await background_worker.start_workers()
+    await proxy_job_manager.start()
+    logger.info("[INIT] WorkerPool 초기화 완료")
+
+# ----------------------
+# 서버 종료 시 공용 HTTP 세션 / 블로킹 작업 실행기 정리
+# ----------------------
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_http_client()
+    shutdown_blocking()
@@ -0,0 +1,215 @@
+# ----------------------
+# file   : app/services/group_index.py
+# function: 유사 파일 그룹 사전 계산 + 증분 유지 (/api/files/grouped 는 저장된 그룹만 페이징)
+#           file_meta.group_key  - 소속 그룹 ("RJ:<코드>" 또는 "SIM:<ObjectId>")
+#           file_meta.lsh_bands  - LSH 밴드 키 (멀티키 인덱스, 유사 후보 조회용)
+#           file_groups          - {_id: group_key, members: [file_hash], count, updated_at} (2개 이상 그룹만)
+# ----------------------
+
+from datetime import datetime
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.blocking import run_blocking
+from app.utils.logger import logger
+from app.utils.similarity import (
+    SIMILARITY_THRESHOLD, tokenize, rj_code, lsh_band_strings, group_similar_files
+)
+
+REBUILD_BATCH = 500
+CANDIDATE_PROJECTION = {"file_hash": 1, "file_name": 1, "group_key": 1}
+
+# ----------------------
+# function: 새 유사 그룹 키 (파일 해시를 쓰지 않으므로 기준 파일이 빠져도 키 충돌 없음)
+# ----------------------
+def _new_sim_key() -> str:
+    return f"SIM:{ObjectId()}"
+
+# ----------------------
+# param   : file_name - 파일명
+# function: RJ코드가 있으면 RJ 그룹 키, 없으면 유사도 후보 조회용 밴드 키
+# return  : (rj 그룹 키 또는 None, 단어 집합, lsh_bands)
+# ----------------------
+def _group_fields(file_name: str):
+    code = rj_code(file_name)
+    if code:
+        return f"RJ:{code}", set(), []
+    tokens = tokenize(file_name)
+    return None, tokens, lsh_band_strings(tokens)
+
+# ----------------------
+# param   : tokens - 대상 파일 단어 집합
+# param   : candidates - 밴드 키가 겹치는 file_meta 문서들
+# function: 자카드 유사도 ≥ 기준인 후보 중 가장 비슷한 파일 (RJ 파일은 후보에서 제외)
+# return  : 문서 또는 None
+# ----------------------
+def _best_match(tokens: set, candidates: List[dict]) -> Optional[dict]:
+    best, best_score = None, 0.0
+    for doc in candidates:
+        if (doc.get("group_key") or "").startswith("RJ:"):
+            continue
+        other = tokenize(doc.get("file_name", ""))
+        if not other:
+            continue
+        inter = len(tokens & other)
+        score = inter / (len(tokens) + len(other) - inter)
+        if score >= SIMILARITY_THRESHOLD and score > best_score:
+            best, best_score = doc, score
+    return best
+
+def _group_doc(key: str, members: List[str]) -> dict:
+    return {"_id": key, "members": members, "count": len(members), "updated_at": datetime.utcnow()}
+
+# ----------------------
+# param   : db - MongoDB 세션
+# param   : group_key - 다시 집계할 그룹
+# function: 그룹 구성원을 file_meta 기준으로 다시 읽어 file_groups 갱신 (1개 이하가 되면 삭제)
+# ----------------------
+async def refresh_group(db: AsyncIOMotorDatabase, group_key: Optional[str]):
+    if not group_key:
+        return
+    cursor = db.file_meta.find({"group_key": group_key}, {"file_hash": 1}).sort([("created_at", 1), ("_id", 1)])
+    members = [doc["file_hash"] async for doc in cursor]
+    if len(members) > 1:
+        await db.file_groups.replace_one({"_id": group_key}, _group_doc(group_key, members), upsert=True)
+    else:
+        await db.file_groups.delete_one({"_id": group_key})
+
+# ----------------------
+# param   : db - MongoDB 세션
+# param   : file_hash, file_name - 새로 등록되었거나 이름이 바뀐 파일
+# param   : old_key - (선택) 이름 변경 전 그룹 키 (구성원 재집계)
+# function: 파일 1개의 그룹 배정 (RJ코드 → 같은 RJ 그룹, 그 외 → LSH 후보 중 가장 비슷한 파일의 그룹)
+#           그룹핑 실패가 등록/수정 자체를 실패시키지 않도록 예외는 로그만 남김
+# return  : 배정된 group_key
+# ----------------------
+async def assign_file_group(db: AsyncIOMotorDatabase, file_hash: str, file_name: str, old_key: Optional[str] = None) -> Optional[str]:
+    try:
+        key, tokens, bands = _group_fields(file_name)
+        if key is None and bands:
+            candidates = await db.file_meta.find(
+                {"lsh_bands": {"$in": bands}, "file_hash": {"$ne": file_hash}},
+                CANDIDATE_PROJECTION
+            ).to_list(length=None)
+            match = _best_match(tokens, candidates)
+            if match:
+                key = match.get("group_key")
+                if not key:
+                    key = _new_sim_key()
+                    await db.file_meta.update_one({"_id": match["_id"]}, {"$set": {"group_key": key}})
+        key = key or _new_sim_key()
+
+        await db.file_meta.update_one(
+            {"file_hash": file_hash},
+            {"$set": {"group_key": key, "lsh_bands": bands}}
+        )
+        await refresh_group(db, key)
+        if old_key and old_key != key:
+            await refresh_group(db, old_key)
+        return key
+    except Exception as e:
+        logger.exception(f"[GROUP] 그룹 배정 실패: {file_name} - {e}")
+        return None
+
+# ----------------------
+# function: refresh_group 동기 버전 (워커 스레드, pymongo)
+# ----------------------
+def refresh_group_sync(db, group_key: Optional[str]):
+    if not group_key:
+        return
+    cursor = db.file_meta.find({"group_key": group_key}, {"file_hash": 1}).sort([("created_at", 1), ("_id", 1)])
+    members = [doc["file_hash"] for doc in cursor]
+    if len(members) > 1:
+        db.file_groups.replace_one({"_id": group_key}, _group_doc(group_key, members), upsert=True)
+    else:
+        db.file_groups.delete_one({"_id": group_key})
+
+# ----------------------
+# function: assign_file_group 동기 버전 (워커 스레드, pymongo)
+# ----------------------
+def assign_file_group_sync(db, file_hash: str, file_name: str, old_key: Optional[str] = None) -> Optional[str]:
+    try:
+        key, tokens, bands = _group_fields(file_name)
+        if key is None and bands:
+            candidates = list(db.file_meta.find(
+                {"lsh_bands": {"$in": bands}, "file_hash": {"$ne": file_hash}},
+                CANDIDATE_PROJECTION
+            ))
+            match = _best_match(tokens, candidates)
+            if match:
+                key = match.get("group_key")
+                if not key:
+                    key = _new_sim_key()
+                    db.file_meta.update_one({"_id": match["_id"]}, {"$set": {"group_key": key}})
+        key = key or _new_sim_key()
+
+        db.file_meta.update_one(
+            {"file_hash": file_hash},
+            {"$set": {"group_key": key, "lsh_bands": bands}}
+        )
+        refresh_group_sync(db, key)
+        if old_key and old_key != key:
+            refresh_group_sync(db, old_key)
+        return key
+    except Exception as e:
+        logger.exception(f"[GROUP] 그룹 배정 실패: {file_name} - {e}")
+        return None
+
+# ----------------------
+# param   : files - file_meta 문서 리스트 (등록순)
+# function: 전체 일괄 그룹핑 (group_similar_files, 기존 /grouped 와 같은 규칙) → 파일별 갱신 + 그룹 문서
+# return  : (UpdateOne 리스트, file_groups 문서 리스트)
+# ----------------------
+def _plan_rebuild(files: List[dict]):
+    key_of = {}
+    group_docs = []
+    for group in group_similar_files(files):
+        code = rj_code(group[0].get("file_name", ""))
+        key = f"RJ:{code}" if code else _new_sim_key()
+        members = [f["file_hash"] for f in group]
+        group_docs.append(_group_doc(key, members))
+        for file_hash in members:
+            key_of[file_hash] = key
+
+    ops = []
+    for f in files:
+        rj_key, _, bands = _group_fields(f.get("file_name", ""))
+        key = key_of.get(f["file_hash"]) or rj_key or _new_sim_key()
+        ops.append(UpdateOne({"_id": f["_id"]}, {"$set": {"group_key": key, "lsh_bands": bands}}))
+    return ops, group_docs
+
+# ----------------------
+# param   : db - MongoDB 세션
+# function: 전체 그룹 재계산 (최초 실행/관리자 API, 증분 배정으로 어긋난 그룹 정리)
+# return  : 저장한 그룹 수
+# ----------------------
+async def rebuild_groups(db: AsyncIOMotorDatabase) -> int:
+    files = await db.file_meta.find(
+        {"file_hash": {"$exists": True}}, {"file_hash": 1, "file_name": 1}
+    ).sort([("created_at", 1), ("_id", 1)]).to_list(length=None)
+    ops, group_docs = await run_blocking(_plan_rebuild, files)
+
+    for i in range(0, len(ops), REBUILD_BATCH):
+        await db.file_meta.bulk_write(ops[i:i + REBUILD_BATCH], ordered=False)
+
+    await db.file_groups.delete_many({})
+    if group_docs:
+        await db.file_groups.insert_many(group_docs)
+
+    logger.info(f"[GROUP] 파일 {len(files)}개 → 그룹 {len(group_docs)}개 재계산 완료")
+    return len(group_docs)
+
+# ----------------------
+# param   : db - MongoDB 세션
+# function: 서버 시작 시 그룹 키가 없는 파일이 있으면 전체 재계산 (기존 데이터 마이그레이션)
+# ----------------------
+async def ensure_file_groups(db: AsyncIOMotorDatabase):
+    try:
+        missing = await db.file_meta.count_documents(
+            {"file_hash": {"$exists": True}, "group_key": {"$exists": False}}, limit=1
+        )
+        if missing:
+            await rebuild_groups(db)
+    except Exception as e:
+        logger.exception(f"[GROUP] 그룹 초기화 실패: {e}")
@@ -0,0 +1,117 @@
+# ----------------------
+# file   : app/services/search_index.py
+# function: 파일명 검색용 n-gram 색인 (띄어쓰기 없는 한/중/일 제목 대응)
+#           file_meta.search_grams 필드(멀티키 인덱스)에 저장, 등록/이름변경/태그수정 시 갱신
+# ----------------------
+
+import re
+import unicodedata
+from typing import Iterable, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from app.utils.logger import logger
+
+NGRAM = 2                            # 바이그램 (CJK 2글자 단어도 검색되도록)
+TOKEN_RUN = re.compile(r"[^\W_]+")   # 문자/숫자 연속 구간 (한글/가나/한자 포함)
+BACKFILL_BATCH = 500
+
+# ----------------------
+# param   : text - 원본 문자열
+# function: 전각/반각, 호환 문자 통일(NFKC) + 소문자화
+# return  : 정규화 문자열
+# ----------------------
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+# ----------------------
+# param   : text - 원본 문자열
+# function: 문자 구간별 바이그램 추출 (1글자 구간은 그대로)
+# return  : n-gram 집합
+# ----------------------
+def _grams(text: str) -> set:
+    grams = set()
+    for run in TOKEN_RUN.findall(normalize_text(text)):
+        if len(run) < NGRAM:
+            grams.add(run)
+        else:
+            grams.update(run[i:i + NGRAM] for i in range(len(run) - NGRAM + 1))
+    return grams
+
+# ----------------------
+# param   : file_name - 파일명
+# param   : tag_names - (선택) 태그 이름들
+# param   : extra - (선택) 크롤링한 제목 등 추가 텍스트
+# function: 색인에 저장할 n-gram 목록 생성
+# return  : 정렬된 n-gram 리스트
+# ----------------------
+def build_search_grams(file_name: str, tag_names: Iterable[str] = (), extra: Iterable[str] = ()) -> List[str]:
+    grams = _grams(file_name)
+    for text in list(tag_names) + list(extra):
+        if isinstance(text, str):
+            grams |= _grams(text)
+    return sorted(grams)
+
+# ----------------------
+# param   : keyword - 검색어
+# function: 검색어의 n-gram 목록 ($all 조건용), 1글자 검색어뿐이면 색인 불가 → 빈 리스트
+# return  : n-gram 리스트
+# ----------------------
+def query_grams(keyword: str) -> List[str]:
+    # 1글자 구간은 색인에서 독립 단어일 때만 남으므로 조건에서 제외
+    runs = [run for run in TOKEN_RUN.findall(normalize_text(keyword)) if len(run) >= NGRAM]
+    return sorted(_grams(" ".join(runs)))
+
+# ----------------------
+# param   : base_query - 상태/태그 등 기본 조건 (search_grams 조건 포함)
+# param   : keyword - 원본 검색어 (부분 문자열 일치 가산점)
+# param   : grams - query_grams 결과
+# param   : skip, limit - 페이징
+# function: 관련도 순 정렬 파이프라인 - 일치 n-gram 비율 + 파일명 부분 일치 보너스
+# return  : aggregate 파이프라인
+# ----------------------
+def relevance_pipeline(base_query: dict, keyword: str, grams: List[str], skip: int, limit: int) -> list:
+    return [
+        {"$match": base_query},
+        {"$addFields": {"_score": {"$add": [
+            {"$divide": [len(grams), {"$max": [1, {"$size": {"$ifNull": ["$search_grams", []]}}]}]},
+            {"$cond": [
+                {"$regexMatch": {"input": {"$ifNull": ["$file_name", ""]}, "regex": re.escape(keyword), "options": "i"}},
+                1, 0
+            ]},
+        ]}}},
+        {"$sort": {"_score": -1, "created_at": -1, "_id": -1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": {"_score": 0, "search_grams": 0, "lsh_bands": 0}},
+    ]
+
+# ----------------------
+# param   : db - MongoDB 세션
+# param   : rebuild - True면 전체 재색인, False면 search_grams가 없는 문서만
+# param   : tag_name_of - 태그 id → 이름 함수 (태그 캐시)
+# function: 기존 파일의 색인 채우기 (서버 시작 시 누락분 백그라운드 처리, 관리자 API로 전체 재색인)
+# return  : 갱신한 문서 수
+# ----------------------
+async def backfill_search_grams(db: AsyncIOMotorDatabase, tag_name_of, rebuild: bool = False) -> int:
+    query = {} if rebuild else {"search_grams": {"$exists": False}}
+    updated = 0
+    ops = []
+    try:
+        async for doc in db.file_meta.find(query, {"file_name": 1, "tags": 1}):
+            tags = doc.get("tags", [])
+            names = [tag_name_of(t) or (t if isinstance(t, str) else "") for t in (tags if isinstance(tags, list) else [tags])]
+            grams = build_search_grams(doc.get("file_name", ""), names)
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_grams": grams}}))
+            if len(ops) >= BACKFILL_BATCH:
+                await db.file_meta.bulk_write(ops, ordered=False)
+                updated += len(ops)
+                ops = []
+        if ops:
+            await db.file_meta.bulk_write(ops, ordered=False)
+            updated += len(ops)
+    except Exception as e:
+        logger.exception(f"[SEARCH-INDEX] 색인 생성 실패: {e}")
+
+    if updated:
+        logger.info(f"[SEARCH-INDEX] {updated}개 문서 색인 완료")
+    return updated
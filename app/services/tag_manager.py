@@ -3,58 +3,219 @@
 # function: 태그 생성, 참조 수 증감 등 태그 관련 DB 처리
 # ----------------------
 
-from typing import List
+import threading
+import heapq
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
 from bson import ObjectId
+from pymongo import UpdateOne
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.utils.logger import logger
 from app.models.tag_meta import TagMeta
 
 
+# ----------------------
+# function: 자동완성 비교용 태그명 정규화 (NFKC + 대소문자 무시)
+# ----------------------
+def _prefix_key(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+# ----------------------
+# class   : TagCache
+# function: 태그 id ↔ 이름 인메모리 사전 + tag_count + 자동완성용 정렬 배열
+#           (서버 시작 시 로드, 태그 생성/증감 시 write-through 갱신)
+#           워커 스레드(동기 pymongo)와 이벤트 루프에서 함께 쓰므로 lock 사용
+# ----------------------
+class TagCache:
+    def __init__(self):
+        self.id_to_name: Dict[ObjectId, str] = {}
+        self.name_to_id: Dict[str, ObjectId] = {}
+        self.counts: Dict[ObjectId, int] = {}
+        self.lock = threading.Lock()
+        self._prefix_keys: List[str] = []        # 정규화된 태그명 (정렬됨)
+        self._prefix_ids: List[ObjectId] = []    # _prefix_keys 와 같은 순서의 태그 id
+        self._prefix_dirty = True                # 태그가 추가되면 다음 조회 때 재정렬
+
+    # ----------------------
+    # param   : db - MongoDB 세션
+    # function: tags 컬렉션 전체를 읽어 캐시 초기화
+    # ----------------------
+    async def load(self, db: AsyncIOMotorDatabase):
+        id_to_name = {}
+        counts = {}
+        async for tag in db.tags.find({}, {"tag_name": 1, "tag_count": 1}):
+            id_to_name[tag["_id"]] = tag["tag_name"]
+            counts[tag["_id"]] = tag.get("tag_count", 0)
+        with self.lock:
+            self.id_to_name = id_to_name
+            self.name_to_id = {name: tag_id for tag_id, name in id_to_name.items()}
+            self.counts = counts
+            self._prefix_dirty = True
+        logger.info(f"[TAG-CACHE] 태그 {len(id_to_name)}개 로드")
+
+    def add(self, tag_id: ObjectId, tag_name: str):
+        with self.lock:
+            if tag_id not in self.id_to_name:
+                self._prefix_dirty = True
+            self.id_to_name[tag_id] = tag_name
+            self.name_to_id[tag_name] = tag_id
+            self.counts.setdefault(tag_id, 0)
+
+    # ----------------------
+    # param   : deltas - {tag_id: 증감값}
+    # function: DB에 반영된 tag_count 증감을 캐시에도 반영
+    # ----------------------
+    def adjust(self, deltas: Dict[ObjectId, int]):
+        with self.lock:
+            for tag_id, delta in deltas.items():
+                if tag_id in self.counts:
+                    self.counts[tag_id] += delta
+
+    # ----------------------
+    # param   : prefix - 입력 중인 문자열
+    # param   : limit - 최대 개수
+    # function: 정렬 배열에서 이분 탐색으로 prefix 구간을 찾고 tag_count 상위 k개 반환 (DB 조회 없음)
+    # return  : [{tag_name, tag_count}]
+    # ----------------------
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[dict]:
+        with self.lock:
+            if self._prefix_dirty:
+                pairs = sorted((_prefix_key(name), tag_id) for tag_id, name in self.id_to_name.items())
+                self._prefix_keys = [key for key, _ in pairs]
+                self._prefix_ids = [tag_id for _, tag_id in pairs]
+                self._prefix_dirty = False
+
+            key = _prefix_key(prefix)
+            lo = bisect_left(self._prefix_keys, key)
+            hi = bisect_left(self._prefix_keys, key + "\U0010ffff")
+            top = heapq.nlargest(limit, self._prefix_ids[lo:hi], key=lambda t: self.counts.get(t, 0))
+            return [{"tag_name": self.id_to_name[t], "tag_count": self.counts.get(t, 0)} for t in top]
+
+    def get_id(self, tag_name: str) -> Optional[ObjectId]:
+        return self.name_to_id.get(tag_name)
+
+    def get_name(self, tag_id) -> Optional[str]:
+        return self.id_to_name.get(tag_id)
+
+tag_cache = TagCache()
+
+
+# ----------------------
+# param   : new_names - 파일에 최종적으로 붙을 태그 이름 리스트
+# param   : old_ids - 파일에 기존에 붙어 있던 태그 id 리스트
+# param   : count - tag_count를 증감할지 여부 (False면 태그 존재만 보장)
+# function: 기존/신규 태그의 차집합을 계산해 bulk_write용 연산 목록 생성
+#           - 캐시에 없는 이름은 upsert($inc 또는 $setOnInsert)로 생성/증가를 한 번에 처리
+#           - 새로 붙은 태그 +1, 빠진 태그 -1, 그대로인 태그는 연산 없음
+# return  : (연산 리스트, 이름 → id 매핑(캐시로 해석된 것만), 최종 이름 리스트, 캐시에 없던 이름 리스트,
+#            캐시에 반영할 {tag_id: 증감값})
+# ----------------------
+def _build_tag_ops(new_names: List[str], old_ids: List, count: bool):
+    names = list(dict.fromkeys(n for n in new_names if n))  # 순서 유지 중복 제거
+    old_set = {i for i in old_ids if isinstance(i, ObjectId)}
+
+    known = {}
+    unresolved = []
+    for name in names:
+        tag_id = tag_cache.get_id(name)
+        if tag_id is None:
+            unresolved.append(name)
+        else:
+            known[name] = tag_id
+
+    ops = []
+    deltas = {}
+    for name in unresolved:
+        update = {"$inc": {"tag_count": 1}} if count else {"$setOnInsert": {"tag_count": 0}}
+        ops.append(UpdateOne({"tag_name": name}, update, upsert=True))
+
+    if count:
+        new_ids = set(known.values())
+        for tag_id in new_ids - old_set:
+            ops.append(UpdateOne({"_id": tag_id}, {"$inc": {"tag_count": 1}}))
+            deltas[tag_id] = 1
+        # 캐시에 없던 이름이 기존 태그였다면 위 upsert의 +1과 여기의 -1이 상쇄됨
+        for tag_id in old_set - new_ids:
+            ops.append(UpdateOne({"_id": tag_id}, {"$inc": {"tag_count": -1}}))
+            deltas[tag_id] = -1
+
+    return ops, known, names, unresolved, deltas
+
+# ----------------------
+# param   : names - 최종 태그 이름 리스트 (순서 유지)
+# param   : known - 이름 → id 매핑
+# param   : unresolved - 캐시에 없던 이름 (upsert로 +1 된 태그)
+# param   : deltas - 캐시에 있던 태그의 증감값
+# param   : count - tag_count 증감 여부
+# function: 결과 id 리스트 구성 + 새로 알게 된 태그와 tag_count 증감을 캐시에 반영
+# return  : List[ObjectId]
+# ----------------------
+def _collect_tag_ids(names: List[str], known: Dict[str, ObjectId], unresolved: List[str], deltas: Dict, count: bool) -> List[ObjectId]:
+    for name, tag_id in known.items():
+        tag_cache.add(tag_id, name)
+    if count:
+        for name in unresolved:
+            if name in known:
+                deltas[known[name]] = deltas.get(known[name], 0) + 1
+    tag_cache.adjust(deltas)
+    return [known[name] for name in names if name in known]
+
+# ----------------------
+# param   : db - MongoDB 세션
+# param   : old_tag_ids - 파일의 기존 태그 id 리스트 (신규 파일이면 [])
+# param   : tag_names - 새로 설정할 태그 이름 리스트
+# param   : count - tag_count 증감 여부
+# function: 태그 diff를 bulk_write 1회로 반영 (+ 캐시에 없던 태그 id 조회 1회)
+# return  : 새 태그 ObjectId 리스트
+# ----------------------
+async def apply_tag_diff(db: AsyncIOMotorDatabase, old_tag_ids: List, tag_names: List[str], count: bool = True) -> List[ObjectId]:
+    ops, known, names, unresolved, deltas = _build_tag_ops(tag_names, old_tag_ids, count)
+    try:
+        if ops:
+            result = await db.tags.bulk_write(ops, ordered=False)
+            for index, tag_id in result.upserted_ids.items():
+                if index < len(unresolved):
+                    known[unresolved[index]] = tag_id
+
+        pending = [name for name in unresolved if name not in known]
+        if pending:
+            async for tag in db.tags.find({"tag_name": {"$in": pending}}, {"tag_name": 1}):
+                known[tag["tag_name"]] = tag["_id"]
+    except Exception as e:
+        logger.exception(f"태그 일괄 처리 중 오류 발생: {names} - {e}")
+        return _collect_tag_ids(names, known, [], {}, False)
+
+    return _collect_tag_ids(names, known, unresolved, deltas, count)
+
 # ----------------------
 # param   : db - MongoDB 세션
 # param   : tag_names - 유저가 보낸 태그 문자열 리스트
 # param   : is_new_file - 중복 검사 결과 새 파일 여부
-# function: 태그 ObjectId 리스트 반환 + 필요 시 tag_count 증가
+# function: 태그 ObjectId 리스트 반환 + 필요 시 tag_count 증가 (bulk_write 1회)
 # return  : List[ObjectId]
 # ----------------------
 async def process_tags_on_upload(db: AsyncIOMotorDatabase, tag_names: List[str], is_new_file: bool) -> List[ObjectId]:
-    tag_ids = []
-    for tag in tag_names:
-        try:
-            tag_doc = await db.tags.find_one({"tag_name": tag})
-            if tag_doc:
-                if is_new_file:
-                    await db.tags.update_one(
-                        {"_id": tag_doc["_id"]},
-                        {"$inc": {"tag_count": 1}}
-                    )
-                tag_ids.append(tag_doc["_id"])
-            else:
-                tag_count = 1 if is_new_file else 0
-                result = await db.tags.insert_one({
-                    "tag_name": tag,
-                    "tag_count": tag_count
-                })
-                tag_ids.append(result.inserted_id)
-        except Exception as e:
-            logger.exception(f"태그 처리 중 오류 발생: {tag} - {e}")
-    return tag_ids
+    return await apply_tag_diff(db, [], tag_names, count=is_new_file)
 
 # ----------------------
 # param   : db - MongoDB 세션
 # param   : tag_ids - 삭제될 파일이 가지고 있던 태그 id 리스트
-# function: 파일 삭제 시 해당 태그들의 tag_count 감소
+# function: 파일 삭제 시 해당 태그들의 tag_count 감소 (update_many 1회)
 # return  : None
 # ----------------------
 async def decrease_tag_count_on_delete(db: AsyncIOMotorDatabase, tag_ids: List[ObjectId]):
-    for tag_id in tag_ids:
-        try:
-            await db.tags.update_one(
-                {"_id": tag_id},
-                {"$inc": {"tag_count": -1}}
-            )
-        except Exception as e:
-            logger.exception(f"태그 카운트 감소 중 오류 발생: {tag_id} - {e}")
+    if not tag_ids:
+        return
+    try:
+        unique_ids = list(dict.fromkeys(tag_ids))
+        await db.tags.update_many(
+            {"_id": {"$in": unique_ids}},
+            {"$inc": {"tag_count": -1}}
+        )
+        tag_cache.adjust({tag_id: -1 for tag_id in unique_ids})
+    except Exception as e:
+        logger.exception(f"태그 카운트 감소 중 오류 발생: {tag_ids} - {e}")
 
             
 # ----------------------
@@ -71,41 +232,56 @@ def split_tags(raw_tags: List[str]) -> List[str]:
 # param   : db - pymongo DB 인스턴스
 # param   : tag_names - 유저가 보낸 태그 문자열 리스트
 # param   : is_new_file - 중복 검사 결과 새 파일 여부
-# function: 동기 pymongo 버전 태그 처리
+# function: 동기 pymongo 버전 태그 처리 (bulk_write 1회)
 # return  : 태그 ObjectId 리스트
 # ----------------------
 def process_tags_on_upload_sync(db, tag_names: List[str], is_new_file: bool) -> List[ObjectId]:
-    tag_ids = []
-    for tag in tag_names:
-        try:
-            tag_doc = db.tags.find_one({"tag_name": tag})
-            if tag_doc:
-                if is_new_file:
-                    db.tags.update_one(
-                        {"_id": tag_doc["_id"]},
-                        {"$inc": {"tag_count": 1}}
-                    )
-                tag_ids.append(tag_doc["_id"])
-            else:
-                tag_count = 1 if is_new_file else 0
-                result = db.tags.insert_one({
-                    "tag_name": tag,
-                    "tag_count": tag_count
-                })
-                tag_ids.append(result.inserted_id)
-        except Exception as e:
-            logger.exception(f"[SYNC] 태그 처리 중 오류 발생: {tag} - {e}")
-    return tag_ids
+    ops, known, names, unresolved, deltas = _build_tag_ops(tag_names, [], is_new_file)
+    try:
+        if ops:
+            result = db.tags.bulk_write(ops, ordered=False)
+            for index, tag_id in result.upserted_ids.items():
+                if index < len(unresolved):
+                    known[unresolved[index]] = tag_id
+
+        pending = [name for name in unresolved if name not in known]
+        if pending:
+            for tag in db.tags.find({"tag_name": {"$in": pending}}, {"tag_name": 1}):
+                known[tag["tag_name"]] = tag["_id"]
+    except Exception as e:
+        logger.exception(f"[SYNC] 태그 일괄 처리 중 오류 발생: {names} - {e}")
+        return _collect_tag_ids(names, known, [], {}, False)
+
+    return _collect_tag_ids(names, known, unresolved, deltas, is_new_file)
+
+# ----------------------
+# param   : db - MongoDB 세션
+# param   : tag_ids - ObjectId 리스트 (여러 파일의 태그를 모아서 전달 가능)
+# function: 태그 ID → 이름 매핑 (캐시 우선, 캐시에 없는 id만 DB 조회 후 캐시에 추가)
+# return  : {ObjectId: tag_name}
+# ----------------------
+async def get_tag_map(db: AsyncIOMotorDatabase, tag_ids: Iterable) -> Dict[ObjectId, str]:
+    tag_map = {}
+    missing = []
+    for tag_id in tag_ids:
+        name = tag_cache.get_name(tag_id)
+        if name is not None:
+            tag_map[tag_id] = name
+        elif isinstance(tag_id, ObjectId):
+            missing.append(tag_id)
+
+    if missing:
+        async for tag in db.tags.find({"_id": {"$in": missing}}):
+            tag_cache.add(tag["_id"], tag["tag_name"])
+            tag_map[tag["_id"]] = tag["tag_name"]
+    return tag_map
 
 # ----------------------
 # param   : db - MongoDB 세션
 # param   : tag_ids - ObjectId 리스트
-# function: 태그 ID 목록을 이름 리스트로 변환
+# function: 태그 ID 목록을 이름 리스트로 변환 (캐시 사용)
 # return  : tag_name 리스트
 # ----------------------
 async def get_tag_names_by_ids(db: AsyncIOMotorDatabase, tag_ids: List[ObjectId]) -> List[str]:
-    tag_names = []
-    cursor = db.tags.find({"_id": {"$in": tag_ids}})
-    async for tag in cursor:
-        tag_names.append(tag["tag_name"])
-    return tag_names
+    tag_map = await get_tag_map(db, tag_ids)
+    return [tag_map[tag_id] for tag_id in tag_ids if tag_id in tag_map]
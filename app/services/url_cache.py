@@ -0,0 +1,96 @@
+# ----------------------
+# file   : app/services/url_cache.py
+# function: 원본 URL → 저장된 파일 해시 색인 (같은 링크를 다시 받으면 본문 전송 없이 중복 처리)
+#           url_cache - {_id: url, file_hash, file_name, etag, last_modified, content_length, updated_at}
+#           재요청 시 조건부 HEAD (If-None-Match / If-Modified-Since) 로 원본이 그대로인지만 확인
+# ----------------------
+
+from datetime import datetime
+from typing import Dict, Optional
+import aiohttp
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.http_client import get_http_session, PROXY_SSL
+from app.utils.logger import logger
+
+REVALIDATE_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+# ----------------------
+# param   : entry - url_cache 문서
+# param   : resp - HEAD 응답
+# function: 원본이 캐시 당시와 같은지 판단 (304, 또는 ETag → Last-Modified → 크기 순으로 비교)
+#           비교할 값이 하나도 없으면 URL 일치만으로 같은 파일로 판단
+# return  : bool
+# ----------------------
+def _unchanged(entry: dict, resp: aiohttp.ClientResponse) -> bool:
+    if resp.status == 304:
+        return True
+    if entry.get("etag") and resp.headers.get("ETag"):
+        return entry["etag"] == resp.headers["ETag"]
+    if entry.get("last_modified") and resp.headers.get("Last-Modified"):
+        return entry["last_modified"] == resp.headers["Last-Modified"]
+    if entry.get("content_length") and resp.content_length:
+        return entry["content_length"] == resp.content_length
+    return True
+
+# ----------------------
+# param   : db - MongoDB 세션
+# param   : url - 다운로드 요청 URL
+# param   : headers - 요청 헤더 (Referer, Cookie)
+# function: 같은 URL로 받은 파일이 아직 저장되어 있고 원본이 바뀌지 않았으면 캐시 문서 반환
+#           원본 확인(HEAD)이 실패하면(네트워크 오류, 4xx/5xx) 이미 가진 파일로 처리, 캐시 조회 자체가 실패하면 다운로드
+# return  : url_cache 문서 (file_hash, file_name) 또는 None (다운로드 필요)
+# ----------------------
+async def lookup_url(db: AsyncIOMotorDatabase, url: str, headers: Dict[str, str]) -> Optional[dict]:
+    try:
+        entry = await db.url_cache.find_one({"_id": url})
+        if not entry or not await db.file_meta.find_one({"file_hash": entry["file_hash"]}, {"_id": 1}):
+            return None
+    except Exception as e:
+        logger.warning(f"[URL-CACHE] 조회 실패, 다운로드 진행: {url} - {e}")
+        return None
+
+    request_headers = dict(headers)
+    if entry.get("etag"):
+        request_headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        async with get_http_session().head(url, headers=request_headers, allow_redirects=True,
+                                           timeout=REVALIDATE_TIMEOUT, ssl=PROXY_SSL) as resp:
+            if resp.status >= 400:
+                logger.info(f"[URL-CACHE] 원본 확인 실패(status {resp.status}), 저장된 파일 사용: {url}")
+                return entry
+            if not _unchanged(entry, resp):
+                logger.info(f"[URL-CACHE] 원본 변경됨, 다시 다운로드: {url}")
+                return None
+    except Exception as e:
+        logger.info(f"[URL-CACHE] 원본 확인 실패({e}), 저장된 파일 사용: {url}")
+
+    return entry
+
+# ----------------------
+# param   : db - MongoDB 세션
+# param   : url - 다운로드 요청 URL
+# param   : file_hash - 받은 파일 해시
+# param   : file_name - 저장 파일명
+# param   : headers - 다운로드 첫 응답 헤더 (ETag, Last-Modified, 크기)
+# param   : content_length - 받은 크기
+# function: URL → 파일 해시 기록 (실패해도 다운로드 자체는 성공으로 둠)
+# ----------------------
+async def remember_url(db: AsyncIOMotorDatabase, url: str, file_hash: str, file_name: str, headers, content_length: int):
+    try:
+        await db.url_cache.replace_one(
+            {"_id": url},
+            {
+                "file_hash": file_hash,
+                "file_name": file_name,
+                "etag": headers.get("ETag", ""),
+                "last_modified": headers.get("Last-Modified", ""),
+                "content_length": content_length,
+                "updated_at": datetime.utcnow(),
+            },
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"[URL-CACHE] 기록 실패: {url} - {e}")
@@ -10,8 +10,11 @@ from datetime import datetime
 from typing import List
 from app.models.file_meta import FileMeta
 from app.services.tag_manager import process_tags_on_upload
+from app.db.mongo import db
 from app.db.mongo_sync import sync_db
-from app.utils.hash_util import compute_sha256
+from app.services.search_index import build_search_grams
+from app.services.group_index import assign_file_group, assign_file_group_sync
+from app.utils.hash_util import compute_sha256, compute_sample_hash, compute_sha256_async, compute_sample_hash_async
 
 DATA_DIR = "/data"
 TEMP_DIR = "/data/temp"
@@ -28,7 +31,7 @@ async def run_worker(temp_path: str, tags: List[str], thumb_path: str = ""):
     try:
         file_name = os.path.basename(temp_path)
         file_size = os.path.getsize(temp_path)
-        file_hash = await compute_sha256(temp_path)
+        file_hash = await compute_sha256_async(temp_path)
 
         logger.info(f"[WORKER] 파일 처리 시작: {file_name}, 해시: {file_hash}")
 
@@ -47,6 +50,7 @@ async def run_worker(temp_path: str, tags: List[str], thumb_path: str = ""):
 
         # 태그 처리
         tag_ids = await process_tags_on_upload(db, tags, is_new_file)
+        sample_hash = await compute_sample_hash_async(temp_path)
 
         # data로 이동
         final_path = os.path.join(DATA_DIR, file_name)
@@ -63,7 +67,12 @@ async def run_worker(temp_path: str, tags: List[str], thumb_path: str = ""):
             created_at=datetime.utcnow(),
         )
 
-        await db.file_meta.insert_one(meta.dict())
+        await db.file_meta.insert_one({
+            **meta.dict(),
+            "sample_hash": sample_hash,
+            "search_grams": build_search_grams(file_name, tags),
+        })
+        await assign_file_group(db, file_hash, file_name)
         logger.info(f"[WORKER] 메타데이터 등록 완료: {file_name} + 태그 {tags}")
 
     except Exception as e:
@@ -93,6 +102,7 @@ def run_worker_sync(temp_path: str, tags: List[str], thumb_path: str = ""):
             return
 
         tag_ids = process_tags_on_upload_sync(sync_db, tags, is_new_file)
+        sample_hash = compute_sample_hash(temp_path)
 
         final_path = os.path.join(DATA_DIR, file_name)
         shutil.move(temp_path, final_path)
@@ -102,12 +112,15 @@ def run_worker_sync(temp_path: str, tags: List[str], thumb_path: str = ""):
             "file_name": file_name,
             "file_size": file_size,
             "file_hash": file_hash,
+            "sample_hash": sample_hash,
             "thumb_path": thumb_path,
             "tags": tag_ids,
+            "search_grams": build_search_grams(file_name, tags),
             "created_at": datetime.utcnow(),
         }
 
         sync_db.file_meta.insert_one(meta)
+        assign_file_group_sync(sync_db, file_hash, file_name)
         logger.info(f"[WORKER] 메타데이터 등록 완료: {file_name}")
 
     except Exception as e:
@@ -1,64 +1,193 @@
 # ----------------------
 # file   : app/utils/crawler.py
 # function: RJ코드로 DLSite에서 제목, 썸네일, 태그 정보 크롤링
+#           공용 aiohttp 세션 + 호스트별 토큰 버킷(초당 요청 수 제한) + 지수 백오프 재시도
+#           결과는 crawl_cache 컬렉션에 TTL 로 저장 (없는 작품 404 도 짧게 저장) → 같은 RJ코드는 외부 요청 없음
 # return  : {title, thumbnail, tags}
 # ----------------------
 
-import requests
+import os
+import time
+import random
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import aiohttp
 from bs4 import BeautifulSoup
+from app.core.http_client import get_http_session
+from app.core.blocking import run_blocking
+from app.db.mongo import db
 from app.utils.logger import logger
 
-def crawl_dlsite_info(rj_code: str):
+DLSITE_RATE = float(os.getenv("DLSITE_RATE") or 1)     # 호스트별 초당 요청 수
+DLSITE_BURST = 3                                         # 한 번에 몰아서 보낼 수 있는 요청 수
+CRAWL_RETRIES = 4                                        # 네트워크 오류 / 429 / 5xx 재시도 횟수
+CRAWL_BACKOFF = 1.0                                      # 첫 재시도 대기(초), 이후 2배씩
+CRAWL_TIMEOUT = aiohttp.ClientTimeout(total=15)
+CACHE_TTL = timedelta(days=7)                            # 크롤링 결과 보관 기간
+NEGATIVE_TTL = timedelta(days=1)                         # 없는 작품(404) 보관 기간
+
+crawl_cache = db["crawl_cache"]
+
+# ----------------------
+# class   : TokenBucket
+# function: 초당 rate 개씩 채워지는 토큰 버킷 (최대 capacity 개) - 토큰이 없으면 생길 때까지 대기
+# ----------------------
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+_buckets: Dict[str, TokenBucket] = {}
+_inflight: Dict[str, asyncio.Future] = {}   # 같은 RJ코드 동시 요청은 크롤링 1회로 합침
+
+def _bucket(url: str) -> TokenBucket:
+    host = urlsplit(url).hostname or ""
+    if host not in _buckets:
+        _buckets[host] = TokenBucket(DLSITE_RATE, DLSITE_BURST)
+    return _buckets[host]
+
+# ----------------------
+# param   : url - 요청 URL
+# function: 토큰 버킷 + 재시도(지수 백오프, Retry-After 우선)로 GET
+# return  : (status, 본문 bytes) - 404 는 재시도 없이 반환
+# ----------------------
+async def _fetch(url: str):
+    headers = {"User-Agent": "Mozilla/5.0"}
+    for attempt in range(CRAWL_RETRIES + 1):
+        await _bucket(url).acquire()
+        delay = CRAWL_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+        try:
+            # 공용 세션 기본값과 같지만 크롤링은 항상 인증서 검증하도록 명시
+            async with get_http_session().get(url, headers=headers, timeout=CRAWL_TIMEOUT, ssl=True) as response:
+                if response.status == 429 or response.status >= 500:
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = float(retry_after)
+                    logger.warning(f"[CRAWLER] 응답 {response.status}, {delay:.1f}초 후 재시도 - {url}")
+                else:
+                    return response.status, await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"[CRAWLER] 요청 실패({e}), {delay:.1f}초 후 재시도 - {url}")
+        if attempt < CRAWL_RETRIES:
+            await asyncio.sleep(delay)
+    return None, b""
+
+# ----------------------
+# param   : content - 작품 페이지 HTML
+# function: 제목/썸네일/태그 추출 (동기, run_blocking 으로 실행)
+# return  : {title, thumbnail, tags}
+# ----------------------
+def _parse_dlsite_page(content: bytes) -> dict:
+    soup = BeautifulSoup(content, "lxml")
+
+    # ----------------------
+    # 제목 크롤링 - 정확한 구조 반영 (h1#work_name)
+    # ----------------------
+    title_element = soup.select_one("h1#work_name")
+    title = title_element.text.strip() if title_element else "제목 없음"
+
+
+    # ----------------------
+    # 썸네일 이미지 크롤링 - srcset 또는 data-src 또는 src 순서로 탐색
+    # ----------------------
+    thumb_element = soup.select_one("div#work_left img")
+    thumbnail = ""
+
+    if thumb_element:
+        thumbnail = (
+            thumb_element.get("srcset") or
+            thumb_element.get("data-src") or
+            thumb_element.get("src") or
+            ""
+        )
+
+    # 절대 URL 보정
+    if thumbnail.startswith("//"):
+        thumbnail = "https:" + thumbnail
+    elif thumbnail.startswith("/"):
+        thumbnail = "https://www.dlsite.com" + thumbnail
+
+
+    # ----------------------
+    # 태그 크롤링
+    # ----------------------
+    tag_elements = soup.select("div.main_genre a")
+    tags = [tag.text.strip() for tag in tag_elements]
+
+    return {
+        "title": title,
+        "thumbnail": thumbnail,
+        "tags": tags,
+    }
+
+async def _save_cache(rj_code: str, data: Optional[dict], ttl: timedelta):
+    try:
+        now = datetime.utcnow()
+        await crawl_cache.replace_one(
+            {"_id": rj_code},
+            {"data": data, "found": data is not None, "updated_at": now, "expires_at": now + ttl},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"[CRAWLER] 캐시 저장 실패: {rj_code} - {e}")
+
+async def _crawl(rj_code: str) -> Optional[dict]:
+    url = f"https://www.dlsite.com/maniax/work/=/product_id/{rj_code}.html"
+    status, content = await _fetch(url)
+    if status == 404:
+        logger.info(f"[CRAWLER] 작품 없음 - {url}")
+        await _save_cache(rj_code, None, NEGATIVE_TTL)
+        return None
+    if status != 200:
+        logger.error(f"[CRAWLER] 접속 실패 - {url}")
+        return None
+
+    result = await run_blocking(_parse_dlsite_page, content)
+    await _save_cache(rj_code, result, CACHE_TTL)
+    return result
+
+# ----------------------
+# param   : rj_code - RJ코드 (예: RJ01169914)
+# function: 캐시 확인 → 없으면 크롤링 (같은 코드 동시 요청은 1회만 크롤링)
+# return  : {title, thumbnail, tags} 또는 None (없는 작품/실패)
+# ----------------------
+async def crawl_dlsite_info(rj_code: str) -> Optional[dict]:
+    rj_code = rj_code.strip().upper()
     try:
-        url = f"https://www.dlsite.com/maniax/work/=/product_id/{rj_code}.html"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            logger.error(f"[CRAWLER] 접속 실패 - {url}")
-            return None
-
-        soup = BeautifulSoup(response.content, "lxml")
-
-        # ----------------------
-        # 제목 크롤링 - 정확한 구조 반영 (h1#work_name)
-        # ----------------------
-        title_element = soup.select_one("h1#work_name")
-        title = title_element.text.strip() if title_element else "제목 없음"
-
-
-        # ----------------------
-        # 썸네일 이미지 크롤링 - srcset 또는 data-src 또는 src 순서로 탐색
-        # ----------------------
-        thumb_element = soup.select_one("div#work_left img")
-        thumbnail = ""
-
-        if thumb_element:
-            thumbnail = (
-                thumb_element.get("srcset") or
-                thumb_element.get("data-src") or
-                thumb_element.get("src") or
-                ""
-            )
-
-        # 절대 URL 보정
-        if thumbnail.startswith("//"):
-            thumbnail = "https:" + thumbnail
-        elif thumbnail.startswith("/"):
-            thumbnail = "https://www.dlsite.com" + thumbnail
-
-
-        # ----------------------
-        # 태그 크롤링
-        # ----------------------
-        tag_elements = soup.select("div.main_genre a")
-        tags = [tag.text.strip() for tag in tag_elements]
-
-        return {
-            "title": title,
-            "thumbnail": thumbnail,
-            "tags": tags,
-        }
+        cached = await crawl_cache.find_one({"_id": rj_code, "expires_at": {"$gt": datetime.utcnow()}})
+        if cached:
+            return cached.get("data")
+    except Exception as e:
+        logger.warning(f"[CRAWLER] 캐시 조회 실패: {rj_code} - {e}")
+
+    if rj_code in _inflight:
+        return await asyncio.shield(_inflight[rj_code])
 
+    future = asyncio.get_running_loop().create_future()
+    _inflight[rj_code] = future
+    result = None
+    try:
+        result = await _crawl(rj_code)
     except Exception as e:
         logger.exception(f"[CRAWLER] 크롤링 실패: {str(e)}")
-        return None
+    finally:
+        # 취소되어도 기다리던 요청은 None 으로 풀어줌
+        _inflight.pop(rj_code, None)
+        future.set_result(result)
+    return result
@@ -1,13 +1,116 @@
+import os
+import mmap
 import hashlib
+from typing import Callable, Dict, Iterator, Optional, Sequence
+from app.core.blocking import run_blocking
+
+PROGRESS_STEP = 32 * 1024 * 1024  # 진행률 콜백 호출 간격 (바이트)
+SAMPLE_BLOCK = 64 * 1024  # 샘플 지문용 블록 크기 (앞/중간/끝 각 1개)
+HASH_BUFFER = 8 * 1024 * 1024  # 해시 계산 읽기 단위 (큰 버퍼일수록 파이썬 호출 횟수 감소, update 중에는 GIL 해제)
+
+# ----------------------
+# param   : path - 파일 경로
+# param   : use_mmap - True면 파일을 mmap 해서 페이지 캐시를 그대로 전달 (복사 없음)
+# function: 파일 내용을 HASH_BUFFER 단위 memoryview로 순회
+#           기본은 미리 잡은 버퍼 하나에 readinto (매번 bytes 객체를 만들지 않음)
+# return  : memoryview iterator
+# ----------------------
+def _iter_blocks(path: str, use_mmap: bool = False) -> Iterator[memoryview]:
+    with open(path, "rb") as f:
+        if use_mmap:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, size, HASH_BUFFER):
+                        # mmap을 닫기 전에 조각 view를 모두 해제해야 함
+                        with view[offset:offset + HASH_BUFFER] as block:
+                            yield block
+                finally:
+                    view.release()
+            return
+
+        buf = bytearray(HASH_BUFFER)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            yield view[:n]
 
 # ----------------------
 # param   : path - 파일 경로
+# param   : algorithms - hashlib 알고리즘 이름들 (예: ("sha256", "md5")), 한 번 읽어서 모두 계산
+# param   : progress_cb - (선택) progress_cb(처리 바이트, 전체 바이트), PROGRESS_STEP마다 호출
+# param   : use_mmap - mmap 읽기 사용 여부
+# function: 여러 해시를 파일 1회 읽기로 계산
+# return  : {알고리즘: 해시 문자열}
+# ----------------------
+def compute_digests(
+    path: str,
+    algorithms: Sequence[str] = ("sha256",),
+    progress_cb: Optional[Callable[[int, int], None]] = None,
+    use_mmap: bool = False
+) -> Dict[str, str]:
+    hashers = {name: hashlib.new(name) for name in algorithms}
+    total = os.path.getsize(path) if progress_cb else 0
+    done = 0
+    next_report = PROGRESS_STEP
+    for block in _iter_blocks(path, use_mmap):
+        for hasher in hashers.values():
+            hasher.update(block)
+        if progress_cb:
+            done += len(block)
+            if done >= next_report:
+                progress_cb(done, total)
+                next_report = done + PROGRESS_STEP
+    if progress_cb:
+        progress_cb(total, total)
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+# ----------------------
+# param   : path - 파일 경로
+# param   : progress_cb - (선택) progress_cb(처리 바이트, 전체 바이트), PROGRESS_STEP마다 호출
 # function: SHA256 해시 계산
 # return  : 해시 문자열
 # ----------------------
-def compute_sha256(path: str) -> str:
-    hash_sha256 = hashlib.sha256()
+def compute_sha256(path: str, progress_cb: Optional[Callable[[int, int], None]] = None) -> str:
+    return compute_digests(path, ("sha256",), progress_cb)["sha256"]
+
+# ----------------------
+# function: compute_sha256 비동기 버전 (스레드풀에서 실행, 이벤트 루프를 막지 않음)
+# ----------------------
+async def compute_sha256_async(path: str, progress_cb: Optional[Callable[[int, int], None]] = None) -> str:
+    return await run_blocking(compute_sha256, path, progress_cb)
+
+# ----------------------
+# function: compute_digests 비동기 버전
+# ----------------------
+async def compute_digests_async(path: str, algorithms: Sequence[str] = ("sha256",), use_mmap: bool = False) -> Dict[str, str]:
+    return await run_blocking(compute_digests, path, algorithms, None, use_mmap)
+
+# ----------------------
+# param   : path - 파일 경로
+# function: 샘플 지문 계산 - SHA256("{크기}:" + 앞/중간/끝 64KB), 작은 파일은 전체
+#           (front/src/fingerprint.js 와 동일한 규칙이어야 함)
+# return  : 해시 문자열
+# ----------------------
+def compute_sample_hash(path: str) -> str:
+    size = os.path.getsize(path)
+    hash_sha256 = hashlib.sha256(f"{size}:".encode())
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_sha256.update(chunk)
+        if size <= SAMPLE_BLOCK * 3:
+            hash_sha256.update(f.read())
+        else:
+            for offset in (0, (size - SAMPLE_BLOCK) // 2, size - SAMPLE_BLOCK):
+                f.seek(offset)
+                hash_sha256.update(f.read(SAMPLE_BLOCK))
     return hash_sha256.hexdigest()
+
+# ----------------------
+# function: compute_sample_hash 비동기 버전
+# ----------------------
+async def compute_sample_hash_async(path: str) -> str:
+    return await run_blocking(compute_sample_hash, path)
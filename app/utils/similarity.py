@@ -0,0 +1,180 @@
+# ----------------------
+# file   : app/utils/similarity.py
+# function: 파일명 유사도 그룹핑 (RJ코드 우선 → MinHash + LSH 후보 생성 → 자카드 유사도 검증)
+# ----------------------
+
+import re
+import hashlib
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+RJ_PATTERN = re.compile(r"RJ\d{4,}", re.IGNORECASE)
+SIMILARITY_THRESHOLD = 0.4  # 자카드 유사도 기준 (기존 /grouped 와 동일)
+
+# ----------------------
+# MinHash / LSH 파라미터
+#   32 밴드 × 2 행 = 64개 해시, 자카드 0.4 쌍이 후보로 잡힐 확률 1-(1-0.4²)^32 ≈ 99.6%
+#   후보는 실제 자카드 유사도로 다시 검증하므로 기준(0.4) 의미는 그대로 유지
+# ----------------------
+NUM_PERM = 64
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+# ----------------------
+# function: 파일명에서 단어 추출
+# ----------------------
+def normalize(text: str) -> str:
+    # 대소문자 무시, 특수문자 제거, 전부 붙이기
+    return re.sub(r"[^\w가-힣]", "", text.lower())
+
+def tokenize(text: str) -> set:
+    # 1. 먼저 띄어쓰기 기준 분할
+    base = re.sub(r"[^\w가-힣]", " ", text.lower())
+    words = base.split()
+
+    # 2. 추가로 붙어있는 형태를 나눠서 탐지 (슬라이딩 윈도우식)
+    merged = normalize(text)
+    chunks = re.findall(r"[가-힣]+|[a-z]+|[0-9]+", merged)
+
+    tokens = set(words + chunks)
+
+    # 조사 제거
+    stopwords = {"입니다", "하다", "의", "에", "이", "가", "을", "를", "다", "zip", "ver"}
+    filtered = {t for t in tokens if t not in stopwords and len(t) > 1}
+
+    return set(sorted(filtered))
+
+# ----------------------
+# function: 자카드 유사도 계산
+# ----------------------
+def jaccard_similarity(set1, set2):
+    if not set1 or not set2:
+        return 0
+    return len(set1 & set2) / len(set1 | set2)
+
+# ----------------------
+# param   : token - 단어
+# function: 단어 하나의 NUM_PERM개 해시값 (shake_128 출력 한 번을 32비트씩 잘라 사용, 프로세스와 무관하게 고정)
+# return  : array('I')
+# ----------------------
+def _token_hashes(token: str) -> array:
+    return array("I", hashlib.shake_128(token.encode("utf-8")).digest(NUM_PERM * 4))
+
+# ----------------------
+# param   : tokens - 단어 집합
+# param   : cache - (선택) 단어 → 해시 배열 캐시 (한 번의 그룹핑 동안 재사용)
+# function: MinHash 시그니처 계산 (해시 함수별 최솟값)
+# return  : 길이 NUM_PERM 튜플
+# ----------------------
+def minhash_signature(tokens, cache: Dict[str, array] = None) -> Tuple[int, ...]:
+    vectors = []
+    for token in tokens:
+        vec = cache.get(token) if cache is not None else None
+        if vec is None:
+            vec = _token_hashes(token)
+            if cache is not None:
+                cache[token] = vec
+        vectors.append(vec)
+    return tuple(map(min, zip(*vectors)))
+
+# ----------------------
+# param   : signature - MinHash 시그니처
+# function: LSH 밴드 키 목록 (밴드 번호 + 밴드 구간 값)
+# return  : [(band, values...)]
+# ----------------------
+def lsh_band_keys(signature: Sequence[int]) -> List[tuple]:
+    return [
+        (band,) + tuple(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+        for band in range(LSH_BANDS)
+    ]
+
+# ----------------------
+# param   : file_name - 파일명
+# function: 파일명의 RJ코드 (대문자)
+# return  : "RJ123456" 또는 None
+# ----------------------
+def rj_code(file_name: str):
+    match = RJ_PATTERN.search(file_name or "")
+    return match.group(0).upper() if match else None
+
+# ----------------------
+# param   : tokens - 단어 집합
+# function: DB 저장용 LSH 밴드 키 문자열 (file_meta.lsh_bands 멀티키 인덱스로 후보 조회)
+# return  : ["밴드:값값", ...]
+# ----------------------
+def lsh_band_strings(tokens) -> List[str]:
+    if not tokens:
+        return []
+    return [
+        f"{key[0]}:" + "".join(f"{value:08x}" for value in key[1:])
+        for key in lsh_band_keys(minhash_signature(tokens))
+    ]
+
+# ----------------------
+# param   : files - file_meta 문서 리스트 (file_name 필수)
+# function: 유사 파일 그룹핑
+#           Step 1. RJ코드 기준 그룹핑
+#           Step 2. 남은 파일을 순서대로 기준 파일로 삼아 LSH 후보 중 자카드 ≥ 0.4 인 파일을 묶음
+#                   (기존 O(n²) 전체 비교와 같은 규칙, 비교 대상만 LSH 후보로 축소)
+# return  : [[file, ...], ...] (2개 이상인 그룹만)
+# ----------------------
+def group_similar_files(files: List[dict]) -> List[List[dict]]:
+    used = set()
+    groups = []
+
+    # ----------------------
+    # Step 1. RJ코드 기준 그룹핑
+    # ----------------------
+    rj_groups = {}
+    for idx, file in enumerate(files):
+        code = rj_code(file.get("file_name", ""))
+        if code:
+            rj_groups.setdefault(code, []).append(idx)
+
+    for indices in rj_groups.values():
+        used.update(indices)
+        if len(indices) > 1:
+            groups.append([files[idx] for idx in indices])
+
+    # ----------------------
+    # Step 2. MinHash + LSH 후보 → 자카드 유사도 검증
+    # ----------------------
+    token_sets = [tokenize(file.get("file_name", "")) for file in files]
+    cache = {}
+    buckets: Dict[tuple, List[int]] = {}
+    band_keys = {}
+    for idx, tokens in enumerate(token_sets):
+        if idx in used or not tokens:
+            continue
+        keys = lsh_band_keys(minhash_signature(tokens, cache))
+        band_keys[idx] = keys
+        for key in keys:
+            buckets.setdefault(key, []).append(idx)
+
+    for i in sorted(band_keys):
+        if i in used:
+            continue
+        used.add(i)
+        group = [files[i]]
+
+        candidates = set()
+        for key in band_keys[i]:
+            candidates.update(j for j in buckets[key] if j > i and j not in used)
+
+        tokens_i = token_sets[i]
+        size_i = len(tokens_i)
+        for j in sorted(candidates):
+            # 단어 수 비율이 기준 미만이면 자카드도 기준 미만 → 비교 생략
+            size_j = len(token_sets[j])
+            if min(size_i, size_j) < SIMILARITY_THRESHOLD * max(size_i, size_j):
+                continue
+            # |A∩B| / |A∪B| (합집합을 만들지 않고 계산)
+            inter = len(tokens_i & token_sets[j])
+            if inter >= SIMILARITY_THRESHOLD * (size_i + size_j - inter):
+                group.append(files[j])
+                used.add(j)
+
+        if len(group) > 1:
+            groups.append(group)
+
+    return groups
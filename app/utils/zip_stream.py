@@ -0,0 +1,87 @@
+# ----------------------
+# file   : app/utils/zip_stream.py
+# function: 여러 파일을 임시 파일 없이 ZIP으로 묶어 스트리밍 (무압축 STORED, ZIP64)
+#           출력이 seek 불가능하므로 zipfile이 항목마다 data descriptor를 붙여 순차 기록
+# ----------------------
+
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, Tuple
+
+ZIP_CHUNK = 1024 * 1024  # 파일을 읽어 내보내는 단위 (메모리 사용량 상한)
+
+# ----------------------
+# class   : _ZipSink
+# function: zipfile이 쓰는 출력 대상 - 쓰인 바이트를 모았다가 제너레이터가 꺼내 감 (seek/tell 없음)
+# ----------------------
+class _ZipSink:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+# ----------------------
+# param   : name - 원하는 압축 내부 파일명
+# param   : used - 이미 사용한 이름들
+# function: 같은 이름이 있으면 "이름 (2).확장자" 형태로 변경
+# return  : 고유 이름
+# ----------------------
+def _unique_name(name: str, used: set) -> str:
+    candidate = name
+    stem, ext = os.path.splitext(name)
+    n = 2
+    while candidate in used:
+        candidate = f"{stem} ({n}){ext}"
+        n += 1
+    used.add(candidate)
+    return candidate
+
+# ----------------------
+# param   : entries - [(실제 경로, 압축 내부 파일명)]
+# function: ZIP 바이트를 순서대로 생성 (동기 제너레이터, StreamingResponse가 스레드풀에서 순회)
+#           없는 파일은 건너뜀, 메모리는 ZIP_CHUNK 수준으로 유지
+# return  : bytes 조각 iterator
+# ----------------------
+def stream_zip(entries: Iterable[Tuple[str, str]]) -> Iterator[bytes]:
+    sink = _ZipSink()
+    used = set()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for path, arcname in entries:
+            try:
+                st = os.stat(path)
+                src = open(path, "rb")
+            except OSError:
+                continue
+
+            info = zipfile.ZipInfo(_unique_name(arcname, used), date_time=time.localtime(max(st.st_mtime, 315532800))[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = st.st_size
+
+            with src, zf.open(info, mode="w", force_zip64=True) as dst:
+                while True:
+                    chunk = src.read(ZIP_CHUNK)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+
+    # 중앙 디렉터리
+    data = sink.drain()
+    if data:
+        yield data
@@ -0,0 +1,109 @@
+# ----------------------
+# file   : bench/bench_grouping.py
+# function: /grouped 유사 파일 그룹핑 벤치마크 (기존 O(n²) 자카드 vs MinHash + LSH)
+# usage   : python -m bench.bench_grouping [--sizes 1000,2000,5000,10000,50000] [--brute-max 5000]
+# ----------------------
+
+import argparse
+import random
+import time
+from app.utils.similarity import (
+    RJ_PATTERN, SIMILARITY_THRESHOLD, tokenize, jaccard_similarity, group_similar_files
+)
+
+COMMON_WORDS = [
+    "여름", "방학", "소녀", "마법", "학원", "모험", "전설", "기사", "드래곤", "카페",
+    "summer", "night", "magic", "school", "story", "voice", "remaster", "complete",
+    "edition", "sound", "track", "collection", "vol", "part", "final", "special",
+]
+SYLLABLES = "가나다라마바사아자차카타파하" + "abcdefghijklmnopqrstuvwxyz"
+
+# ----------------------
+# param   : n - 파일 수
+# param   : seed - 난수 시드
+# function: 시리즈(비슷한 이름 묶음) + RJ코드 + 단독 파일이 섞인 가상 파일 목록 생성
+# return  : [{file_name}]
+# ----------------------
+def make_files(n: int, seed: int = 42) -> list:
+    rnd = random.Random(seed)
+    # 라이브러리 크기에 비례하는 고유 단어 + 자주 쓰이는 공통 단어
+    vocab = ["".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 5))) for _ in range(max(200, n // 2))]
+    files = []
+    while len(files) < n:
+        base = rnd.sample(vocab, rnd.randint(2, 4)) + rnd.sample(COMMON_WORDS, rnd.randint(0, 2))
+        roll = rnd.random()
+        if roll < 0.1:
+            name = f"[RJ{rnd.randrange(100000, 999999)}] {' '.join(base)}.zip"
+            files.append({"file_name": name})
+        elif roll < 0.6:
+            for part in range(rnd.randint(2, 4)):
+                files.append({"file_name": f"{' '.join(base)} {part + 1}.zip"})
+        else:
+            files.append({"file_name": f"{' '.join(base)}.zip"})
+    return files[:n]
+
+# ----------------------
+# function: 기존 /grouped 구현 (RJ코드 → 전체 쌍 자카드 비교) - 정확도 비교 기준
+# ----------------------
+def brute_force_groups(files: list) -> list:
+    used = set()
+    groups = []
+    rj_groups = {}
+    for idx, file in enumerate(files):
+        match = RJ_PATTERN.search(file.get("file_name", ""))
+        if match:
+            rj_groups.setdefault(match.group(0).upper(), []).append(idx)
+    for indices in rj_groups.values():
+        used.update(indices)
+        if len(indices) > 1:
+            groups.append([files[idx] for idx in indices])
+
+    token_sets = [tokenize(file.get("file_name", "")) for file in files]
+    for i in range(len(files)):
+        if i in used:
+            continue
+        group = [files[i]]
+        used.add(i)
+        for j in range(i + 1, len(files)):
+            if j in used:
+                continue
+            if jaccard_similarity(token_sets[i], token_sets[j]) >= SIMILARITY_THRESHOLD:
+                group.append(files[j])
+                used.add(j)
+        if len(group) > 1:
+            groups.append(group)
+    return groups
+
+def _pairs(groups: list) -> set:
+    pairs = set()
+    for group in groups:
+        names = sorted(id(f) for f in group)
+        pairs.update((a, b) for i, a in enumerate(names) for b in names[i + 1:])
+    return pairs
+
+def _timed(fn, files):
+    start = time.perf_counter()
+    result = fn(files)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,2000,5000,10000,50000")
+    parser.add_argument("--brute-max", type=int, default=5000, help="이 크기까지만 O(n²) 기준 구현 실행")
+    args = parser.parse_args()
+
+    print(f"{'files':>8} {'brute(s)':>10} {'lsh(s)':>10} {'groups':>8} {'pair recall':>12}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        files = make_files(n)
+        lsh_groups, lsh_time = _timed(group_similar_files, files)
+
+        if n <= args.brute_max:
+            ref_groups, ref_time = _timed(brute_force_groups, files)
+            ref_pairs = _pairs(ref_groups)
+            recall = len(ref_pairs & _pairs(lsh_groups)) / len(ref_pairs) if ref_pairs else 1.0
+            print(f"{n:>8} {ref_time:>10.3f} {lsh_time:>10.3f} {len(lsh_groups):>8} {recall:>12.4f}")
+        else:
+            print(f"{n:>8} {'-':>10} {lsh_time:>10.3f} {len(lsh_groups):>8} {'-':>12}")
+
+if __name__ == "__main__":
+    main()
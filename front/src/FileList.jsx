@@ -3,9 +3,10 @@
 // function: 파일 목록 조회 + 검색 + 정렬 + 하이라이트 + 페이지네이션 + 삭제 + RJ코드 일괄 크롤링
 // ----------------------
 
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useNavigate, useSearchParams, useLocation } from 'react-router-dom';
 import axios from 'axios';
+import { downloadZip } from './zipDownload';
 
 // ----------------------
 // function: 바이트 단위 → 사람이 읽기 쉬운 형식으로 변환
@@ -32,6 +33,8 @@ export default function FileList() {
   const [searchParams] = useSearchParams();       // 쿼리스트링 파싱
   const location = useLocation();                 // URL 변경 감지
   const navigate = useNavigate();
+  const cursorsRef = useRef({});                  // 페이지 번호 → 해당 페이지 cursor 토큰 (keyset 페이징)
+  const cursorKeyRef = useRef("");                // cursor가 유효한 조회 조건 (정렬/검색어)
 
   // ----------------------
   // 계산된 현재 페이지 번호
@@ -58,14 +61,34 @@ export default function FileList() {
     );
   };
 
+  // ----------------------
+  // function: 페이지 이동 파라미터 - 이전에 받은 cursor가 있으면 keyset, 없으면 page 번호
+  // ----------------------
+  const pageParam = (key) => {
+    if (cursorKeyRef.current !== key) {
+      cursorKeyRef.current = key;
+      cursorsRef.current = {};
+    }
+    const cursor = cursorsRef.current[page];
+    return cursor ? `cursor=${encodeURIComponent(cursor)}&` : "";
+  };
+
+  // ----------------------
+  // function: 응답 반영 + 다음 페이지 cursor 저장 (total은 생략되면 기존 값 유지)
+  // ----------------------
+  const applyPage = (data) => {
+    setFiles(data.items || []);
+    if (data.total !== null && data.total !== undefined) setTotal(data.total);
+    if (data.next) cursorsRef.current[page + 1] = data.next;
+  };
+
   // ----------------------
   // function: 전체 목록 조회
   // ----------------------
   const fetchFiles = async () => {
     try {
-      const res = await axios.get(`/api/files?page=${page}&size=${size}&sort=${sort}`);
-      setFiles(res.data.items || []);
-      setTotal(res.data.total || 0);
+      const res = await axios.get(`/api/files?${pageParam(`list:${sort}`)}page=${page}&size=${size}&sort=${sort}`);
+      applyPage(res.data);
     } catch (err) {
       console.error('파일 리스트 조회 실패:', err);
     }
@@ -77,16 +100,16 @@ export default function FileList() {
   const handleSearch = async () => {
     try {
       let url = "";
+      const paging = pageParam(`search:${query}:${sort}`);
       if (query.startsWith("tag:")) {
         const tag = query.slice(4).trim();
-        url = `/api/files/search?tag=${encodeURIComponent(tag)}&page=${page}&sort=${sort}`;
+        url = `/api/files/search?tag=${encodeURIComponent(tag)}&${paging}page=${page}&sort=${sort}`;
       } else {
-        url = `/api/files/search?keyword=${encodeURIComponent(query)}&page=${page}&sort=${sort}`;
+        url = `/api/files/search?keyword=${encodeURIComponent(query)}&${paging}page=${page}&sort=${sort}`;
       }
 
       const res = await axios.get(url);
-      setFiles(res.data.items || []);
-      setTotal(res.data.total || 0);
+      applyPage(res.data);
     } catch (err) {
       console.error("검색 실패:", err);
     }
@@ -197,6 +220,7 @@ const handleBulkCrawl = async () => {
           >
             <option value="created">최신순</option>
             <option value="name">파일명순</option>
+            <option value="relevance">관련도순 (키워드 검색)</option>
           </select>
           <a href="/ui/upload" className="text-green-600 font-semibold hover:underline">업로드</a>
           <button
@@ -211,6 +235,13 @@ const handleBulkCrawl = async () => {
           >
             그룹별로 묶기
           </button>
+          <button
+            onClick={() => downloadZip(files.map((file) => file.file_hash), `noah_page_${page}`)}
+            disabled={files.length === 0}
+            className="px-4 py-2 bg-blue-600 text-white rounded disabled:opacity-50"
+          >
+            현재 페이지 ZIP
+          </button>
         </div>
       </div>
 
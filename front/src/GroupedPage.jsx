@@ -6,6 +6,7 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
+import { downloadZip } from './zipDownload';
 
 // ----------------------
 // function: 바이트 단위 → 사람이 읽기 쉬운 형식으로 변환
@@ -20,24 +21,29 @@ const formatBytes = (bytes, decimals = 1) => {
   return `${parseFloat((bytes / Math.pow(k, i)).toFixed(dm))} ${sizes[i]}`;
 };
 
+const PAGE_SIZE = 20;
+
 export default function GroupedPage() {
   const [groups, setGroups] = useState([]);
+  const [page, setPage] = useState(1);
+  const [total, setTotal] = useState(0);
   const navigate = useNavigate();
 
   // ----------------------
-  // effect: 최초 로딩 시 그룹 목록 조회
+  // effect: 페이지가 바뀔 때마다 그룹 목록 조회
   // ----------------------
   useEffect(() => {
     fetchGroups();
-  }, []);
+  }, [page]);
 
   // ----------------------
-  // function: 그룹 목록 API 호출
+  // function: 그룹 목록 API 호출 (서버에 미리 계산된 그룹을 페이지 단위로 조회)
   // ----------------------
   const fetchGroups = async () => {
     try {
-      const res = await axios.get('/api/files/grouped');
+      const res = await axios.get(`/api/files/grouped?page=${page}&size=${PAGE_SIZE}`);
       setGroups(res.data.groups || []);
+      setTotal(res.data.total || 0);
     } catch (err) {
       console.error("그룹 파일 조회 실패:", err);
     }
@@ -60,11 +66,19 @@ export default function GroupedPage() {
 
   return (
     <div className="p-6 space-y-8">
-      <h1 className="text-2xl font-bold text-blue-600">유사 파일 그룹 목록</h1>
+      <h1 className="text-2xl font-bold text-blue-600">유사 파일 그룹 목록 ({total}개 그룹)</h1>
 
       {groups.map((group, idx) => (
         <div key={idx} className="space-y-4 border border-gray-300 rounded p-4">
-          <h2 className="text-lg font-semibold text-gray-700">Group {idx + 1} ({group.length}개)</h2>
+          <div className="flex justify-between items-center">
+            <h2 className="text-lg font-semibold text-gray-700">Group {(page - 1) * PAGE_SIZE + idx + 1} ({group.length}개)</h2>
+            <button
+              onClick={() => downloadZip(group.map((file) => file.file_hash), `group_${(page - 1) * PAGE_SIZE + idx + 1}`)}
+              className="text-sm border border-blue-600 text-blue-600 px-2 py-1 rounded hover:bg-blue-50"
+            >
+              ZIP 다운로드
+            </button>
+          </div>
 
           {group.map((file, index) => (
             <div key={index} className="flex border rounded p-4 gap-4 items-start bg-white">
@@ -122,6 +136,23 @@ export default function GroupedPage() {
           ))}
         </div>
       ))}
+
+      {/* 페이지네이션 */}
+      {total > PAGE_SIZE && (
+        <div className="flex justify-center items-center gap-2 pt-6">
+          {page > 1 && (
+            <button onClick={() => setPage(page - 1)} className="px-3 py-1 rounded border bg-white text-blue-500">
+              이전
+            </button>
+          )}
+          <span className="px-3 py-1 text-gray-600">{page} / {Math.ceil(total / PAGE_SIZE)}</span>
+          {page * PAGE_SIZE < total && (
+            <button onClick={() => setPage(page + 1)} className="px-3 py-1 rounded border bg-white text-blue-500">
+              다음
+            </button>
+          )}
+        </div>
+      )}
     </div>
   );
 }
@@ -1,12 +1,14 @@
 // ----------------------
 // file   : UploadPage.jsx
-// function: 썸네일/파일/태그 입력 유지 + WebSocket 업로드 상태 확인 + 각 파일별 업로드 진행률 표시 + 동시 업로드 수 제한 (기본 3개)
+// function: 썸네일/파일/태그 입력 유지 + 업로드 전 중복 협상 + WebSocket 업로드 상태 확인 + 각 파일별 업로드 진행률 표시 + 동시 업로드 수 제한 (기본 3개)
 // ----------------------
 
 import React, { useState } from "react";
 import axios from "axios";
 import { useNavigate } from "react-router-dom";
 import { limitConcurrency } from "./concurrency"; // 동시 업로드 제한 유틸
+import { uploadFileChunked } from "./chunkUpload"; // 청크 이어올리기 유틸
+import { computeSampleHash, computeFullHash } from "./fingerprint"; // 중복 협상용 샘플 지문 / 전체 해시
 
 export default function UploadPage() {
   const [files, setFiles] = useState([]);
@@ -55,54 +57,87 @@ export default function UploadPage() {
     if (files.length === 0) return alert("파일을 선택해주세요");
 
     try {
-      const { data } = await axios.get("/get-upload-id");
+      // ----------------------
+      // 중복 협상 1차: 크기 + 샘플 지문을 한 번에 보내고 서버에 없는 파일만 업로드
+      //   exists(전체 해시 일치)만 제외, probable(샘플 지문만 일치)은 2차에서 전체 해시로 확인
+      // ----------------------
+      setStatus("중복 확인 중...");
+      const fingerprints = await Promise.all(
+        files.map(async (file) => ({
+          name: file.name,
+          size: file.size,
+          sample_hash: await computeSampleHash(file),
+        }))
+      );
+      const { data } = await axios.post("/negotiate-upload", { files: fingerprints });
       const uploadId = data.upload_id;
 
+      const existing = new Set(data.files.filter((f) => f.exists).map((f) => f.name));
+
+      // ----------------------
+      // 중복 협상 2차: probable 파일만 전체 SHA256 계산 후 다시 확인 (일치해야만 업로드 생략)
+      // ----------------------
+      const probable = new Set(data.files.filter((f) => f.probable).map((f) => f.name));
+      const candidates = files.filter((file) => probable.has(file.name));
+      if (candidates.length > 0) {
+        const hashed = [];
+        for (const file of candidates) {
+          const hash = await computeFullHash(file, (percent) =>
+            setStatus(`중복 확인 중... ${file.name} ${percent}%`)
+          );
+          hashed.push({ name: file.name, size: file.size, hash });
+        }
+        const { data: confirmed } = await axios.post("/negotiate-upload", { files: hashed });
+        confirmed.files.filter((f) => f.exists).forEach((f) => existing.add(f.name));
+      }
+      const pendingFiles = files.filter((file) => !existing.has(file.name));
+
+      setUploadProgressMap((prev) => {
+        const next = { ...prev };
+        existing.forEach((name) => { next[name] = 100; });
+        return next;
+      });
+
+      if (pendingFiles.length === 0) {
+        setStatus("");
+        setUploadProgressMap({});
+        return alert("모든 파일이 이미 서버에 있습니다.");
+      }
+      setStatus(existing.size > 0 ? `중복 ${existing.size}개 제외, ${pendingFiles.length}개 업로드` : "");
+
       if (isMultiFile) {
         // ----------------------
-        // 병렬 업로드 (동시 3개 제한)
+        // 병렬 청크 업로드 (동시 3개 제한)
         // ----------------------
-        const uploadTasks = files.map((file) => () => {
-          const formData = new FormData();
-          formData.append("files", file);
-          formData.append("upload_id", uploadId);
-
-          return axios.post("/upload", formData, {
-            onUploadProgress: (event) => {
-              const percent = Math.round((event.loaded * 100) / event.total);
+        const uploadTasks = pendingFiles.map((file) => () =>
+          uploadFileChunked(uploadId, file, {
+            onProgress: (percent) => {
               setUploadProgressMap((prev) => ({
                 ...prev,
                 [file.name]: percent,
               }));
             },
-          });
-        });
+          })
+        );
 
         await limitConcurrency(uploadTasks, 3); // 동시에 3개 제한 업로드
-        connectWebSocket(uploadId);
+        connectWebSocket(uploadId, pendingFiles.map((file) => file.name));
 
       } else {
         // ----------------------
-        // 단일 파일 + 태그 + 썸네일
+        // 단일 파일 + 썸네일 + 태그 (청크 업로드, 끊기면 이어올리기)
         // ----------------------
-        const formData = new FormData();
-        formData.append("files", files[0]);
-        formData.append("upload_id", uploadId);
-
-        if (thumb) formData.append("thumb", thumb);
-        const tagList = tags.split(" ").map(t => t.trim()).filter(t => t);
-        tagList.forEach(tag => formData.append("tags", tag));
-
-        await axios.post("/upload", formData, {
-          onUploadProgress: (event) => {
-            const percent = Math.round((event.loaded * 100) / event.total);
+        await uploadFileChunked(uploadId, files[0], {
+          thumb,
+          tags,
+          onProgress: (percent) => {
             setUploadProgressMap({
               [files[0].name]: percent,
             });
           },
         });
 
-        connectWebSocket(uploadId);
+        connectWebSocket(uploadId, [files[0].name]);
       }
 
     } catch (err) {
@@ -114,27 +149,38 @@ export default function UploadPage() {
 
   // ----------------------
   // param   : uploadId - 업로드 식별자
-  // function: WebSocket을 통해 서버 처리 상태 확인
+  // param   : names - 이번에 업로드한 파일명 목록
+  // function: WebSocket으로 서버가 push하는 파일별 처리 상태 수신, 모든 파일이 끝나면 종료
   // ----------------------
-  const connectWebSocket = (uploadId) => {
+  const connectWebSocket = (uploadId, names) => {
     const ws = new WebSocket(`ws://localhost:8000/ws/upload/${uploadId}`);
+    const terminal = ["completed", "failed", "duplicate"];
+    const fileStatus = {};
 
     ws.onmessage = (event) => {
       const data = JSON.parse(event.data);
-      setStatus(`상태: ${data.status}`);
+      fileStatus[data.file_name] = data.status;
 
-      if (["completed", "failed", "duplicate"].includes(data.status)) {
-        ws.close();
-        setUploadProgressMap({});
+      const progress = data.progress !== undefined ? ` ${data.progress}%` : "";
+      setStatus(`${data.file_name}: ${data.status}${progress}`);
 
-        if (data.status === "completed") {
-          alert("업로드 완료!");
-          navigate("/");
-        } else if (data.status === "duplicate") {
-          alert("중복된 파일입니다.");
-        } else {
-          alert("업로드 실패");
-        }
+      if (!names.every((name) => terminal.includes(fileStatus[name]))) return;
+
+      ws.close();
+      setUploadProgressMap({});
+
+      const results = names.map((name) => fileStatus[name]);
+      const failed = results.filter((s) => s === "failed").length;
+      const duplicated = results.filter((s) => s === "duplicate").length;
+
+      if (failed === 0 && duplicated === 0) {
+        alert("업로드 완료!");
+        navigate("/");
+      } else if (failed === 0) {
+        alert(`업로드 완료 (중복 ${duplicated}개)`);
+        navigate("/");
+      } else {
+        alert(`업로드 실패 ${failed}개, 중복 ${duplicated}개`);
       }
     };
 
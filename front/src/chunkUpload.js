@@ -0,0 +1,63 @@
+// ----------------------
+// file   : front/src/chunkUpload.js
+// function: 청크 단위 이어올리기 업로드 유틸리티 (끊기면 서버 수신 위치부터 재개)
+// ----------------------
+
+import axios from "axios";
+
+const CHUNK_SIZE = 8 * 1024 * 1024; // 청크 크기 8MB
+const MAX_RETRY = 5;                // 청크 하나당 최대 재시도 횟수
+
+/**
+ * 서버에 저장된 수신 바이트 수 조회
+ *
+ * @param {string} uploadId - 업로드 ID
+ * @param {string} fileName - 파일명
+ * @returns {Promise<number>} - 이미 받은 바이트 수
+ */
+async function fetchReceived(uploadId, fileName) {
+  const { data } = await axios.get(`/upload/status/${uploadId}`, {
+    params: { file_name: fileName },
+  });
+  return data.received || 0;
+}
+
+/**
+ * 파일을 청크로 나눠 업로드 후 완료 처리
+ *
+ * @param {string} uploadId - /get-upload-id 로 받은 업로드 ID
+ * @param {File} file - 업로드할 파일
+ * @param {Object} options - { thumb, tags(스페이스 구분 문자열), onProgress(percent) }
+ * @returns {Promise<Object>} - 완료 응답 { upload_id, file_name, file_hash }
+ */
+export async function uploadFileChunked(uploadId, file, { thumb = null, tags = "", onProgress = () => {} } = {}) {
+  let offset = await fetchReceived(uploadId, file.name);
+  let retry = 0;
+
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + CHUNK_SIZE);
+    try {
+      const { data } = await axios.put(`/upload/chunk/${uploadId}`, chunk, {
+        params: { file_name: file.name, offset },
+        headers: { "Content-Type": "application/octet-stream" },
+      });
+      offset = data.received;
+      retry = 0;
+      onProgress(Math.round((offset * 100) / file.size));
+    } catch (err) {
+      if (++retry > MAX_RETRY) throw err;
+      // 연결 끊김/오프셋 불일치 → 서버 기준 위치부터 재개
+      await new Promise((r) => setTimeout(r, 1000 * retry));
+      offset = await fetchReceived(uploadId, file.name);
+    }
+  }
+
+  const formData = new FormData();
+  formData.append("file_name", file.name);
+  formData.append("size", file.size);
+  if (thumb) formData.append("thumb", thumb);
+  if (tags.trim()) formData.append("tags", tags.trim());
+
+  const { data } = await axios.post(`/upload/complete/${uploadId}`, formData);
+  return data;
+}
@@ -0,0 +1,160 @@
+// ----------------------
+// file   : front/src/fingerprint.js
+// function: 업로드 전 중복 확인용 샘플 지문 계산 (서버 hash_util.compute_sample_hash 와 동일 규칙)
+//           + 샘플 지문이 겹친 파일 확정용 전체 SHA256
+// ----------------------
+
+const SAMPLE_BLOCK = 64 * 1024; // 앞/중간/끝 블록 크기
+
+/**
+ * 샘플 지문 = SHA256("{크기}:" + 앞/중간/끝 64KB), 작은 파일은 전체 내용
+ *
+ * @param {File} file - 대상 파일
+ * @returns {Promise<string>} - 16진수 해시 문자열
+ */
+export async function computeSampleHash(file) {
+  const size = file.size;
+  const parts = [new TextEncoder().encode(`${size}:`)];
+
+  if (size <= SAMPLE_BLOCK * 3) {
+    parts.push(new Uint8Array(await file.arrayBuffer()));
+  } else {
+    const middle = Math.floor((size - SAMPLE_BLOCK) / 2);
+    for (const offset of [0, middle, size - SAMPLE_BLOCK]) {
+      const block = await file.slice(offset, offset + SAMPLE_BLOCK).arrayBuffer();
+      parts.push(new Uint8Array(block));
+    }
+  }
+
+  const total = parts.reduce((n, p) => n + p.length, 0);
+  const buffer = new Uint8Array(total);
+  let pos = 0;
+  for (const p of parts) {
+    buffer.set(p, pos);
+    pos += p.length;
+  }
+
+  const digest = await crypto.subtle.digest("SHA-256", buffer);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+const FULL_HASH_SLICE = 4 * 1024 * 1024;        // 전체 해시 계산 시 읽기 단위
+const SUBTLE_MAX_SIZE = 256 * 1024 * 1024;      // 이 크기 이하는 crypto.subtle 로 한 번에 계산
+
+// SHA-256 라운드 상수
+const K = new Uint32Array([
+  0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+  0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+  0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+  0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+  0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+  0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+  0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+  0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+]);
+
+/**
+ * 누적 SHA-256 (crypto.subtle 은 스트리밍을 지원하지 않아 큰 파일을 메모리에 올리지 않도록 직접 계산)
+ */
+class Sha256 {
+  constructor() {
+    this.h = new Uint32Array([
+      0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+    ]);
+    this.w = new Uint32Array(64);
+    this.block = new Uint8Array(64);
+    this.blockLen = 0;
+    this.length = 0;
+  }
+
+  /**
+   * @param {Uint8Array} data - 이어서 계산할 바이트
+   */
+  update(data) {
+    let pos = 0;
+    this.length += data.length;
+    if (this.blockLen > 0) {
+      pos = Math.min(64 - this.blockLen, data.length);
+      this.block.set(data.subarray(0, pos), this.blockLen);
+      this.blockLen += pos;
+      if (this.blockLen < 64) return;
+      this.compress(this.block, 0);
+      this.blockLen = 0;
+    }
+    for (; pos + 64 <= data.length; pos += 64) this.compress(data, pos);
+    if (pos < data.length) {
+      this.block.set(data.subarray(pos), 0);
+      this.blockLen = data.length - pos;
+    }
+  }
+
+  compress(buf, off) {
+    const w = this.w;
+    const H = this.h;
+    for (let i = 0; i < 16; i++) {
+      const j = off + i * 4;
+      w[i] = (buf[j] << 24) | (buf[j + 1] << 16) | (buf[j + 2] << 8) | buf[j + 3];
+    }
+    for (let i = 16; i < 64; i++) {
+      const x = w[i - 15];
+      const y = w[i - 2];
+      const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+      const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+      w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0;
+    }
+
+    let a = H[0], b = H[1], c = H[2], d = H[3], e = H[4], f = H[5], g = H[6], h = H[7];
+    for (let i = 0; i < 64; i++) {
+      const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+      const t1 = (h + S1 + ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0;
+      const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+      const t2 = (S0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+      h = g; g = f; f = e; e = (d + t1) | 0;
+      d = c; c = b; b = a; a = (t1 + t2) | 0;
+    }
+    H[0] += a; H[1] += b; H[2] += c; H[3] += d;
+    H[4] += e; H[5] += f; H[6] += g; H[7] += h;
+  }
+
+  /**
+   * @returns {string} - 16진수 해시 문자열
+   */
+  hexdigest() {
+    const bits = this.length * 8;
+    const pad = new Uint8Array((this.blockLen < 56 ? 56 : 120) - this.blockLen + 8);
+    pad[0] = 0x80;
+    const view = new DataView(pad.buffer);
+    view.setUint32(pad.length - 8, Math.floor(bits / 0x100000000));
+    view.setUint32(pad.length - 4, bits >>> 0);
+    this.update(pad);
+    return Array.from(this.h).map((v) => v.toString(16).padStart(8, "0")).join("");
+  }
+}
+
+/**
+ * 전체 SHA-256 (서버 file_hash 와 동일) - 샘플 지문만 일치한 파일을 확정할 때 사용
+ * 작은 파일은 crypto.subtle, 큰 파일은 4MB 씩 읽으며 누적 계산
+ *
+ * @param {File} file - 대상 파일
+ * @param {Function} onProgress - (선택) 진행률 콜백 (percent)
+ * @returns {Promise<string>} - 16진수 해시 문자열
+ */
+export async function computeFullHash(file, onProgress = () => {}) {
+  if (file.size <= SUBTLE_MAX_SIZE) {
+    const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+    onProgress(100);
+    return Array.from(new Uint8Array(digest))
+      .map((b) => b.toString(16).padStart(2, "0"))
+      .join("");
+  }
+
+  const hasher = new Sha256();
+  for (let offset = 0; offset < file.size; offset += FULL_HASH_SLICE) {
+    const slice = await file.slice(offset, offset + FULL_HASH_SLICE).arrayBuffer();
+    hasher.update(new Uint8Array(slice));
+    onProgress(Math.round((Math.min(offset + FULL_HASH_SLICE, file.size) * 100) / file.size));
+  }
+  return hasher.hexdigest();
+}
@@ -0,0 +1,33 @@
+// ----------------------
+// file   : front/src/zipDownload.js
+// function: 여러 파일을 서버에서 ZIP으로 묶어 내려받기 (/api/files/zip, 브라우저 기본 다운로드 사용)
+// ----------------------
+
+/**
+ * 숨김 form POST로 ZIP 다운로드 시작 (응답을 메모리에 올리지 않고 브라우저가 바로 저장)
+ *
+ * @param {string[]} hashes - 묶을 파일 해시 목록
+ * @param {string} name - ZIP 파일명 (확장자 제외)
+ */
+export function downloadZip(hashes, name = "noah_files") {
+  if (!hashes || hashes.length === 0) return;
+
+  const form = document.createElement("form");
+  form.method = "POST";
+  form.action = "/api/files/zip";
+  form.style.display = "none";
+
+  const append = (key, value) => {
+    const input = document.createElement("input");
+    input.type = "hidden";
+    input.name = key;
+    input.value = value;
+    form.appendChild(input);
+  };
+  hashes.forEach((hash) => append("hashes", hash));
+  append("name", name);
+
+  document.body.appendChild(form);
+  form.submit();
+  form.remove();
+}
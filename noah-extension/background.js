@@ -21,7 +21,8 @@ chrome.downloads.onCreated.addListener(async (downloadItem) => {
   
         const result = await response.json();
         if (response.ok) {
-          console.log("[NOAH] 서버 저장 성공:", result.file_name);
+          // 서버는 다운로드 작업만 등록하고 바로 응답 (진행 상황: GET /proxy-download/{job_id})
+          console.log("[NOAH] 서버 다운로드 등록:", result.file_name, result.job_id);
         } else {
           console.warn("[NOAH] 서버 응답 실패:", result);
         }